@@ -0,0 +1,37 @@
+"""Add Interview.summary
+
+Revision ID: 2e9c4b7d5f10
+Revises: 8d3f2a6b1c47
+Create Date: 2026-10-18 18:05:52.640193
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "2e9c4b7d5f10"
+down_revision: Union[str, None] = "8d3f2a6b1c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "Interview",
+        sa.Column("summary", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    op.add_column(
+        "Interview",
+        sa.Column(
+            "summary_message_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("Interview", "summary_message_count")
+    op.drop_column("Interview", "summary")
@@ -0,0 +1,46 @@
+"""Add Job table
+
+Revision ID: 5b1e0d7a9c23
+Revises: c942503f64f1
+Create Date: 2026-10-18 14:02:17.331905
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e0d7a9c23"
+down_revision: Union[str, None] = "c942503f64f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Job",
+        sa.Column("kind", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("interview_id", sa.Uuid(), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.ForeignKeyConstraint(["interview_id"], ["Interview.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["User.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Unfinished jobs are re-queued on startup
+    op.create_index(op.f("ix_Job_status"), "Job", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_Job_status"), table_name="Job")
+    op.drop_table("Job")
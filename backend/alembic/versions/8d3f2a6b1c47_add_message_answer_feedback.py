@@ -0,0 +1,26 @@
+"""Add Message.answer_feedback
+
+Revision ID: 8d3f2a6b1c47
+Revises: 5b1e0d7a9c23
+Create Date: 2026-10-18 16:40:05.214870
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3f2a6b1c47"
+down_revision: Union[str, None] = "5b1e0d7a9c23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("Message", sa.Column("answer_feedback", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("Message", "answer_feedback")
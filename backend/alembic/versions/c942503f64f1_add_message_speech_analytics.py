@@ -0,0 +1,26 @@
+"""Add Message.speech_analytics
+
+Revision ID: c942503f64f1
+Revises: f7ea79e3a4ce
+Create Date: 2026-10-18 10:12:41.508314
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c942503f64f1"
+down_revision: Union[str, None] = "f7ea79e3a4ce"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("Message", sa.Column("speech_analytics", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("Message", "speech_analytics")
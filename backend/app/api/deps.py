@@ -1,3 +1,4 @@
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt import decode
@@ -21,9 +22,14 @@ def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: Session = SessionDep,
 ) -> User:
+    return get_user_from_token(token, session)
+
+
+def get_user_from_token(token: str, session: Session) -> User:
+    """Resolve a JWT to its user (also used by WebSocket routes)."""
     try:
         payload = decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        user_id: str = payload.get("sub")
+        user_id = uuid.UUID(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=403, detail="Invalid token")
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth, resume, interview, questions
+from app.api.routes import auth, resume, interview, questions, jobs
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -8,3 +8,4 @@ api_router.include_router(auth.router)
 api_router.include_router(resume.router)
 api_router.include_router(interview.router)
 api_router.include_router(questions.router)
+api_router.include_router(jobs.router)
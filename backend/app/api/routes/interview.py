@@ -1,6 +1,11 @@
+import asyncio
 import uuid
+from dataclasses import dataclass, field
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import UploadFile, File, Form
+from fastapi import Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from app.models.interview import Interview, InterviewPublic, InterviewCreate
@@ -8,14 +13,352 @@ from app.models.user import User
 from app.models.message import Message, MessageCreate, MessagePublic
 from app.models.feedback import Feedback, FeedbackCreate, FeedbackPublic
 from app.models.question import Question
-from app.api.deps import get_current_user, SessionDep
+from app.models.job import JobPublic
+from app.api.deps import get_current_user, get_user_from_token, SessionDep
+from app.api.routes.jobs import submit_job
+from app.api.sse import sse_event
 from fastapi.logger import logger
-from app.services.ai_service import transcribe_audio, generate_interview_feedback
-from typing import List
+from app.services.ai_service import (
+    FEEDBACK_FIELDS,
+    LLMTimeout,
+    LLMUnavailable,
+    analyze_answer,
+    generate_follow_up,
+    generate_interview_feedback,
+    llm_fallback_errors,
+    stream_interview_feedback,
+    summarize_interview,
+)
+from app.services.transcription import (
+    transcribe,
+    transcription_pool,
+    AnswerTooLarge,
+    StreamingTranscriber,
+    TranscriptionQueueFull,
+)
+from app.services.audio import AudioDecodeError
+from app.services.jobs import JobQueueFull, answer_job_queue, job_queue
+from app.services.single_flight import generation_flights
+from app.services.speculation import turn_speculator
+from app.services.speech_analytics import summarize_speech_rate
+from app.core.config import settings
+from typing import List, Optional
 
 router = APIRouter(prefix="/interviews", tags=["Interviews"])
 
 
+async def transcribe_upload(file: UploadFile, initial_prompt: Optional[str]) -> dict:
+    audio_bytes = await file.read()
+    try:
+        # 16 kHz mono PCM/WAV uploads are read directly, anything else
+        # (e.g. the recorder's webm) goes through ffmpeg
+        return await transcribe(audio_bytes, initial_prompt, file.content_type)
+    except TranscriptionQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription service is busy, please retry shortly.",
+            headers={"Retry-After": "2"},
+        )
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def transcription_prompt(session: Session, interview: Interview) -> Optional[str]:
+    """Text of the question being answered, used to condition the decoder."""
+    if not settings.WHISPER_CONDITION_ON_QUESTION:
+        return None
+
+    answered = len(
+        session.exec(
+            select(Message.id).where(
+                Message.interview_id == interview.id, Message.role == "assistant"
+            )
+        ).all()
+    )
+
+    if interview.interview_type == "coding":
+        if answered >= len(UMPIRE_STEPS):
+            return None
+        return generate_prompt_for_step(UMPIRE_STEPS[answered])
+
+    questions = session.exec(
+        select(Question)
+        .where(Question.interview_id == interview.id)
+        .order_by(Question.created_at)
+    ).all()
+    if answered >= len(questions):
+        return None
+    return questions[answered].description
+
+
+def behavioral_reply(questions: List[str], answered: int) -> str:
+    """Scripted reply to the answer to `questions[answered]`."""
+    if answered + 1 >= len(questions):
+        return "Thank you! You've completed the interview. Please wait while we generate your feedback."
+    return f"Thank you for your response. Here's your next question: {questions[answered + 1]}"
+
+
+def coding_reply(answered: int) -> str:
+    if answered >= len(UMPIRE_STEPS):
+        return (
+            "✅ You've completed all 6 UMPIRE stages. Generating final feedback soon..."
+        )
+    return generate_prompt_for_step(UMPIRE_STEPS[answered])
+
+
+def save_behavioral_turn(
+    session: Session,
+    interview_id: uuid.UUID,
+    user_text: str,
+    speech_analytics: Optional[dict] = None,
+    reply: Optional[str] = None,
+) -> List[Message]:
+    """`reply` is the one made for this turn (see `reply_to_answer`)."""
+    # Save user's message
+    user_msg = Message(
+        role="user",
+        content=user_text,
+        interview_id=interview_id,
+        speech_analytics=speech_analytics,
+    )
+    session.add(user_msg)
+    session.commit()
+    session.refresh(user_msg)
+
+    # Get questions for this interview (ordered by creation)
+    questions = session.exec(
+        select(Question)
+        .where(Question.interview_id == interview_id)
+        .order_by(Question.created_at)
+    ).all()
+
+    if not questions:
+        raise HTTPException(
+            status_code=404, detail="No questions found for this interview"
+        )
+
+    # Count how many AI messages already exist to determine current question
+    if reply is None:
+        assistant_messages = session.exec(
+            select(Message)
+            .where(Message.interview_id == interview_id, Message.role == "assistant")
+            .order_by(Message.created_at)
+        ).all()
+        reply = behavioral_reply(
+            [q.description for q in questions], len(assistant_messages)
+        )
+
+    # Save AI message
+    ai_msg = Message(role="assistant", content=reply, interview_id=interview_id)
+    session.add(ai_msg)
+    session.commit()
+    session.refresh(ai_msg)
+
+    return [user_msg, ai_msg]
+
+
+def save_coding_turn(
+    session: Session,
+    interview_id: uuid.UUID,
+    user_text: str,
+    speech_analytics: Optional[dict] = None,
+    reply: Optional[str] = None,
+) -> List[Message]:
+    """`reply` is the one made for this turn (see `reply_to_answer`)."""
+    # Save user message
+    user_msg = Message(
+        role="user",
+        content=user_text,
+        interview_id=interview_id,
+        speech_analytics=speech_analytics,
+    )
+    session.add(user_msg)
+    session.commit()
+    session.refresh(user_msg)
+
+    # Determine current UMPIRE step based on how many assistant messages already exist
+    if reply is None:
+        assistant_messages = session.exec(
+            select(Message)
+            .where(Message.interview_id == interview_id, Message.role == "assistant")
+            .order_by(Message.created_at)
+        ).all()
+        reply = coding_reply(len(assistant_messages))
+
+    # Save assistant message
+    ai_msg = Message(role="assistant", content=reply, interview_id=interview_id)
+    session.add(ai_msg)
+    session.commit()
+    session.refresh(ai_msg)
+
+    return [user_msg, ai_msg]
+
+
+def turn_state(session: Session, interview_id: uuid.UUID) -> tuple:
+    """
+    How far the interview has got: the assistant replies so far and the
+    latest message. A reply prepared in one state is stale in any other.
+    """
+    messages = session.exec(
+        select(Message.id, Message.role)
+        .where(Message.interview_id == interview_id)
+        .order_by(Message.created_at)
+    ).all()
+    answered = sum(1 for _, role in messages if role == "assistant")
+    return (answered, messages[-1][0] if messages else None)
+
+
+@dataclass
+class PlannedTurn:
+    """
+    The reply to the answer being given, planned before the answer is in.
+    `reply` is the scripted one. In behavioral interviews the LLM instead
+    asks `next_question` as a follow-up, given `question` and the rolling
+    `summary` of the first `summarized` messages; `new_turns` are the ones
+    still to be folded into it. `follow_up` is prepared without the answer,
+    for when the answer-aware one isn't ready in time.
+    """
+
+    reply: str
+    question: Optional[str] = None
+    next_question: Optional[str] = None
+    summary: Optional[str] = None
+    summarized: int = 0
+    new_turns: List[str] = field(default_factory=list)
+    follow_up: Optional[str] = None
+
+
+def plan_turn(session: Session, interview: Interview) -> Optional[PlannedTurn]:
+    """
+    Read what the reply to the current answer needs from the database.
+    None if the interview has no questions yet.
+    """
+    messages = session.exec(
+        select(Message)
+        .where(Message.interview_id == interview.id)
+        .order_by(Message.created_at)
+    ).all()
+    answered = sum(1 for m in messages if m.role == "assistant")
+
+    if interview.interview_type == "coding":
+        return PlannedTurn(coding_reply(answered))
+
+    questions = [
+        q.description
+        for q in session.exec(
+            select(Question)
+            .where(Question.interview_id == interview.id)
+            .order_by(Question.created_at)
+        ).all()
+    ]
+    if not questions:
+        return None
+
+    # The question being answered is the last reply, or the opening one
+    asked = messages[-1] if messages and messages[-1].role == "assistant" else None
+    earlier = messages[:-1] if asked else messages
+    opening = questions[min(answered, len(questions) - 1)]
+    plan = PlannedTurn(
+        behavioral_reply(questions, answered),
+        question=asked.content if asked else opening,
+        next_question=(
+            questions[answered + 1] if answered + 1 < len(questions) else None
+        ),
+        summary=interview.summary,
+        summarized=interview.summary_message_count,
+    )
+    if settings.FOLLOW_UP_QUESTIONS and plan.next_question:
+        speakers = {"assistant": "Interviewer", "user": "Candidate"}
+        plan.new_turns = [
+            f"{speakers[m.role]}: {m.content}" for m in earlier[plan.summarized :]
+        ]
+    return plan
+
+
+async def prepare_plan(plan: PlannedTurn) -> PlannedTurn:
+    """
+    The LLM work that doesn't need the answer, done while the candidate
+    speaks: fold the turns since the last summary (normally the previous
+    question and answer) into it, then prepare a follow-up from it.
+    """
+    if plan.new_turns:
+        try:
+            plan.summary = await summarize_interview(plan.summary, plan.new_turns)
+            plan.summarized += len(plan.new_turns)
+        except llm_fallback_errors() + (ValueError,) as e:
+            # Follow up without these turns; the next plan retries them
+            logger.warning(f"Interview summary not updated: {e!r}")
+    if settings.FOLLOW_UP_QUESTIONS and plan.next_question:
+        try:
+            plan.follow_up = await generate_follow_up(
+                plan.summary, plan.question, None, plan.next_question
+            )
+        except llm_fallback_errors() + (ValueError,) as e:
+            logger.warning(f"Follow-up question not prepared: {e!r}")
+    return plan
+
+
+def prepare_next_reply(session: Session, interview: Interview) -> None:
+    """
+    Start planning the reply to the answer the candidate is giving now, so
+    it is ready by the time the answer is transcribed. Call it whenever a
+    question is shown; it does nothing if that reply is already prepared.
+    """
+    if not settings.SPECULATIVE_TURNS:
+        return
+    plan = plan_turn(session, interview)
+    if plan is not None:
+        turn_speculator.prepare(
+            interview.id, turn_state(session, interview.id), lambda: prepare_plan(plan)
+        )
+
+
+async def reply_to_answer(
+    session: Session, interview_id: uuid.UUID, answer: str
+) -> Optional[str]:
+    """
+    The assistant reply to `answer`. Waiting for the prepared plan and the
+    answer-aware follow-up together takes at most FOLLOW_UP_TIMEOUT_SECONDS;
+    past that the prepared follow-up, else the scripted reply, is used, so
+    a turn is never held up by more than that. Saves the plan's summary.
+    None leaves the reply to `save_*_turn`.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.FOLLOW_UP_TIMEOUT_SECONDS
+    interview = session.get(Interview, interview_id)
+    plan = None
+    if settings.SPECULATIVE_TURNS:
+        plan = await turn_speculator.take(
+            interview_id,
+            turn_state(session, interview_id),
+            timeout=settings.FOLLOW_UP_TIMEOUT_SECONDS,
+        )
+    if plan is None:
+        # Missing or late: plan without the LLM; the summary catches up on
+        # these turns in the next plan
+        plan = plan_turn(session, interview)
+        if plan is None:
+            return None
+
+    if plan.summarized > interview.summary_message_count:
+        interview.summary = plan.summary
+        interview.summary_message_count = plan.summarized
+        session.add(interview)
+        session.commit()
+
+    fallback = plan.follow_up or plan.reply
+    remaining = deadline - loop.time()
+    if not (settings.FOLLOW_UP_QUESTIONS and plan.next_question) or remaining <= 0:
+        return fallback
+    try:
+        return await generate_follow_up(
+            plan.summary, plan.question, answer, plan.next_question, remaining
+        )
+    except llm_fallback_errors() + (ValueError,) as e:
+        logger.warning(f"Follow-up question not generated in time: {e!r}")
+        return fallback
+
+
 # Create a new interview session
 @router.post("/", response_model=InterviewPublic)
 async def create_interview(
@@ -75,50 +418,18 @@ async def handle_audio_chat(
     if not interview or interview.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    audio_bytes = await file.read()
-    user_text = transcribe_audio(audio_bytes)
-
-    # Save user's message
-    user_msg = Message(role="user", content=user_text, interview_id=interview_id)
-    session.add(user_msg)
-    session.commit()
-    session.refresh(user_msg)
-
-    # Get questions for this interview (ordered by creation)
-    questions = session.exec(
-        select(Question)
-        .where(Question.interview_id == interview_id)
-        .order_by(Question.created_at)
-    ).all()
-
-    if not questions:
-        raise HTTPException(
-            status_code=404, detail="No questions found for this interview"
-        )
-
-    # Count how many AI messages already exist to determine current question
-    assistant_messages = session.exec(
-        select(Message)
-        .where(Message.interview_id == interview_id, Message.role == "assistant")
-        .order_by(Message.created_at)
-    ).all()
-
-    current_question_index = len(assistant_messages)
-
-    # Determine AI response
-    if current_question_index >= len(questions):
-        ai_reply = "Thank you! You've completed the interview. Please wait while we generate your feedback."
-    else:
-        current_question = questions[current_question_index]
-        ai_reply = f"Thank you for your response. Here's your next question: {current_question.description}"
-
-    # Save AI message
-    ai_msg = Message(role="assistant", content=ai_reply, interview_id=interview_id)
-    session.add(ai_msg)
-    session.commit()
-    session.refresh(ai_msg)
+    # The reply is prepared while the audio is transcribed
+    prepare_next_reply(session, interview)
+    result = await transcribe_upload(file, transcription_prompt(session, interview))
 
-    return [user_msg, ai_msg]
+    reply = await reply_to_answer(session, interview_id, result["text"])
+    messages = save_behavioral_turn(
+        session, interview_id, result["text"], result["analytics"], reply
+    )
+    queue_answer_feedback(current_user.id, messages[0])
+    # The next question is on screen now: prepare the reply to its answer
+    prepare_next_reply(session, interview)
+    return messages
 
 
 @router.post("/{interview_id}/chat/coding", response_model=List[MessagePublic])
@@ -137,55 +448,278 @@ async def handle_coding_audio_chat(
             status_code=400, detail="This route only supports coding interviews"
         )
 
-    # Transcribe
-    audio_bytes = await file.read()
-    user_text = transcribe_audio(audio_bytes)
+    # Transcribe, preparing the reply meanwhile
+    prepare_next_reply(session, interview)
+    result = await transcribe_upload(file, transcription_prompt(session, interview))
 
-    # Save user message
-    user_msg = Message(role="user", content=user_text, interview_id=interview_id)
-    session.add(user_msg)
-    session.commit()
-    session.refresh(user_msg)
+    reply = await reply_to_answer(session, interview_id, result["text"])
+    messages = save_coding_turn(
+        session, interview_id, result["text"], result["analytics"], reply
+    )
+    queue_answer_feedback(current_user.id, messages[0])
+    prepare_next_reply(session, interview)
+    return messages
 
-    # Determine current UMPIRE step based on how many assistant messages already exist
-    assistant_messages = session.exec(
-        select(Message)
-        .where(Message.interview_id == interview_id, Message.role == "assistant")
-        .order_by(Message.created_at)
-    ).all()
 
-    current_step_index = len(assistant_messages)
+@router.websocket("/{interview_id}/chat/stream")
+async def stream_audio_chat(
+    websocket: WebSocket,
+    interview_id: uuid.UUID,
+    token: str = Query(...),
+    session: Session = SessionDep,
+):
+    """
+    Stream one answer as binary audio frames and receive partial transcripts.
+
+    Client -> server: binary frames of the recording, then the text frame
+    "end" once the candidate stops speaking.
+    Server -> client: {"type": "partial", "text": ...} while audio arrives,
+    then {"type": "final", "messages": [user_msg, ai_msg]} and the socket
+    closes. Messages are saved exactly like the /chat routes do.
+    """
+    try:
+        current_user = get_user_from_token(token, session)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
 
-    if current_step_index >= len(UMPIRE_STEPS):
-        ai_reply = (
-            "✅ You've completed all 6 UMPIRE stages. Generating final feedback soon..."
+    interview = session.get(Interview, interview_id)
+    if not interview or interview.user_id != current_user.id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    interview_type = interview.interview_type
+    initial_prompt = transcription_prompt(session, interview)
+    # The reply is prepared while the candidate speaks
+    prepare_next_reply(session, interview)
+    # Don't hold a pooled connection while the candidate speaks; the session
+    # checks out a new one only when the turn is saved
+    session.close()
+
+    await websocket.accept()
+    try:
+        transcriber = StreamingTranscriber(transcription_pool, initial_prompt)
+    except AudioDecodeError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    partial_task: asyncio.Task | None = None
+
+    async def send_partial():
+        try:
+            text = await transcriber.partial()
+        except (AudioDecodeError, TranscriptionQueueFull):
+            # Partials are best effort; the final transcript is what counts
+            return
+        await websocket.send_json({"type": "partial", "text": text})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                await transcriber.feed(message["bytes"])
+                if transcriber.partial_due() and (
+                    partial_task is None or partial_task.done()
+                ):
+                    partial_task = asyncio.create_task(send_partial())
+            elif message.get("text") == "end":
+                break
+
+        if partial_task is not None:
+            await partial_task
+
+        try:
+            result = await transcriber.finalize()
+        except TranscriptionQueueFull:
+            await websocket.send_json(
+                {"type": "error", "detail": "Transcription service is busy."}
+            )
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        except AudioDecodeError as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+            return
+
+        save_turn = (
+            save_coding_turn if interview_type == "coding" else save_behavioral_turn
         )
-    else:
-        current_step = UMPIRE_STEPS[current_step_index]
-        ai_reply = generate_prompt_for_step(current_step)
+        reply = await reply_to_answer(session, interview_id, result["text"])
+        messages = save_turn(
+            session, interview_id, result["text"], result["analytics"], reply
+        )
+        queue_answer_feedback(current_user.id, messages[0])
+
+        await websocket.send_json(
+            {
+                "type": "final",
+                "messages": [
+                    MessagePublic.model_validate(m).model_dump(mode="json")
+                    for m in messages
+                ],
+            }
+        )
+        await websocket.close()
+    except AnswerTooLarge as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+    except AudioDecodeError as e:
+        # ffmpeg gave up on the stream mid-answer
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+    except WebSocketDisconnect:
+        pass
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        if partial_task is not None and not partial_task.done():
+            partial_task.cancel()
+        transcriber.close()
+        session.close()
+
+
+def question_for_answer(session: Session, message: Message) -> Optional[str]:
+    """Text of the question a user message answers."""
+    previous = session.exec(
+        select(Message)
+        .where(
+            Message.interview_id == message.interview_id,
+            Message.role == "assistant",
+            Message.created_at < message.created_at,
+        )
+        .order_by(Message.created_at.desc())
+    ).first()
+    if previous:
+        return previous.content
+
+    # The first answer replies to the opening question, which isn't a Message
+    interview = session.get(Interview, message.interview_id)
+    if interview.interview_type == "coding":
+        return generate_prompt_for_step(UMPIRE_STEPS[0])
+    question = session.exec(
+        select(Question)
+        .where(Question.interview_id == message.interview_id)
+        .order_by(Question.created_at)
+    ).first()
+    return question.description if question else None
+
+
+def queue_answer_feedback(user_id: uuid.UUID, message: Message) -> None:
+    """
+    Analyse a saved answer in the background while the interview goes on.
+    Best effort: an answer the queue can't take is analysed with the final
+    feedback instead.
+    """
+    if not settings.FEEDBACK_PER_ANSWER:
+        return
+    try:
+        answer_job_queue.submit(
+            "answer_feedback",
+            user_id,
+            {"message_id": str(message.id)},
+            interview_id=message.interview_id,
+        )
+    except (JobQueueFull, RuntimeError) as e:
+        logger.warning(f"Answer {message.id} not queued for feedback: {e!r}")
+
+
+async def create_answer_feedback(session: Session, message: Message) -> dict:
+    """
+    Notes on one answer, generated once and stored on its Message. The
+    background job and a final feedback that can't wait for it share one
+    generation.
+    """
+    if message.answer_feedback:
+        return message.answer_feedback
+    return await generation_flights.run(
+        ("answer_feedback", message.id),
+        lambda: _generate_answer_feedback(session, message),
+    )
 
-    # Save assistant message
-    ai_msg = Message(role="assistant", content=ai_reply, interview_id=interview_id)
-    session.add(ai_msg)
+
+async def _generate_answer_feedback(session: Session, message: Message) -> dict:
+    notes = await analyze_answer(question_for_answer(session, message), message.content)
+    message.answer_feedback = notes
+    session.add(message)
     session.commit()
-    session.refresh(ai_msg)
+    return notes
+
+
+@answer_job_queue.handler("answer_feedback")
+async def answer_feedback_job(session: Session, payload: dict) -> dict:
+    message = session.get(Message, uuid.UUID(payload["message_id"]))
+    if message is None:
+        raise ValueError("Message not found")
+    return await create_answer_feedback(session, message)
+
+
+async def collect_answer_feedback(
+    session: Session, messages: List[Message]
+) -> Optional[List[dict]]:
+    """
+    Per-answer notes for the final feedback, generating (concurrently) any
+    the background jobs haven't stored yet. None when the LLM can't provide
+    them, in which case the feedback reads the whole transcript instead.
+    """
+    if not settings.FEEDBACK_PER_ANSWER:
+        return None
+
+    results = await asyncio.gather(
+        *(create_answer_feedback(session, m) for m in messages),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if not errors:
+        return list(results)
+    if all(isinstance(e, llm_fallback_errors() + (ValueError,)) for e in errors):
+        logger.warning(f"Per-answer feedback unavailable: {errors[0]!r}")
+        return None
+    raise errors[0]
+
+
+def save_feedback(session: Session, feedback: Feedback) -> Feedback:
+    """
+    Save generated feedback. If another process saved the interview's
+    feedback first (interview_id is unique), that one is kept and returned.
+    """
+    session.add(feedback)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return session.exec(
+            select(Feedback).where(Feedback.interview_id == feedback.interview_id)
+        ).one()
+    session.refresh(feedback)
+    return feedback
 
-    return [user_msg, ai_msg]
 
+async def create_feedback(
+    session: Session, interview_id: uuid.UUID
+) -> FeedbackPublic:
+    """
+    Generate and save the feedback for an interview, or return the saved one.
+    Concurrent calls for the same interview (double clicks, retries) share
+    one generation.
+    """
+    return await generation_flights.run(
+        ("feedback", interview_id),
+        lambda: _generate_feedback(session, interview_id),
+    )
 
-@router.post("/{interview_id}/feedback", response_model=FeedbackPublic)
-async def generate_feedback_for_interview(
-    interview_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    session: Session = SessionDep,
-):
+
+async def _generate_feedback(
+    session: Session, interview_id: uuid.UUID
+) -> FeedbackPublic:
     interview = session.get(Interview, interview_id)
-    if not interview or interview.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Interview not found")
 
     # Avoid generating duplicate feedback
     if interview.feedback:
-        return interview.feedback
+        return FeedbackPublic.model_validate(interview.feedback)
 
     # Get user messages
     messages = session.exec(
@@ -199,8 +733,23 @@ async def generate_feedback_for_interview(
     if not user_texts:
         raise HTTPException(status_code=400, detail="No user responses to analyze.")
 
+    # Speech rate comes from the measured audio; the LLM only rates it when
+    # no answer was spoken
+    speech_rate = summarize_speech_rate([m.speech_analytics for m in messages])
+
+    # Aggregate the per-answer notes, so this step costs about the same
+    # however long the interview was
+    answer_notes = await collect_answer_feedback(session, messages)
+
     # Generate feedback
-    feedback_data = generate_interview_feedback(user_texts)
+    try:
+        feedback_data = await generate_interview_feedback(
+            user_texts, speech_rate, answer_notes
+        )
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
     feedback = Feedback(
         interview_id=interview_id,
@@ -208,11 +757,157 @@ async def generate_feedback_for_interview(
         speech_rate=feedback_data.get("speech_rate", ""),
         overall_feedback=feedback_data.get("overall_feedback", ""),
     )
+    return FeedbackPublic.model_validate(save_feedback(session, feedback))
 
-    session.add(feedback)
-    session.commit()
-    session.refresh(feedback)
-    return feedback
+
+@job_queue.handler("feedback")
+async def feedback_job(session: Session, payload: dict) -> dict:
+    feedback = await create_feedback(session, uuid.UUID(payload["interview_id"]))
+    return feedback.model_dump(mode="json")
+
+
+@router.post("/{interview_id}/feedback", response_model=FeedbackPublic)
+async def generate_feedback_for_interview(
+    interview_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    session: Session = SessionDep,
+):
+    interview = session.get(Interview, interview_id)
+    if not interview or interview.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    return await create_feedback(session, interview_id)
+
+
+@router.post(
+    "/{interview_id}/feedback/jobs", response_model=JobPublic, status_code=202
+)
+async def submit_feedback_job(
+    interview_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    session: Session = SessionDep,
+):
+    """
+    Queue feedback generation and return the job at once; poll
+    GET /jobs/{job_id} for its status and the FeedbackPublic result.
+    """
+    interview = session.get(Interview, interview_id)
+    if not interview or interview.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    return submit_job(
+        "feedback",
+        current_user.id,
+        {"interview_id": str(interview_id)},
+        interview_id=interview_id,
+    )
+
+
+@router.post("/{interview_id}/feedback/stream")
+async def stream_feedback_for_interview(
+    interview_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    session: Session = SessionDep,
+):
+    """
+    Generate interview feedback as Server-Sent Events.
+
+    Each of tone_summary, speech_rate and overall_feedback is sent as a
+    "field" event ({"field", "value"}) as soon as its value is complete; the
+    measured speech rate goes out before the model is called. The saved
+    Feedback follows as a "feedback" event, or "error" if generation fails.
+    """
+    interview = session.get(Interview, interview_id)
+    if not interview or interview.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    def feedback_event(feedback: Feedback | FeedbackPublic) -> str:
+        return sse_event(
+            "feedback", FeedbackPublic.model_validate(feedback).model_dump(mode="json")
+        )
+
+    async def replay(feedback: Feedback | FeedbackPublic):
+        for field in FEEDBACK_FIELDS:
+            value = getattr(feedback, field)
+            yield sse_event("field", {"field": field, "value": value})
+        yield feedback_event(feedback)
+
+    # Feedback already exists: replay it without calling the LLM
+    if interview.feedback:
+        return StreamingResponse(
+            replay(interview.feedback), media_type="text/event-stream"
+        )
+
+    # Another request is generating it: wait for that one and replay it
+    if generation_flights.in_flight(("feedback", interview_id)):
+
+        async def coalesced():
+            try:
+                feedback = await create_feedback(session, interview_id)
+            except HTTPException as e:
+                yield sse_event("error", {"detail": e.detail})
+                return
+            except (ValueError, RuntimeError) as e:
+                # Raised by a streamed generation being replayed
+                yield sse_event("error", {"detail": str(e)})
+                return
+            async for event in replay(feedback):
+                yield event
+
+        return StreamingResponse(coalesced(), media_type="text/event-stream")
+
+    messages = session.exec(
+        select(Message)
+        .where(Message.interview_id == interview_id, Message.role == "user")
+        .order_by(Message.created_at)
+    ).all()
+
+    user_texts = [m.content for m in messages]
+
+    if not user_texts:
+        raise HTTPException(status_code=400, detail="No user responses to analyze.")
+
+    speech_rate = summarize_speech_rate([m.speech_analytics for m in messages])
+    fields: asyncio.Queue = asyncio.Queue()
+
+    async def stream_and_save() -> FeedbackPublic:
+        values = {field: "" for field in FEEDBACK_FIELDS}
+        try:
+            answer_notes = await collect_answer_feedback(session, messages)
+            async for field, value in stream_interview_feedback(
+                user_texts, speech_rate, answer_notes
+            ):
+                values[field] = value
+                fields.put_nowait((field, value))
+        except LLMTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except LLMUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        finally:
+            fields.put_nowait(None)
+        feedback = Feedback(interview_id=interview_id, **values)
+        return FeedbackPublic.model_validate(save_feedback(session, feedback))
+
+    # Nothing was in flight above (and nothing has awaited since), so this
+    # starts the interview's feedback flight: blocking calls and other
+    # streams now wait for this generation instead of starting their own
+    flight, _ = generation_flights.join(("feedback", interview_id), stream_and_save)
+
+    async def events():
+        while (item := await fields.get()) is not None:
+            field, value = item
+            yield sse_event("field", {"field": field, "value": value})
+        try:
+            feedback = await asyncio.shield(flight)
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail})
+            return
+        except (ValueError, RuntimeError) as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield feedback_event(feedback)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 from fastapi import Form
@@ -242,6 +937,7 @@ async def handle_coding_chat(
     session.add(user_msg)
     session.commit()
     session.refresh(user_msg)
+    queue_answer_feedback(current_user.id, user_msg)
 
     # Get previous assistant messages to determine current step
     assistant_messages = session.exec(
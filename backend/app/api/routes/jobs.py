@@ -0,0 +1,38 @@
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.models.job import Job, JobPublic
+from app.models.user import User
+from app.api.deps import get_current_user
+from app.services.jobs import JobQueueFull, job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def submit_job(
+    kind: str,
+    user_id: uuid.UUID,
+    payload: dict,
+    interview_id: Optional[uuid.UUID] = None,
+) -> Job:
+    """Queue a background job for the routes that offer one."""
+    try:
+        return job_queue.submit(kind, user_id, payload, interview_id=interview_id)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many background jobs, please retry shortly.",
+        )
+
+
+@router.get("/{job_id}", response_model=JobPublic)
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+):
+    """Status of a background job, with its result once it has succeeded."""
+    job = job_queue.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,6 +1,8 @@
+import asyncio
 import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 
 from app.models.question import (
@@ -9,11 +11,20 @@ from app.models.question import (
     QuestionPublic,
     QuestionGenerateRequest,
 )
+from app.models.job import JobPublic
 from app.models.user import User
 from app.models.interview import Interview
 from app.models.resume import Resume
 from app.api.deps import get_current_user, SessionDep
-from app.services.ai_service import generate_behavioral_questions
+from app.api.routes.jobs import submit_job
+from app.api.sse import sse_event
+from app.services.ai_service import (
+    LLMTimeout,
+    generate_behavioral_questions,
+    stream_behavioral_questions,
+)
+from app.services.jobs import job_queue
+from app.services.single_flight import generation_flights
 
 router = APIRouter(prefix="/questions", tags=["Questions"])
 
@@ -63,6 +74,70 @@ async def get_all_questions(
     return questions
 
 
+async def create_questions(
+    session: Session,
+    parsed_resume: str,
+    interview_id: uuid.UUID,
+    num_questions: int,
+    force_refresh: bool = False,
+) -> List[QuestionPublic]:
+    """
+    Generate behavioral questions for an interview and save them. Concurrent
+    calls for the same interview share one generation, so a repeated request
+    doesn't save a second set.
+    """
+    return await generation_flights.run(
+        ("questions", interview_id),
+        lambda: _generate_questions(
+            session, parsed_resume, interview_id, num_questions, force_refresh
+        ),
+    )
+
+
+async def _generate_questions(
+    session: Session,
+    parsed_resume: str,
+    interview_id: uuid.UUID,
+    num_questions: int,
+    force_refresh: bool,
+) -> List[QuestionPublic]:
+    # Generate questions using your AI service
+    try:
+        generated_questions = await generate_behavioral_questions(
+            parsed_resume=parsed_resume,
+            num_questions=num_questions,
+            force_refresh=force_refresh,
+        )
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    created_questions = []
+    for q in generated_questions:
+        question = Question(
+            description=q,
+            type="behavioral",
+            interview_id=interview_id,
+        )
+        session.add(question)
+        created_questions.append(question)
+
+    session.commit()
+    return [QuestionPublic.model_validate(q) for q in created_questions]
+
+
+@job_queue.handler("questions")
+async def questions_job(session: Session, payload: dict) -> List[dict]:
+    resume = session.get(Resume, uuid.UUID(payload["resume_id"]))
+    questions = await create_questions(
+        session,
+        resume.parsed_data,
+        uuid.UUID(payload["interview_id"]),
+        payload["num_questions"],
+        payload["force_refresh"],
+    )
+    return [q.model_dump(mode="json") for q in questions]
+
+
 @router.post("/generate", response_model=List[QuestionPublic])
 async def generate_questions_from_resume(
     data: QuestionGenerateRequest,
@@ -78,21 +153,137 @@ async def generate_questions_from_resume(
     if not interview or interview.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    # Generate questions using your AI service
-    generated_questions = generate_behavioral_questions(
-        parsed_resume=resume.parsed_data,
-        num_questions=data.num_questions,
+    return await create_questions(
+        session,
+        resume.parsed_data,
+        interview.id,
+        data.num_questions,
+        data.force_refresh,
     )
 
-    created_questions = []
-    for q in generated_questions:
-        question = Question(
-            description=q,
-            type="behavioral",
-            interview_id=interview.id,
-        )
-        session.add(question)
-        created_questions.append(question)
 
-    session.commit()
-    return created_questions
+@router.post("/generate/jobs", response_model=JobPublic, status_code=202)
+async def submit_questions_job(
+    data: QuestionGenerateRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = SessionDep,
+):
+    """
+    Queue question generation and return the job at once; poll
+    GET /jobs/{job_id} for its status and the list of QuestionPublic.
+    """
+    resume = session.get(Resume, data.resume_id)
+    if not resume or resume.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    interview = session.get(Interview, data.interview_id)
+    if not interview or interview.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    return submit_job(
+        "questions",
+        current_user.id,
+        data.model_dump(mode="json"),
+        interview_id=interview.id,
+    )
+
+
+@router.post("/generate/stream")
+async def stream_questions_from_resume(
+    data: QuestionGenerateRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = SessionDep,
+):
+    """
+    Generate behavioral questions as Server-Sent Events.
+
+    Each question is saved and sent as a "question" event (a QuestionPublic)
+    as soon as the model finishes its line, followed by "done" with the
+    count, or "error" if generation fails part-way.
+    """
+    resume = session.get(Resume, data.resume_id)
+    if not resume or resume.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    interview = session.get(Interview, data.interview_id)
+    if not interview or interview.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    parsed_resume = resume.parsed_data
+    interview_id = interview.id
+
+    def question_event(question: QuestionPublic) -> str:
+        return sse_event("question", question.model_dump(mode="json"))
+
+    # Another request is generating this interview's questions: wait for it
+    # and replay its set rather than saving a second one
+    if generation_flights.in_flight(("questions", interview_id)):
+
+        async def coalesced():
+            try:
+                questions = await create_questions(
+                    session,
+                    parsed_resume,
+                    interview_id,
+                    data.num_questions,
+                    data.force_refresh,
+                )
+            except HTTPException as e:
+                yield sse_event("error", {"detail": e.detail})
+                return
+            except RuntimeError as e:
+                yield sse_event("error", {"detail": str(e)})
+                return
+            for question in questions:
+                yield question_event(question)
+            yield sse_event("done", {"count": len(questions)})
+
+        return StreamingResponse(coalesced(), media_type="text/event-stream")
+
+    saved: asyncio.Queue = asyncio.Queue()
+
+    async def stream_and_save() -> List[QuestionPublic]:
+        created_questions = []
+        try:
+            async for description in stream_behavioral_questions(
+                parsed_resume,
+                num_questions=data.num_questions,
+                force_refresh=data.force_refresh,
+            ):
+                question = Question(
+                    description=description,
+                    type="behavioral",
+                    interview_id=interview_id,
+                )
+                session.add(question)
+                session.commit()
+                session.refresh(question)
+                created_questions.append(QuestionPublic.model_validate(question))
+                saved.put_nowait(created_questions[-1])
+        except LLMTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        finally:
+            saved.put_nowait(None)
+        return created_questions
+
+    # Nothing was in flight above (and nothing has awaited since), so this
+    # starts the interview's question flight; /generate calls and other
+    # streams now wait for this set
+    flight, _ = generation_flights.join(("questions", interview_id), stream_and_save)
+
+    async def events():
+        count = 0
+        while (question := await saved.get()) is not None:
+            count += 1
+            yield question_event(question)
+        try:
+            await asyncio.shield(flight)
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail})
+            return
+        except RuntimeError as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("done", {"count": count})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
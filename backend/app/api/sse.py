@@ -0,0 +1,7 @@
+import json
+from typing import Any
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
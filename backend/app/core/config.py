@@ -31,6 +31,119 @@ class Settings(BaseSettings):
     # Testing specific
     TEST_DATABASE_URL: str | None = None
 
+    # LLM: provider is one of "gemini", "openai" (any OpenAI-compatible API,
+    # key in OPENAI_API_KEY) or "fake"; one client per worker, bounded
+    # concurrency and latency
+    LLM_PROVIDER: str = "gemini"
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: str | None = None
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_MAX_CONCURRENCY: int = 8
+    # Deadline for a whole call including retries; a duplicate request is
+    # sent once an attempt runs past the recent p95 (but not before the
+    # minimum delay); the circuit opens after consecutive failures
+    LLM_DEADLINE_SECONDS: float = 45.0
+    LLM_RETRY_ATTEMPTS: int = 3
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Local fake LLM for load tests: log-normal latency, injected failures
+    # and canned outputs (JSON object of prompt substring -> response)
+    LLM_FAKE_LATENCY_MEDIAN_SECONDS: float = 0.8
+    LLM_FAKE_LATENCY_SIGMA: float = 0.5
+    LLM_FAKE_FAILURE_RATE: float = 0.0
+    LLM_FAKE_RESPONSES_PATH: str | None = None
+    LLM_FAKE_SEED: int = 0
+
+    # Generated behavioral questions per resume (SQLite path enables the disk tier)
+    QUESTION_CACHE_SIZE: int = 256
+    QUESTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    QUESTION_CACHE_SQLITE_PATH: str | None = None
+
+    # Token budgets for resume and interview answers in LLM prompts
+    PROMPT_TOKEN_ENCODING: str = "cl100k_base"
+    PROMPT_RESUME_TOKEN_BUDGET: int = 1500
+    PROMPT_TRANSCRIPT_TOKEN_BUDGET: int = 6000
+    # Rolling interview summary, and the turns (question, answer) sent with it
+    PROMPT_SUMMARY_TOKEN_BUDGET: int = 400
+    PROMPT_TURN_TOKEN_BUDGET: int = 800
+
+    # Background LLM jobs: store is "database" (the Job table) or "memory";
+    # at most JOB_WORKERS jobs run at once per web worker. Jobs left running
+    # longer than the lease (their process died) are re-run on start
+    JOB_STORE: str = "database"
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_DEPTH: int = 100
+    JOB_LEASE_SECONDS: float = 600.0
+
+    # Analyse each answer in a background job as soon as it is saved, so the
+    # final feedback only aggregates the per-answer notes; these jobs have
+    # their own queue and runners
+    FEEDBACK_PER_ANSWER: bool = True
+    ANSWER_JOB_WORKERS: int = 2
+    ANSWER_JOB_QUEUE_DEPTH: int = 500
+
+    # Build the next assistant reply while the candidate is still answering;
+    # it is served if the interview hasn't moved on and it is fresh enough
+    SPECULATIVE_TURNS: bool = True
+    SPECULATIVE_TURN_TTL_SECONDS: float = 600.0
+    SPECULATIVE_TURN_MAX_INTERVIEWS: int = 1000
+
+    # Behavioral replies: the next stored question, asked as an LLM follow-up
+    # to the candidate's answer. The answer-aware follow-up gets at most
+    # FOLLOW_UP_TIMEOUT_SECONDS after transcription (one attempt); otherwise
+    # one prepared while the candidate spoke, or the plain question, is used
+    FOLLOW_UP_QUESTIONS: bool = True
+    FOLLOW_UP_TIMEOUT_SECONDS: float = 1.5
+
+    # Speech-to-text: backend is one of "whisper", "whisper-int8", "faster-whisper"
+    ASR_BACKEND: str = "whisper"
+    ASR_COMPUTE_TYPE: str = "int8"  # faster-whisper only
+    WHISPER_MODEL: str = "base"
+    WHISPER_PRELOAD_MODELS: List[str] = ["base"]
+    WHISPER_DEVICE: str | None = None
+    # Map fp32 weights from a file so all processes on a host share them
+    # (CPU only; the file is written next to the whisper download cache)
+    WHISPER_MMAP_WEIGHTS: bool = True
+    WHISPER_MMAP_DIR: str | None = None
+
+    # Decoding: pinned language, beam size (None = greedy) and the
+    # temperature fallback schedule; the question text is used as prompt
+    WHISPER_LANGUAGE: str | None = "en"
+    WHISPER_BEAM_SIZE: int | None = None
+    WHISPER_TEMPERATURES: List[float] = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+    WHISPER_CONDITION_ON_QUESTION: bool = True
+
+    # Transcription worker pool (0 workers = run in a thread of this process)
+    TRANSCRIBE_WORKERS: int = 2
+    TRANSCRIBE_TORCH_THREADS: int = 1
+    TRANSCRIBE_QUEUE_DEPTH: int = 8
+
+    # Micro-batching of short clips (max size 1 disables batching)
+    TRANSCRIBE_BATCH_MAX_SIZE: int = 8
+    TRANSCRIBE_BATCH_MAX_WAIT_MS: int = 25
+
+    # Long answers are cut at pauses into chunks transcribed in parallel
+    TRANSCRIBE_CHUNK_SECONDS: float = 30.0
+
+    # Silence trimming before decoding
+    TRANSCRIBE_VAD_ENABLED: bool = True
+    TRANSCRIBE_VAD_MAX_PAUSE_MS: int = 600
+
+    # Transcript cache for re-uploaded audio (SQLite path enables the disk tier)
+    TRANSCRIPT_CACHE_SIZE: int = 512
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = 3600
+    TRANSCRIPT_CACHE_SQLITE_PATH: str | None = None
+    TRANSCRIPT_CACHE_SQLITE_MAX_ROWS: int = 10000
+
+    # Streaming transcription over WebSocket
+    STREAMING_WINDOW_SECONDS: float = 15.0
+    STREAMING_PARTIAL_INTERVAL_SECONDS: float = 1.5
+    STREAMING_MAX_ANSWER_BYTES: int = 16 * 1024 * 1024
+
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         if self.ENVIRONMENT == "testing":
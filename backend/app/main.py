@@ -1,9 +1,22 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.services.ai_service import llm_caller, question_cache
+from app.services.asr import asr_registry, process_memory
+from app.services.audio import vad_stats
+from app.services.jobs import answer_job_queue, job_queue
+from app.services.prompt_budget import prompt_stats
+from app.services.single_flight import generation_flights
+from app.services.speculation import turn_speculator
+from app.services.transcription import (
+    transcript_cache,
+    transcription_batcher,
+    transcription_pool,
+)
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -26,7 +39,34 @@ else:
     # Disable docs in production for security
     app_config.update({"docs_url": None, "redoc_url": None, "openapi_url": None})
 
-app = FastAPI(**app_config)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the speech models once per worker so the first audio turn
+    # doesn't pay for loading the weights. With a transcription pool the
+    # models live in the pool processes instead of the web worker.
+    if not settings.is_testing:
+        if settings.TRANSCRIBE_WORKERS > 0:
+            transcription_pool.start(wait_until_warm=True)
+            for worker in transcription_pool.worker_stats():
+                logger.info(
+                    f"Transcription worker {worker['pid']} memory: {worker['memory']}"
+                )
+        else:
+            asr_registry.preload(settings.WHISPER_PRELOAD_MODELS)
+        # Shared pages are the mapped weights other processes also use;
+        # private pages are what every extra worker costs
+        logger.info(f"Web worker memory: {process_memory()}")
+    # Runners for background feedback and question generation jobs
+    await job_queue.start()
+    await answer_job_queue.start()
+    yield
+    await answer_job_queue.stop()
+    await job_queue.stop()
+    transcription_pool.shutdown()
+
+
+app = FastAPI(**app_config, lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -55,6 +95,34 @@ def health_check():
     return {"status": "healthy", "environment": settings.ENVIRONMENT}
 
 
+@app.get("/health/models")
+def model_health_check():
+    return {
+        # With a worker pool the models are loaded in the pool processes
+        "asr": (
+            transcription_pool.worker_stats()
+            if settings.TRANSCRIBE_WORKERS > 0
+            else asr_registry.stats()
+        ),
+        "transcription_pool": transcription_pool.stats(),
+        "transcription_batcher": transcription_batcher.stats(),
+        "transcript_cache": transcript_cache.stats(),
+        "llm": llm_caller.stats(),
+        "question_cache": question_cache.stats(),
+        # Tokens saved by compacting resumes and answers in prompts
+        "prompt_tokens": prompt_stats.stats(),
+        "jobs": job_queue.stats(),
+        "answer_jobs": answer_job_queue.stats(),
+        "generation_flights": generation_flights.stats(),
+        # Assistant replies prepared while candidates answer
+        "speculative_turns": turn_speculator.stats(),
+        # Silence trimmed in this process (batched uploads); pool workers
+        # report their own under "asr"
+        "vad": vad_stats.stats(),
+        "memory": process_memory(),
+    }
+
+
 # Log startup info
 logger.info(f"Starting application in {settings.ENVIRONMENT} environment")
 if settings.is_development:
@@ -20,6 +20,7 @@ from .feedback import (
     FeedbackCreate,
     FeedbackUpdate,
 )
+from .job import Job, JobBase, JobPublic
 
 __all__ = [
     # User models
@@ -57,6 +58,10 @@ __all__ = [
     "FeedbackPublic",
     "FeedbackCreate",
     "FeedbackUpdate",
+    # Job models
+    "Job",
+    "JobBase",
+    "JobPublic",
 ]
 
 from sqlmodel import SQLModel
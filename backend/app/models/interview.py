@@ -25,6 +25,12 @@ class Interview(InterviewBase, table=True):
     # Foreign key to User
     user_id: uuid.UUID = Field(foreign_key="User.id", nullable=False)
 
+    # Rolling LLM summary of the conversation, covering the first
+    # `summary_message_count` messages; follow-up questions are generated
+    # from it instead of the whole history
+    summary: Optional[str] = None
+    summary_message_count: int = 0
+
     # Relationships
     user: Optional["User"] = Relationship(back_populates="interviews")
     questions: List["Question"] = Relationship(back_populates="interview")
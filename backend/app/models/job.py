@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy import JSON, Column
+from sqlmodel import SQLModel, Field
+
+
+class JobBase(SQLModel):
+    kind: str  # "feedback" or "questions"
+    # queued, running, succeeded or failed
+    status: str = Field(default="queued", index=True)
+    interview_id: Optional[uuid.UUID] = Field(default=None, foreign_key="Interview.id")
+
+
+class Job(JobBase, table=True):
+    __tablename__ = "Job"
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+
+    # Foreign key
+    user_id: uuid.UUID = Field(foreign_key="User.id", nullable=False)
+
+    # Handler input and output
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    result: Optional[Any] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = Field(default=None)
+
+
+# Public response model
+class JobPublic(JobBase):
+    id: uuid.UUID
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
+from sqlalchemy import JSON, Column
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -21,6 +22,12 @@ class Message(MessageBase, table=True):
     # Foreign key to Interview
     interview_id: uuid.UUID = Field(foreign_key="Interview.id", nullable=False)
 
+    # Locally computed delivery metrics of spoken answers (see speech_analytics)
+    speech_analytics: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+
+    # LLM notes on this answer alone, aggregated into the interview feedback
+    answer_feedback: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+
     # Relationship
     interview: Optional["Interview"] = Relationship(back_populates="messages")
 
@@ -30,6 +37,8 @@ class MessagePublic(MessageBase):
     id: uuid.UUID
     created_at: datetime
     interview_id: uuid.UUID
+    speech_analytics: Optional[dict] = None
+    answer_feedback: Optional[dict] = None
 
 
 # For creating new messages
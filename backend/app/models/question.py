@@ -50,3 +50,5 @@ class QuestionGenerateRequest(BaseModel):
     resume_id: UUID
     interview_id: UUID
     num_questions: int
+    # Skip the question cache and ask the LLM for a fresh set
+    force_refresh: bool = False
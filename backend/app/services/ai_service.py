@@ -1,32 +1,143 @@
 """
 AI Services:
-1. Generate behavioral questions from parsed resume using Google Gemini API
-2. Transcribe audio using open-source Whisper
-3. Generate multi-turn follow-up question (Gemini)
-4. (TODO) Provide AI feedback
+1. Generate behavioral questions from parsed resume using the configured LLM
+   (Gemini, an OpenAI-compatible API or a local fake, see `llm`)
+2. Transcribe audio using open-source Whisper (or another configured ASR backend)
+3. Generate multi-turn follow-up questions (LLM) from a rolling summary of
+   the interview, so prompts stay the same size as interviews grow
+4. Provide AI feedback, optionally streamed field by field, aggregated from
+   per-answer notes generated while the interview runs
 """
 
-import os
-import tempfile
-from typing import List
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
 import json
 import re
 
 from dotenv import load_dotenv
-import google.generativeai as genai
-import whisper
+import numpy as np
 
+from app.core.config import settings
 from app.models.message import Message
+from app.services.asr import asr_registry
+from app.services.audio import decode_and_prepare
+from app.services.cache import TieredCache, hash_key
+from app.services.json_stream import JSONObjectStream
+from app.services.llm import LLMProvider, create_llm_provider
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LLMTimeout,
+    LLMUnavailable,
+    ResilientCaller,
+)
+from app.services.prompt_budget import (
+    compact_resume,
+    compact_transcript,
+    truncate_tokens,
+)
+from app.services.question_bank import fallback_questions
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # 0. Load environment and setup
 # -----------------------------
 
 load_dotenv(dotenv_path=".env.development")
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+# The configured LLM API (LLM_PROVIDER), built once per worker and reused
+llm_provider: LLMProvider = create_llm_provider()
+# Bounds concurrent LLM calls from this worker; extra requests wait here
+_llm_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+
+def new_llm_caller() -> ResilientCaller:
+    hedge_delay = settings.LLM_HEDGE_MIN_DELAY_SECONDS
+    return ResilientCaller(
+        transient=(LLMTimeout,) + llm_provider.transient_errors,
+        attempts=settings.LLM_RETRY_ATTEMPTS,
+        deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+        hedge_min_delay_seconds=hedge_delay if settings.LLM_HEDGE_ENABLED else None,
+        breaker=CircuitBreaker(
+            settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS
+        ),
+    )
+
+
+# Deadline, retries, hedging and the circuit breaker for every LLM call
+llm_caller = new_llm_caller()
+
+
+def llm_fallback_errors() -> tuple:
+    """Failures after which question generation uses the fallback bank."""
+    return (LLMUnavailable,) + llm_caller.transient
+
+
+async def _generate_once(prompt: str) -> str:
+    timeout = settings.LLM_TIMEOUT_SECONDS
+    async with _llm_slots:
+        try:
+            return await asyncio.wait_for(
+                llm_provider.generate(prompt, timeout), timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise LLMTimeout(f"The LLM did not respond within {timeout}s") from e
+
+
+async def generate_text(prompt: str, deadline_seconds: Optional[float] = None) -> str:
+    """
+    Run one LLM generation without blocking the event loop, limited to
+    LLM_MAX_CONCURRENCY calls at a time and LLM_TIMEOUT_SECONDS per attempt.
+    Transient failures are retried and slow attempts hedged, all within
+    LLM_DEADLINE_SECONDS; raises LLMUnavailable while the circuit is open.
+
+    With `deadline_seconds`, for text a request waits on but can do
+    without: a single attempt, not hedged, given up after that long.
+    """
+    if deadline_seconds is not None:
+        return await llm_caller.call(
+            lambda: _generate_once(prompt),
+            hedge=False,
+            attempts=1,
+            deadline_seconds=deadline_seconds,
+        )
+    return await llm_caller.call(lambda: _generate_once(prompt))
+
+
+async def stream_text(prompt: str) -> AsyncIterator[str]:
+    """
+    Like `generate_text`, but yield the text as the LLM streams it. The
+    timeout applies to the wait for each chunk, so long outputs that keep
+    arriving are never cut off. Only opening the stream is retried; once
+    text has been yielded a failure is raised to the caller.
+    """
+    timeout = settings.LLM_TIMEOUT_SECONDS
+
+    async def open_stream() -> AsyncIterator[str]:
+        try:
+            return await asyncio.wait_for(
+                llm_provider.open_stream(prompt, timeout), timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise LLMTimeout(f"The LLM did not respond within {timeout}s") from e
+
+    async with _llm_slots:
+        chunks = await llm_caller.call(open_stream, hedge=False)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        except asyncio.TimeoutError as e:
+            llm_caller.breaker.record_failure()
+            raise LLMTimeout(f"The LLM stalled for more than {timeout}s") from e
+
 
 # -----------------------------
-# 1. Behavioral Question Generation (Gemini)
+# 1. Behavioral Question Generation (LLM)
 # -----------------------------
 
 BEHAVIORAL_QUESTION_PROMPT = """
@@ -38,46 +149,275 @@ Resume:
 ---------
 Return only a numbered list of questions, without explanations.
 """
+# Bump whenever BEHAVIORAL_QUESTION_PROMPT (or the resume compaction in
+# `prompt_budget`) changes so cached questions expire
+BEHAVIORAL_QUESTION_PROMPT_VERSION = 2
 
+# Generated questions keyed by resume text, prompt version, model and count
+question_cache = TieredCache(
+    maxsize=settings.QUESTION_CACHE_SIZE,
+    ttl=settings.QUESTION_CACHE_TTL_SECONDS,
+    sqlite_path=settings.QUESTION_CACHE_SQLITE_PATH,
+)
 
-def generate_behavioral_questions(
-    parsed_resume: str, num_questions: int = 5
-) -> List[str]:
-    prompt = BEHAVIORAL_QUESTION_PROMPT.format(
-        resume=parsed_resume,
+
+def behavioral_question_prompt(parsed_resume: str, num_questions: int) -> str:
+    """The resume is cleaned and cut to PROMPT_RESUME_TOKEN_BUDGET tokens."""
+    return BEHAVIORAL_QUESTION_PROMPT.format(
+        resume=compact_resume(parsed_resume).text,
         num_questions=num_questions,
     )
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
 
-    if not response.text:
-        raise RuntimeError("Gemini did not return any output.")
+def question_cache_key(parsed_resume: str, num_questions: int) -> str:
+    return hash_key(
+        parsed_resume,
+        BEHAVIORAL_QUESTION_PROMPT_VERSION,
+        settings.PROMPT_RESUME_TOKEN_BUDGET,
+        llm_provider.model_id,
+        num_questions,
+    )
+
+
+async def generate_behavioral_questions(
+    parsed_resume: str, num_questions: int = 5, force_refresh: bool = False
+) -> List[str]:
+    """
+    Questions generated for the same resume and count are served from
+    `question_cache` without calling the LLM, unless `force_refresh` is set.
+    While the LLM is unavailable the (uncached) fallback bank is used.
+    """
+    key = question_cache_key(parsed_resume, num_questions)
+    if not force_refresh:
+        cached = question_cache.get(key)
+        if cached is not None:
+            return cached
+
+    prompt = behavioral_question_prompt(parsed_resume, num_questions)
+
+    try:
+        text = await generate_text(prompt)
+    except llm_fallback_errors() as e:
+        logger.warning(f"Using fallback questions, the LLM is unavailable: {e!r}")
+        return fallback_questions(parsed_resume, num_questions)
+
+    if not text:
+        raise RuntimeError("The LLM did not return any output.")
 
     # Basic parsing of numbered list
-    questions = [
-        line.strip().lstrip("1234567890. ").strip()
-        for line in response.text.splitlines()
-        if line.strip()
-    ]
-    return [q for q in questions if q]
+    questions = [parse_question_line(line) for line in text.splitlines()]
+    questions = [q for q in questions if q]
+    question_cache.set(key, questions)
+    return questions
+
+
+def parse_question_line(line: str) -> str:
+    """Strip the list numbering from one line of the model's output."""
+    return line.strip().lstrip("1234567890. ").strip()
+
+
+async def stream_behavioral_questions(
+    parsed_resume: str, num_questions: int = 5, force_refresh: bool = False
+) -> AsyncIterator[str]:
+    """
+    Yield each question as soon as its line of the numbered list is
+    complete. Shares `question_cache` with `generate_behavioral_questions`.
+    If the LLM is unavailable or fails part-way, the list is completed from
+    the fallback bank and not cached.
+    """
+    key = question_cache_key(parsed_resume, num_questions)
+    if not force_refresh:
+        cached = question_cache.get(key)
+        if cached is not None:
+            for question in cached:
+                yield question
+            return
+
+    prompt = behavioral_question_prompt(parsed_resume, num_questions)
+
+    questions = []
+    pending = ""
+    try:
+        async for chunk in stream_text(prompt):
+            pending += chunk
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                question = parse_question_line(line)
+                if question:
+                    questions.append(question)
+                    yield question
+    except llm_fallback_errors() as e:
+        logger.warning(f"Using fallback questions, the LLM is unavailable: {e!r}")
+        for question in fallback_questions(parsed_resume, num_questions * 2):
+            if len(questions) >= num_questions:
+                break
+            if question not in questions:
+                questions.append(question)
+                yield question
+        return
+
+    question = parse_question_line(pending)
+    if question:
+        questions.append(question)
+        yield question
+
+    if not questions:
+        raise RuntimeError("The LLM did not return any output.")
+    question_cache.set(key, questions)
 
 
 # -----------------------------
-# 2. Audio Transcription (Whisper Open Source)
+# 2. Audio Transcription (Whisper Open Source / ASR backends)
 # -----------------------------
 
 
-def transcribe_audio(audio_bytes: bytes) -> str:
+def transcribe_audio(audio_bytes: bytes, initial_prompt: Optional[str] = None) -> str:
     """
     Transcribe a user's audio response using open-source Whisper.
+
+    `initial_prompt` should be the question being answered; it primes the
+    decoder with the interview's vocabulary.
+    """
+    waveform = decode_and_prepare(audio_bytes)
+    return transcribe_waveform(waveform, initial_prompt)
+
+
+def transcribe_waveform(
+    waveform: np.ndarray, initial_prompt: Optional[str] = None
+) -> str:
+    """
+    Transcribe an already decoded 16 kHz mono float32 waveform.
+    """
+    return transcribe_segments(waveform, initial_prompt)["text"]
+
+
+def transcribe_segments(
+    waveform: np.ndarray, initial_prompt: Optional[str] = None
+) -> dict:
+    """
+    Like `transcribe_waveform`, but also return the timestamped segments:
+    {"text", "language", "segments": [{"start", "end", "text"}], "fallbacks"}.
+    """
+    return asr_registry.get().transcribe(waveform, initial_prompt)
+
+
+def transcribe_batch(
+    waveforms: List[np.ndarray], initial_prompt: Optional[str] = None
+) -> List[str]:
     """
-    model = whisper.load_model("base")
-    with tempfile.NamedTemporaryFile(suffix=".webm") as temp_audio:
-        temp_audio.write(audio_bytes)
-        temp_audio.flush()
-        result = model.transcribe(temp_audio.name)
-        return result["text"]
+    Transcribe several clips of at most 30 seconds in one encoder/decoder pass.
+    """
+    return asr_registry.get().transcribe_batch(waveforms, initial_prompt)
+
+
+# -----------------------------
+# 3. Multi-turn Follow-up Questions (LLM)
+# -----------------------------
+
+INTERVIEW_SUMMARY_PROMPT = """
+You are an AI mock interviewer keeping notes on an interview in progress.
+
+Notes so far:
+{summary}
+
+New exchanges:
+----------------
+{turns}
+----------------
+
+Rewrite the notes so they also cover the new exchanges, in at most {words} words: the topics covered, the candidate's key claims and examples, and anything worth probing later. Respond with the notes only.
+"""
+
+FOLLOW_UP_PROMPT = """
+You are an AI mock interviewer running a behavioral interview.
+
+Notes on the interview so far:
+{summary}
+
+Your last question: {question}
+
+The candidate's answer:
+----------------
+{answer}
+----------------
+
+Your next planned question: {next_question}
+
+Write your next turn: acknowledge the answer in one short sentence, then ask the planned question, phrased as a follow-up that builds on what the candidate has said. Respond with the turn only, in at most 80 words.
+"""
+
+# Prepared while the candidate is still answering `question`
+PLANNED_FOLLOW_UP_PROMPT = """
+You are an AI mock interviewer running a behavioral interview.
+
+Notes on the interview so far:
+{summary}
+
+The candidate is now answering: {question}
+
+Your next planned question: {next_question}
+
+Write the turn you will say once they finish: thank them briefly, then ask the planned question, phrased so it builds on the interview so far. Respond with the turn only, in at most 80 words.
+"""
+
+
+async def summarize_interview(summary: Optional[str], turns: List[str]) -> str:
+    """
+    Fold new "Interviewer: ..." / "Candidate: ..." turns into the rolling
+    summary. The prompt holds the summary and the new turns only, both
+    within their token budgets, however long the interview has been.
+    """
+    budget = settings.PROMPT_SUMMARY_TOKEN_BUDGET
+    prompt = INTERVIEW_SUMMARY_PROMPT.format(
+        summary=truncate_tokens(summary, budget) if summary else "(none yet)",
+        turns="\n".join(
+            turn.text
+            for turn in compact_transcript(turns, settings.PROMPT_TURN_TOKEN_BUDGET)
+        ),
+        # Roughly four words per three tokens
+        words=budget * 3 // 4,
+    )
+    text = (await generate_text(prompt)).strip()
+    if not text:
+        raise ValueError("The LLM returned an empty summary")
+    return truncate_tokens(text, budget)
+
+
+async def generate_follow_up(
+    summary: Optional[str],
+    question: Optional[str],
+    answer: Optional[str],
+    next_question: str,
+    deadline_seconds: Optional[float] = None,
+) -> str:
+    """
+    The interviewer's next turn: `next_question` following up on `answer`,
+    or on the interview so far when the answer isn't in yet (`None`).
+    `deadline_seconds` as for `generate_text`.
+    """
+    fields = {
+        "summary": (
+            truncate_tokens(summary, settings.PROMPT_SUMMARY_TOKEN_BUDGET)
+            if summary
+            else "(this is the first answer)"
+        ),
+        "question": question or "(not recorded)",
+        "next_question": next_question,
+    }
+    if answer is None:
+        prompt = PLANNED_FOLLOW_UP_PROMPT.format(**fields)
+    else:
+        fitted = compact_transcript([answer], settings.PROMPT_TURN_TOKEN_BUDGET)[0]
+        prompt = FOLLOW_UP_PROMPT.format(answer=fitted.text, **fields)
+    text = (await generate_text(prompt, deadline_seconds)).strip()
+    if not text:
+        raise ValueError("The LLM returned an empty follow-up")
+    return text
+
+
+# -----------------------------
+# 4. Interview Feedback (LLM)
+# -----------------------------
 
 
 def extract_json_from_text(text: str) -> dict:
@@ -93,28 +433,125 @@ def extract_json_from_text(text: str) -> dict:
         return json.loads(json_str)
 
 
-def generate_interview_feedback(user_responses: List[str]) -> dict:
-    joined_responses = "\n\n".join(user_responses)
+FEEDBACK_FIELDS = ("tone_summary", "speech_rate", "overall_feedback")
+ANSWER_FEEDBACK_FIELDS = ("tone", "feedback")
+
+ANSWER_FEEDBACK_PROMPT = """
+You are an AI mock interviewer. Assess this one answer from a candidate's interview.
+
+Question: {question}
+
+Answer:
+----------------
+{answer}
+----------------
+
+Respond ONLY with a JSON object using the following keys:
+"tone" (a few words, e.g. polite, confident, nervous), "feedback" (one or two sentences on clarity, communication and impact)
+"""
+
+
+def answer_feedback_prompt(question: Optional[str], answer: str) -> str:
+    return ANSWER_FEEDBACK_PROMPT.format(
+        question=question or "(not recorded)",
+        answer=compact_transcript([answer])[0].text,
+    )
+
 
-    prompt = f"""
-    You are an AI mock interviewer. Based on the following responses from a candidate's behavioral interview, generate:
+async def analyze_answer(question: Optional[str], answer: str) -> dict:
+    """Notes on a single answer ("tone", "feedback"), short enough to aggregate."""
+    text = await generate_text(answer_feedback_prompt(question, answer))
+    notes = extract_json_from_text(text)
+    return {field: str(notes.get(field, "")) for field in ANSWER_FEEDBACK_FIELDS}
+
+
+def feedback_prompt(
+    user_responses: List[str],
+    speech_rate: Optional[str] = None,
+    answer_notes: Optional[List[dict]] = None,
+) -> str:
+    """
+    `speech_rate` is the locally measured summary of the spoken answers; when
+    given, the LLM is not asked to guess one. With `answer_notes` (one
+    `analyze_answer` result per answer) the LLM aggregates those instead of
+    reading the answers, which keeps the prompt small however long the
+    interview was. Either is fitted into PROMPT_TRANSCRIPT_TOKEN_BUDGET tokens.
+    """
+    if answer_notes is None:
+        material = "responses"
+        items = user_responses
+    else:
+        material = "notes on each answer"
+        items = [
+            f"Answer {i}: tone: {notes.get('tone', '')}; {notes.get('feedback', '')}"
+            for i, notes in enumerate(answer_notes, start=1)
+        ]
+    joined_responses = "\n\n".join(item.text for item in compact_transcript(items))
+
+    if speech_rate is None:
+        speech_rate_item = "2. A comment on their speech rate (e.g., fast, slow, moderate) – assume these were audio answers."
+        keys = '"tone_summary", "speech_rate", "overall_feedback"'
+    else:
+        speech_rate_item = ""
+        keys = '"tone_summary", "overall_feedback"'
+
+    return f"""
+    You are an AI mock interviewer. Based on the following {material} from a candidate's behavioral interview, generate:
 
     1. A brief summary of their tone (e.g., polite, confident, nervous).
-    2. A comment on their speech rate (e.g., fast, slow, moderate) – assume these were audio answers.
+    {speech_rate_item}
     3. An overall performance feedback focusing on clarity, communication, and behavioral impact.
 
-    Responses:
+    {material.capitalize()}:
     ----------------
     {joined_responses}
     ----------------
 
     Respond ONLY with a JSON object using the following keys:
-    "tone_summary", "speech_rate", "overall_feedback"
+    {keys}
         """
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
 
-    print("🔍 Gemini Raw Output:", repr(response.text))
+async def generate_interview_feedback(
+    user_responses: List[str],
+    speech_rate: Optional[str] = None,
+    answer_notes: Optional[List[dict]] = None,
+) -> dict:
+    text = await generate_text(
+        feedback_prompt(user_responses, speech_rate, answer_notes)
+    )
+
+    logger.debug(f"LLM raw output: {text!r}")
+
+    feedback = extract_json_from_text(text)
+    if speech_rate is not None:
+        feedback["speech_rate"] = speech_rate
+    return feedback
+
+
+async def stream_interview_feedback(
+    user_responses: List[str],
+    speech_rate: Optional[str] = None,
+    answer_notes: Optional[List[dict]] = None,
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Yield (field, value) for each of FEEDBACK_FIELDS as soon as the LLM has
+    finished generating that value. A measured `speech_rate` is yielded
+    first, before the model is called.
+    """
+    if speech_rate is not None:
+        yield "speech_rate", speech_rate
+
+    parser = JSONObjectStream()
+    prompt = feedback_prompt(user_responses, speech_rate, answer_notes)
+    async for chunk in stream_text(prompt):
+        for key, value in parser.feed(chunk):
+            if key in FEEDBACK_FIELDS and not (
+                key == "speech_rate" and speech_rate is not None
+            ):
+                yield key, value if isinstance(value, str) else json.dumps(value)
+        if parser.complete:
+            break
 
-    return extract_json_from_text(response.text)
+    if not parser.complete:
+        raise ValueError("The LLM did not return a complete JSON object")
@@ -0,0 +1,460 @@
+"""
+Speech recognition backends:
+1. A common interface over the supported ASR engines, each tracking its
+   real-time factor (compute seconds per second of audio)
+2. openai-whisper (fp32), int8 dynamically quantized whisper, and
+   CTranslate2 faster-whisper when it is installed
+3. A process-wide registry that loads each configured model once and keeps
+   it warm, reporting load time and resident size
+4. Memory-mapped fp32 weights shared by every process on the host, and a
+   private vs shared memory report per process
+
+Decoding is conditioned on the question being answered (`initial_prompt`),
+pinned to the configured language, and counts how often the temperature
+fallback had to re-decode a window.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Type
+
+import numpy as np
+import torch
+import whisper
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Same quality gates as whisper.transcribe's defaults
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def _tensor_bytes(value) -> int:
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    return 0
+
+
+def _module_size_bytes(model: torch.nn.Module) -> int:
+    # state_dict also covers the packed weights of quantized layers
+    return sum(_tensor_bytes(v) for v in model.state_dict().values())
+
+
+def count_fallbacks(windows: Iterable[tuple], temperatures: List[float]) -> int:
+    """
+    Number of extra decodes caused by the temperature fallback, given the
+    (seek, temperature) of every segment. A window finally decoded at the
+    n-th temperature was decoded n times before that.
+    """
+    fallbacks = 0
+    for _, temperature in set(windows):
+        fallbacks += min(
+            range(len(temperatures)),
+            key=lambda i: abs(temperatures[i] - temperature),
+        )
+    return fallbacks
+
+
+# -----------------------------
+# 1. Backend interface
+# -----------------------------
+
+
+class ASRBackend:
+    """
+    Base class for ASR engines.
+
+    Subclasses implement `load`, `_transcribe` and optionally
+    `_transcribe_batch`; the public methods add timing so every backend
+    reports a comparable real-time factor.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str, device: str | None = None):
+        self.model_name = model_name
+        self.device = device
+        self.load_seconds = 0.0
+        # None when the engine keeps its weights outside torch (unmeasured)
+        self.resident_bytes: int | None = None
+        self.audio_seconds = 0.0
+        self.compute_seconds = 0.0
+        self.fallback_decodes = 0
+
+    @property
+    def temperatures(self) -> List[float]:
+        return settings.WHISPER_TEMPERATURES
+
+    def load(self) -> None:
+        raise NotImplementedError
+
+    def _transcribe(self, waveform: np.ndarray, initial_prompt: Optional[str]) -> dict:
+        raise NotImplementedError
+
+    def _transcribe_batch(
+        self, waveforms: List[np.ndarray], initial_prompt: Optional[str]
+    ) -> List[dict]:
+        return [self._transcribe(w, initial_prompt) for w in waveforms]
+
+    def transcribe(
+        self, waveform: np.ndarray, initial_prompt: Optional[str] = None
+    ) -> dict:
+        """
+        Return {"text", "language", "segments": [{"start", "end", "text"}],
+        "fallbacks"}.
+        """
+        start = time.perf_counter()
+        result = self._transcribe(waveform, initial_prompt)
+        self._record(len(waveform), time.perf_counter() - start)
+        self.fallback_decodes += result["fallbacks"]
+        return result
+
+    def transcribe_batch(
+        self, waveforms: List[np.ndarray], initial_prompt: Optional[str] = None
+    ) -> List[str]:
+        start = time.perf_counter()
+        results = self._transcribe_batch(waveforms, initial_prompt)
+        self._record(sum(len(w) for w in waveforms), time.perf_counter() - start)
+        self.fallback_decodes += sum(r["fallbacks"] for r in results)
+        return [r["text"] for r in results]
+
+    @property
+    def real_time_factor(self) -> float | None:
+        if not self.audio_seconds:
+            return None
+        return self.compute_seconds / self.audio_seconds
+
+    def _record(self, samples: int, elapsed: float) -> None:
+        self.audio_seconds += samples / whisper.audio.SAMPLE_RATE
+        self.compute_seconds += elapsed
+
+
+# -----------------------------
+# 2. Backends
+# -----------------------------
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper in full precision."""
+
+    name = "whisper"
+
+    def load(self) -> None:
+        device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+        if settings.WHISPER_MMAP_WEIGHTS and device == "cpu":
+            self.model = load_whisper_mmap(self.model_name)
+        else:
+            self.model = whisper.load_model(self.model_name, device=device)
+        self.resident_bytes = _module_size_bytes(self.model)
+
+    @property
+    def fp16(self) -> bool:
+        return next(self.model.parameters()).device.type == "cuda"
+
+    def _transcribe(self, waveform: np.ndarray, initial_prompt: Optional[str]) -> dict:
+        result = self.model.transcribe(
+            waveform,
+            fp16=self.fp16,
+            language=settings.WHISPER_LANGUAGE,
+            initial_prompt=initial_prompt,
+            beam_size=settings.WHISPER_BEAM_SIZE,
+            temperature=tuple(self.temperatures),
+        )
+        return {
+            "text": result["text"],
+            "language": result.get("language"),
+            "segments": [
+                {"start": s["start"], "end": s["end"], "text": s["text"]}
+                for s in result["segments"]
+            ],
+            "fallbacks": count_fallbacks(
+                ((s["seek"], s["temperature"]) for s in result["segments"]),
+                self.temperatures,
+            ),
+        }
+
+    def _transcribe_batch(
+        self, waveforms: List[np.ndarray], initial_prompt: Optional[str]
+    ) -> List[dict]:
+        device = next(self.model.parameters()).device
+        mels = torch.stack(
+            [
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(w)), self.model.dims.n_mels
+                )
+                for w in waveforms
+            ]
+        ).to(device)
+        # The whole batch is decoded once at the first temperature; clips that
+        # fail the same quality checks `model.transcribe` applies are then
+        # re-run individually through the full fallback schedule
+        options = whisper.DecodingOptions(
+            fp16=self.fp16,
+            language=settings.WHISPER_LANGUAGE,
+            prompt=initial_prompt,
+            beam_size=settings.WHISPER_BEAM_SIZE,
+            temperature=self.temperatures[0],
+            without_timestamps=True,
+        )
+        outputs = []
+        for waveform, r in zip(waveforms, whisper.decode(self.model, mels, options)):
+            if (
+                r.no_speech_prob > NO_SPEECH_THRESHOLD
+                and r.avg_logprob < LOGPROB_THRESHOLD
+            ):
+                outputs.append({"text": "", "fallbacks": 0})
+            elif (
+                r.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                or r.avg_logprob < LOGPROB_THRESHOLD
+            ):
+                result = self._transcribe(waveform, initial_prompt)
+                # The batched attempt counts as one failed decode
+                outputs.append(
+                    {"text": result["text"], "fallbacks": result["fallbacks"] + 1}
+                )
+            else:
+                outputs.append({"text": r.text, "fallbacks": 0})
+        return outputs
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper with int8 dynamically quantized linear layers (CPU only)."""
+
+    name = "whisper-int8"
+
+    def load(self) -> None:
+        # Quantized weights are packed per process, so only the fp32 source
+        # model benefits from the shared mapping (a smaller load-time peak)
+        if settings.WHISPER_MMAP_WEIGHTS:
+            model = load_whisper_mmap(self.model_name)
+        else:
+            model = whisper.load_model(self.model_name, device="cpu")
+        # whisper subclasses nn.Linear only to cast weights to the input
+        # dtype; quantize_dynamic matches exact types, so fold them back
+        for module in model.modules():
+            if isinstance(module, whisper.model.Linear):
+                module.__class__ = torch.nn.Linear
+        self.model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        self.resident_bytes = _module_size_bytes(self.model)
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    CTranslate2 faster-whisper; only available when the package is installed.
+    Its weights live in CTranslate2's own allocator, so no resident size is
+    reported.
+    """
+
+    name = "faster-whisper"
+
+    def load(self) -> None:
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "ASR_BACKEND=faster-whisper requires the faster-whisper package"
+            ) from e
+
+        self.model = WhisperModel(
+            self.model_name,
+            device=self.device or "auto",
+            compute_type=settings.ASR_COMPUTE_TYPE,
+        )
+
+    def _transcribe(self, waveform: np.ndarray, initial_prompt: Optional[str]) -> dict:
+        segments, info = self.model.transcribe(
+            waveform,
+            language=settings.WHISPER_LANGUAGE,
+            initial_prompt=initial_prompt,
+            beam_size=settings.WHISPER_BEAM_SIZE or 5,
+            temperature=self.temperatures,
+        )
+        segments = list(segments)
+        return {
+            "text": "".join(s.text for s in segments),
+            "language": info.language,
+            "segments": [
+                {"start": s.start, "end": s.end, "text": s.text} for s in segments
+            ],
+            "fallbacks": count_fallbacks(
+                ((s.seek, s.temperature) for s in segments), self.temperatures
+            ),
+        }
+
+
+ASR_BACKENDS: Dict[str, Type[ASRBackend]] = {
+    backend.name: backend
+    for backend in (WhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)
+}
+
+
+# -----------------------------
+# 3. Registry
+# -----------------------------
+
+
+class ASRBackendRegistry:
+    """
+    Process-wide cache of loaded ASR backends.
+
+    Models are loaded on first use (or eagerly via `preload`) and reused by
+    every subsequent request handled by this process.
+    """
+
+    def __init__(self, backend: str, device: str | None = None):
+        if backend not in ASR_BACKENDS:
+            raise ValueError(
+                f"Unknown ASR backend '{backend}'. "
+                f"Choose one of: {', '.join(ASR_BACKENDS)}"
+            )
+        self._backend_cls = ASR_BACKENDS[backend]
+        self._device = device
+        self._backends: Dict[str, ASRBackend] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str | None = None) -> ASRBackend:
+        name = name or settings.WHISPER_MODEL
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            backend = self._backends.get(name)
+            if backend is None:
+                backend = self._load(name)
+                self._backends[name] = backend
+        return backend
+
+    def preload(self, names: List[str]) -> None:
+        for name in names:
+            self.get(name)
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "backend": backend.name,
+                "name": backend.model_name,
+                "load_seconds": round(backend.load_seconds, 3),
+                "resident_mb": (
+                    round(backend.resident_bytes / (1024 * 1024), 1)
+                    if backend.resident_bytes is not None
+                    else None
+                ),
+                "real_time_factor": (
+                    round(backend.real_time_factor, 3)
+                    if backend.real_time_factor is not None
+                    else None
+                ),
+                "fallback_decodes": backend.fallback_decodes,
+            }
+            for backend in self._backends.values()
+        ]
+
+    def _load(self, name: str) -> ASRBackend:
+        backend = self._backend_cls(name, device=self._device)
+        start = time.perf_counter()
+        backend.load()
+        backend.load_seconds = time.perf_counter() - start
+        size = (
+            f"{backend.resident_bytes / (1024 * 1024):.1f} MB"
+            if backend.resident_bytes is not None
+            else "size unknown"
+        )
+        logger.info(
+            f"Loaded {backend.name} model '{name}' in {backend.load_seconds:.2f}s "
+            f"({size})"
+        )
+        return backend
+
+
+# -----------------------------
+# 4. Shared weights and memory report
+# -----------------------------
+
+
+def _mmap_checkpoint_path(name: str) -> str:
+    root = settings.WHISPER_MMAP_DIR or os.path.join(
+        os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "whisper",
+    )
+    os.makedirs(root, exist_ok=True)
+    return os.path.join(root, f"{os.path.basename(name)}.fp32.pt")
+
+
+def load_whisper_mmap(name: str) -> whisper.model.Whisper:
+    """
+    Load a Whisper model whose parameters are views of a memory-mapped file.
+
+    Released checkpoints are fp16 and `load_state_dict` copies them into
+    private fp32 tensors in every process. Instead, the first process to
+    load a model writes its fp32 state dict once; every process then maps
+    that file and uses the tensors in place, so the weights live in the
+    page cache once per host no matter how many workers use them.
+    """
+    path = _mmap_checkpoint_path(name)
+    if not os.path.exists(path):
+        model = whisper.load_model(name, device="cpu")
+        # Write under a private name and rename, so concurrently starting
+        # workers never map a half-written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(
+            {
+                "dims": asdict(model.dims),
+                "model_state_dict": model.state_dict(),
+                "alignment_heads": model.alignment_heads.to_dense(),
+            },
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+        del model
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    model = whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint["dims"]))
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+    model.register_buffer(
+        "alignment_heads", checkpoint["alignment_heads"].to_sparse(), persistent=False
+    )
+    return model
+
+
+def process_memory() -> Optional[dict]:
+    """
+    Resident memory of this process split into pages shared with other
+    processes (e.g. mapped model weights) and private pages, in MB. Linux
+    only; None elsewhere.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {
+                line.split(":")[0]: int(line.split()[1])
+                for line in f
+                if line.split()[-1] == "kB"
+            }
+    except OSError:
+        return None
+
+    def mb(*keys: str) -> float:
+        return round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+
+    return {
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty"),
+        "private_mb": mb("Private_Clean", "Private_Dirty"),
+    }
+
+
+asr_registry = ASRBackendRegistry(
+    settings.ASR_BACKEND, device=settings.WHISPER_DEVICE
+)
@@ -0,0 +1,383 @@
+"""
+Audio helpers:
+1. Decode uploaded audio bytes in memory into a 16 kHz mono float32 waveform,
+   either in one go or incrementally while a recording streams in; 16 kHz
+   mono PCM/WAV payloads skip ffmpeg entirely
+2. Energy-based voice activity detection to strip silence before decoding
+   and to cut long audio at pauses
+"""
+
+import logging
+import struct
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Whisper models expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+# Content types that are read directly instead of going through ffmpeg.
+# audio/L16 is big-endian (RFC 2586), audio/pcm little-endian s16
+PCM_CONTENT_TYPES = {"audio/pcm": "<i2", "audio/l16": ">i2"}
+WAV_CONTENT_TYPES = {"audio/wav", "audio/wave", "audio/x-wav", "audio/vnd.wave"}
+
+
+class AudioDecodeError(Exception):
+    """Raised when uploaded audio cannot be decoded."""
+
+
+# -----------------------------
+# 1. In-memory decoding (ffmpeg over pipes)
+# -----------------------------
+
+
+def _ffmpeg_cmd(sample_rate: int, *input_args: str) -> list:
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        *input_args,
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+
+
+def _pcm_to_float(pcm, dtype: str = "<i2") -> np.ndarray:
+    # frombuffer wraps the bytes without copying; the float conversion is the
+    # only pass over the samples
+    waveform = np.frombuffer(pcm, dtype, count=len(pcm) // 2).astype(np.float32)
+    waveform /= 32768.0
+    return waveform
+
+
+def _parse_content_type(content_type: str) -> Tuple[str, dict]:
+    mime, *params = content_type.split(";")
+    return mime.strip().lower(), {
+        key.strip().lower(): value.strip()
+        for key, _, value in (param.partition("=") for param in params)
+    }
+
+
+def _wav_pcm16(audio_bytes: bytes, sample_rate: int) -> Optional[np.ndarray]:
+    if audio_bytes[:4] != b"RIFF" or audio_bytes[8:12] != b"WAVE":
+        return None
+
+    view = memoryview(audio_bytes)
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(audio_bytes):
+        chunk_id, size = struct.unpack_from("<4sI", audio_bytes, pos)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            if size < 16 or body + 16 > len(audio_bytes):
+                raise AudioDecodeError("Truncated WAV header")
+            fmt = struct.unpack_from("<HHIIHH", audio_bytes, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            format_tag, channels, rate, _, _, bits = fmt
+            # 0xFFFE is WAVE_FORMAT_EXTENSIBLE, which plain PCM writers use too
+            if format_tag not in (1, 0xFFFE) or bits != 16:
+                return None
+            if channels != 1 or rate != sample_rate:
+                return None
+            return _pcm_to_float(view[body : body + size])
+        pos = body + size + (size & 1)
+    return None
+
+
+def decode_pcm(
+    audio_bytes: bytes, content_type: Optional[str], sample_rate: int = SAMPLE_RATE
+) -> Optional[np.ndarray]:
+    """
+    Read 16 kHz mono 16-bit PCM, raw or in a WAV container, straight into a
+    waveform without spawning ffmpeg. Returns None when the payload needs a
+    real decoder (other content types, or WAV at another rate/layout).
+    """
+    if not content_type:
+        return None
+
+    mime, params = _parse_content_type(content_type)
+    if mime in PCM_CONTENT_TYPES:
+        rate = params.get("rate", str(sample_rate))
+        channels = params.get("channels", "1")
+        if rate != str(sample_rate) or channels != "1":
+            raise AudioDecodeError(f"Raw PCM must be {sample_rate} Hz mono")
+        return _pcm_to_float(audio_bytes, PCM_CONTENT_TYPES[mime])
+    if mime in WAV_CONTENT_TYPES:
+        return _wav_pcm16(audio_bytes, sample_rate)
+    return None
+
+
+def decode_audio(audio_bytes: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any container/codec ffmpeg understands by piping the bytes through
+    stdin and reading raw PCM back from stdout, so nothing touches the disk.
+    """
+    cmd = _ffmpeg_cmd(sample_rate)
+    try:
+        proc = subprocess.run(cmd, input=audio_bytes, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg is not installed") from e
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(
+            f"Failed to decode audio: {e.stderr.decode(errors='ignore')[-300:]}"
+        ) from e
+
+    return _pcm_to_float(proc.stdout)
+
+
+class StreamingDecoder:
+    """
+    One long-running ffmpeg process per streamed recording.
+
+    Encoded chunks are written to its stdin as they arrive and a reader
+    thread collects the PCM it emits, so every byte is decoded exactly once
+    no matter how often partial transcripts look at the audio.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        # Small probe so PCM starts flowing after the first fragments rather
+        # than after ffmpeg has buffered megabytes of input
+        cmd = _ffmpeg_cmd(sample_rate, "-probesize", "32768", "-analyzeduration", "0")
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError as e:
+            raise AudioDecodeError("ffmpeg is not installed") from e
+        self._pcm = bytearray()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        while chunk := self._proc.stdout.read1(65536):
+            with self._lock:
+                self._pcm.extend(chunk)
+
+    def write(self, chunk: bytes) -> None:
+        try:
+            self._proc.stdin.write(chunk)
+            self._proc.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            raise AudioDecodeError("Failed to decode streamed audio") from e
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._pcm) // 2
+
+    def samples(self, start: int = 0) -> np.ndarray:
+        """Waveform decoded so far, from sample `start` on."""
+        with self._lock:
+            end = len(self._pcm) // 2 * 2
+            pcm = bytes(self._pcm[2 * start : end])
+        return _pcm_to_float(pcm)
+
+    def close(self, start: int = 0) -> np.ndarray:
+        """Flush ffmpeg and return everything decoded from sample `start` on."""
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        if self._proc.wait() != 0 and not self._pcm:
+            raise AudioDecodeError("Failed to decode streamed audio")
+        return self.samples(start)
+
+    def kill(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+
+
+# -----------------------------
+# 2. Silence trimming (energy VAD)
+# -----------------------------
+
+
+@dataclass
+class TrimResult:
+    waveform: np.ndarray
+    original_seconds: float
+    removed_seconds: float
+
+
+def speech_frames(
+    frames: np.ndarray, relative_db: float = -35.0, floor_db: float = -60.0
+) -> np.ndarray:
+    rms = np.sqrt(np.mean(frames**2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    threshold = max(db.max() + relative_db, floor_db)
+    return db > threshold
+
+
+def trim_silence(
+    waveform: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    padding_ms: int = 150,
+    max_pause_ms: int = 600,
+) -> TrimResult:
+    """
+    Drop leading/trailing silence and shorten pauses longer than
+    `max_pause_ms`. Speech frames are padded by `padding_ms` on both sides so
+    word onsets and endings survive.
+    """
+    frame_len = sample_rate * frame_ms // 1000
+    n_frames = len(waveform) // frame_len
+    original_seconds = len(waveform) / sample_rate
+    if n_frames == 0:
+        return TrimResult(waveform, original_seconds, 0.0)
+
+    frames = waveform[: n_frames * frame_len].reshape(n_frames, frame_len)
+    speech = speech_frames(frames)
+    if not speech.any():
+        # Nothing stands out from the noise floor; don't risk dropping a
+        # quiet answer entirely
+        return TrimResult(waveform, original_seconds, 0.0)
+
+    pad = max(padding_ms // frame_ms, 0)
+    keep = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+
+    # Position of every frame within its run of silence
+    idx = np.arange(n_frames)
+    silent = ~keep
+    run_start = np.where(silent & ~np.r_[False, silent[:-1]], idx, 0)
+    position = idx - np.maximum.accumulate(run_start)
+
+    speech_idx = np.flatnonzero(speech)
+    interior = (idx > speech_idx[0]) & (idx < speech_idx[-1])
+    keep |= silent & interior & (position < max_pause_ms // frame_ms)
+
+    samples_keep = np.repeat(keep, frame_len)
+    tail = waveform[n_frames * frame_len :]
+    trimmed = waveform[: n_frames * frame_len][samples_keep]
+    if keep[-1] and len(tail):
+        trimmed = np.concatenate([trimmed, tail])
+
+    return TrimResult(
+        waveform=trimmed,
+        original_seconds=original_seconds,
+        removed_seconds=original_seconds - len(trimmed) / sample_rate,
+    )
+
+
+def find_quiet_split(
+    waveform: np.ndarray,
+    start: int,
+    end: int,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+) -> int:
+    """
+    Sample index of the quietest frame between `start` and `end`, used to
+    cut long audio between words instead of at a fixed offset.
+    """
+    frame_len = sample_rate * frame_ms // 1000
+    region = waveform[start:end]
+    n_frames = len(region) // frame_len
+    if n_frames == 0:
+        return end
+
+    frames = region[: n_frames * frame_len].reshape(n_frames, frame_len)
+    quietest = int(np.argmin(np.mean(frames**2, axis=1)))
+    return start + quietest * frame_len + frame_len // 2
+
+
+def split_at_pauses(
+    waveform: np.ndarray,
+    max_samples: int,
+    search_samples: int | None = None,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges of at most `max_samples` covering the whole
+    waveform, each cut at the quietest point of its last `search_samples`
+    (default: the last sixth of a chunk).
+    """
+    search = search_samples or max_samples // 6
+    bounds = []
+    start = 0
+    while len(waveform) - start > max_samples:
+        end = find_quiet_split(
+            waveform, start + max_samples - search, start + max_samples, sample_rate
+        )
+        bounds.append((start, end))
+        start = end
+    bounds.append((start, len(waveform)))
+    return bounds
+
+
+class VADStats:
+    """Running totals of the audio silence trimming saw and removed, per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clips = 0
+        self.original_seconds = 0.0
+        self.removed_seconds = 0.0
+
+    def record(self, result: TrimResult) -> None:
+        with self._lock:
+            self.clips += 1
+            self.original_seconds += result.original_seconds
+            self.removed_seconds += result.removed_seconds
+
+    def stats(self) -> dict:
+        return {
+            "clips": self.clips,
+            "original_seconds": round(self.original_seconds, 1),
+            "removed_seconds": round(self.removed_seconds, 1),
+            "removed_ratio": (
+                round(self.removed_seconds / self.original_seconds, 3)
+                if self.original_seconds
+                else None
+            ),
+        }
+
+
+vad_stats = VADStats()
+
+
+def prepare_waveform(waveform: np.ndarray) -> np.ndarray:
+    """Apply the configured pre-processing before the waveform reaches Whisper."""
+    if not settings.TRANSCRIBE_VAD_ENABLED:
+        return waveform
+
+    result = trim_silence(waveform, max_pause_ms=settings.TRANSCRIBE_VAD_MAX_PAUSE_MS)
+    vad_stats.record(result)
+    logger.debug(
+        f"VAD removed {result.removed_seconds:.1f}s of "
+        f"{result.original_seconds:.1f}s audio"
+    )
+    return result.waveform
+
+
+def decode_upload(audio_bytes: bytes, content_type: Optional[str] = None) -> np.ndarray:
+    """Decode an upload, reading PCM directly and everything else via ffmpeg."""
+    waveform = decode_pcm(audio_bytes, content_type)
+    if waveform is None:
+        waveform = decode_audio(audio_bytes)
+    return waveform
+
+
+def decode_and_prepare(
+    audio_bytes: bytes, content_type: Optional[str] = None
+) -> np.ndarray:
+    """Decode and pre-process in one call, so both run in the same thread."""
+    return prepare_waveform(decode_upload(audio_bytes, content_type))
@@ -0,0 +1,157 @@
+"""
+Caching helpers:
+1. In-memory LRU + TTL cache with an optional SQLite tier shared by every
+   process on the host
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+
+def hash_key(*parts: Any) -> str:
+    """Stable content hash of the given parts (bytes are hashed as-is)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode()
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class SQLiteCacheTier:
+    """
+    Persistent key/value tier; values are stored as JSON.
+
+    Expired rows are deleted when read, and every `prune_every` writes the
+    table is swept for expired rows and cut back to the `max_rows` entries
+    that expire last.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        max_rows: int = 10000,
+        prune_every: int = 100,
+    ):
+        self._table = table
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] < time.time():
+                self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self) -> None:
+        self._conn.execute(
+            f"DELETE FROM {self._table} WHERE expires_at < ?", (time.time(),)
+        )
+        self._conn.execute(
+            f"DELETE FROM {self._table} WHERE key NOT IN "
+            f"(SELECT key FROM {self._table} ORDER BY expires_at DESC LIMIT ?)",
+            (self.max_rows,),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {self._table}"
+            ).fetchone()[0]
+
+
+class TieredCache:
+    """
+    LRU + TTL memory cache in front of an optional SQLite tier.
+
+    Hits on the SQLite tier are promoted into memory. Hit/miss counters are
+    kept per tier so they can be reported on the health endpoint.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        sqlite_path: str | None = None,
+        sqlite_max_rows: int = 10000,
+    ):
+        self.ttl = ttl
+        self._memory: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._disk = (
+            SQLiteCacheTier(sqlite_path, max_rows=sqlite_max_rows)
+            if sqlite_path
+            else None
+        )
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self._memory[key] = value
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        if self._disk is not None:
+            self._disk.set(key, value, self.ttl)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._memory),
+            "disk_size": len(self._disk) if self._disk is not None else None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,329 @@
+"""
+Background jobs for slow LLM work (interview feedback, question generation):
+1. Every job is recorded in a pluggable store, either the Job table of the
+   app database (SQLite or Postgres) or process memory
+2. An in-process asyncio queue is drained by JOB_WORKERS runners, so only
+   that many generations run at once however many requests come in
+3. Jobs still queued when a process stops are picked up again on start, as
+   are jobs it was running (or, after a crash, that have been running for
+   longer than JOB_LEASE_SECONDS)
+4. Background analysis of each answer has a queue (and runners) of its own,
+   so it can't crowd out the jobs a user is waiting for
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# A handler gets its own database session and the job payload, and returns
+# a JSON-serializable result
+JobHandler = Callable[[Session, dict], Awaitable[Any]]
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_QUEUE_DEPTH jobs are already waiting."""
+
+
+# -----------------------------
+# 1. Job stores
+# -----------------------------
+
+
+class JobStore:
+    """Where job records live; the queue itself only holds job ids."""
+
+    def create(self, job: Job) -> Job:
+        raise NotImplementedError
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        raise NotImplementedError
+
+    def claim(self, job_id: uuid.UUID) -> Optional[Job]:
+        """Mark a queued job as running, or return None if it isn't queued."""
+        raise NotImplementedError
+
+    def finish(self, job_id: uuid.UUID, **fields: Any) -> None:
+        raise NotImplementedError
+
+    def queued(self) -> List[Job]:
+        raise NotImplementedError
+
+    def release(self, job_id: uuid.UUID) -> None:
+        """Put a running job back in the queued state."""
+        raise NotImplementedError
+
+    def running_since(self, cutoff: datetime) -> List[Job]:
+        """Running jobs started before `cutoff`."""
+        raise NotImplementedError
+
+
+class DatabaseJobStore(JobStore):
+    """
+    Jobs in the Job table, so they survive restarts and are visible to every
+    worker process. Claiming is a conditional UPDATE, so a job re-queued by
+    several processes still runs once.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def create(self, job: Job) -> Job:
+        with self.session_factory() as session:
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        with self.session_factory() as session:
+            return session.get(Job, job_id)
+
+    def claim(self, job_id: uuid.UUID) -> Optional[Job]:
+        with self.session_factory() as session:
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", started_at=datetime.utcnow())
+            ).rowcount
+            session.commit()
+            return session.get(Job, job_id) if claimed else None
+
+    def finish(self, job_id: uuid.UUID, **fields: Any) -> None:
+        with self.session_factory() as session:
+            job = session.get(Job, job_id)
+            job.sqlmodel_update({**fields, "finished_at": datetime.utcnow()})
+            session.add(job)
+            session.commit()
+
+    def queued(self) -> List[Job]:
+        with self.session_factory() as session:
+            return list(
+                session.exec(
+                    select(Job).where(Job.status == "queued").order_by(Job.created_at)
+                ).all()
+            )
+
+    def release(self, job_id: uuid.UUID) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running")
+                .values(status="queued", started_at=None)
+            )
+            session.commit()
+
+    def running_since(self, cutoff: datetime) -> List[Job]:
+        with self.session_factory() as session:
+            return list(
+                session.exec(
+                    select(Job).where(Job.status == "running", Job.started_at < cutoff)
+                ).all()
+            )
+
+
+class MemoryJobStore(JobStore):
+    """Jobs in a dict; lost on restart and only visible to this process."""
+
+    def __init__(self):
+        self.jobs: Dict[uuid.UUID, Job] = {}
+
+    def create(self, job: Job) -> Job:
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def claim(self, job_id: uuid.UUID) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None or job.status != "queued":
+            return None
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        return job
+
+    def finish(self, job_id: uuid.UUID, **fields: Any) -> None:
+        self.jobs[job_id].sqlmodel_update({**fields, "finished_at": datetime.utcnow()})
+
+    def queued(self) -> List[Job]:
+        return [job for job in self.jobs.values() if job.status == "queued"]
+
+    def release(self, job_id: uuid.UUID) -> None:
+        job = self.jobs[job_id]
+        if job.status == "running":
+            job.status = "queued"
+            job.started_at = None
+
+    def running_since(self, cutoff: datetime) -> List[Job]:
+        return [
+            job
+            for job in self.jobs.values()
+            if job.status == "running" and job.started_at < cutoff
+        ]
+
+
+# -----------------------------
+# 2. Queue and runners
+# -----------------------------
+
+
+class JobQueue:
+    def __init__(
+        self,
+        store: JobStore,
+        session_factory: Callable[[], Session],
+        workers: int,
+        max_queued: int,
+        lease_seconds: float = 600.0,
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.handlers: Dict[str, JobHandler] = {}
+        self.running = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._runners: List[asyncio.Task] = []
+
+    def handler(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Register the coroutine that runs jobs of `kind`."""
+
+        def register(fn: JobHandler) -> JobHandler:
+            self.handlers[kind] = fn
+            return fn
+
+        return register
+
+    async def start(self) -> None:
+        """Start the runners in the current event loop."""
+        self._queue = asyncio.Queue()
+        # A process that died mid-job never released it; once the lease has
+        # run out it is taken to be dead
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        for job in self.store.running_since(cutoff):
+            if job.kind in self.handlers:
+                self.store.release(job.id)
+        # Queues can share a store; each takes back the kinds it handles
+        for job in self.store.queued():
+            if job.kind in self.handlers:
+                self._queue.put_nowait(job.id)
+        if self._queue.qsize():
+            logger.info(f"Re-queued {self._queue.qsize()} background jobs")
+        self._runners = [
+            asyncio.create_task(self._run()) for _ in range(max(self.workers, 1))
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the runners; interrupted jobs go back to "queued"."""
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+        self._queue = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished."""
+        await self._queue.join()
+
+    def submit(
+        self,
+        kind: str,
+        user_id: uuid.UUID,
+        payload: dict,
+        interview_id: Optional[uuid.UUID] = None,
+    ) -> Job:
+        """Record a job and queue it; returns at once with the queued Job."""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for job kind '{kind}'")
+        if self._queue is None:
+            raise RuntimeError("The job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull()
+
+        job = self.store.create(
+            Job(kind=kind, user_id=user_id, interview_id=interview_id, payload=payload)
+        )
+        self._queue.put_nowait(job.id)
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "store": type(self.store).__name__,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._execute(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job_id: uuid.UUID) -> None:
+        # Another process (or an earlier run) may already have taken it
+        job = self.store.claim(job_id)
+        if job is None:
+            return
+
+        self.running += 1
+        try:
+            with self.session_factory() as session:
+                result = await self.handlers[job.kind](session, job.payload)
+        except asyncio.CancelledError:
+            # Stopped mid-job: the next start runs it again
+            self.store.release(job_id)
+            raise
+        except Exception as e:
+            logger.exception(f"Background job {job_id} ({job.kind}) failed")
+            # HTTPException from shared route helpers carries its message
+            # in `detail`
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            self.store.finish(job_id, status="failed", error=error)
+        else:
+            self.store.finish(job_id, status="succeeded", result=result)
+        finally:
+            self.running -= 1
+
+
+def database_session() -> Session:
+    return Session(engine)
+
+
+job_queue = JobQueue(
+    store=(
+        DatabaseJobStore(database_session)
+        if settings.JOB_STORE == "database"
+        else MemoryJobStore()
+    ),
+    session_factory=database_session,
+    workers=settings.JOB_WORKERS,
+    max_queued=settings.JOB_QUEUE_DEPTH,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
+
+# Per-answer feedback, queued on every chat turn
+answer_job_queue = JobQueue(
+    store=job_queue.store,
+    session_factory=database_session,
+    workers=settings.ANSWER_JOB_WORKERS,
+    max_queued=settings.ANSWER_JOB_QUEUE_DEPTH,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
@@ -0,0 +1,70 @@
+"""
+Incremental JSON parsing for streamed LLM output:
+1. Members of a JSON object are reported as soon as each one is complete,
+   long before the model has generated the rest of the object
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class JSONObjectStream:
+    """
+    Parser for one JSON object arriving in pieces.
+
+    `feed` returns the (key, value) members completed by the new text. Text
+    around the object (e.g. markdown code fences) is ignored; nested values
+    are tracked by depth and decoded once their member is complete.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = -1
+        self.members: Dict[str, Any] = {}
+        self.complete = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self._buffer += text
+        completed: List[Tuple[str, Any]] = []
+        while self._pos < len(self._buffer) and not self.complete:
+            ch = self._buffer[self._pos]
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._member(self._pos)
+                    self.complete = True
+            elif ch == "," and self._depth == 1:
+                completed += self._member(self._pos)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self._buffer[self._member_start : end].strip()
+        if not text:
+            return []
+        try:
+            key, value = json.loads("{" + text + "}").popitem()
+        except (json.JSONDecodeError, KeyError) as e:
+            raise ValueError(f"Malformed JSON member: {text[:80]}") from e
+        self.members[key] = value
+        return [(key, value)]
@@ -0,0 +1,279 @@
+"""
+LLM providers behind one interface:
+1. Gemini (google-generativeai), any OpenAI-compatible API (openai) and a
+   deterministic local fake for load tests, selected by LLM_PROVIDER
+2. Providers make single attempts; the per-attempt timeout, concurrency
+   limit, retries, hedging and circuit breaker are applied in `ai_service`
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import AsyncIterator, Dict, Optional, Tuple, Type
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from app.core.config import settings
+
+
+class LLMProvider:
+    """
+    One LLM API. `generate` returns the whole completion; `open_stream`
+    returns once the request is accepted, with an iterator of text chunks.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def model_id(self) -> str:
+        """Provider and model, e.g. for cache keys."""
+        return f"{self.name}:{self.model_name}"
+
+    @property
+    def transient_errors(self) -> Tuple[Type[BaseException], ...]:
+        """Errors worth retrying, which also count against the breaker."""
+        return (ConnectionError,)
+
+    async def generate(self, prompt: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    async def open_stream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+# -----------------------------
+# 1. Gemini
+# -----------------------------
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str, model: Optional[genai.GenerativeModel] = None):
+        super().__init__(model_name)
+        self._model = model
+
+    @property
+    def model(self) -> genai.GenerativeModel:
+        # The SDK keeps its client, and with it the open connection, on the
+        # model object, so it is built once per worker and reused
+        if self._model is None:
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    @property
+    def transient_errors(self) -> Tuple[Type[BaseException], ...]:
+        return (
+            google_exceptions.ServerError,
+            google_exceptions.TooManyRequests,
+            ConnectionError,
+        )
+
+    async def generate(self, prompt: str, timeout: float) -> str:
+        response = await self.model.generate_content_async(
+            prompt, request_options={"timeout": timeout}
+        )
+        return response.text
+
+    async def open_stream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+
+        async def texts() -> AsyncIterator[str]:
+            async for chunk in response:
+                # The final chunk may only carry the finish reason
+                if chunk.parts:
+                    yield chunk.text
+
+        return texts()
+
+
+# -----------------------------
+# 2. OpenAI-compatible
+# -----------------------------
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    Chat completions from OpenAI or any server speaking its API (set
+    OPENAI_BASE_URL); only available when the openai package is installed.
+    """
+
+    name = "openai"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        try:
+            import openai
+        except ImportError as e:
+            raise RuntimeError("LLM_PROVIDER=openai requires the openai package") from e
+
+        self._openai = openai
+        # Retries are ours (llm_resilience), not the SDK's
+        self.client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=0,
+        )
+
+    @property
+    def transient_errors(self) -> Tuple[Type[BaseException], ...]:
+        return (
+            self._openai.APITimeoutError,
+            self._openai.APIConnectionError,
+            self._openai.RateLimitError,
+            self._openai.InternalServerError,
+            ConnectionError,
+        )
+
+    def _messages(self, prompt: str) -> list:
+        return [{"role": "user", "content": prompt}]
+
+    async def generate(self, prompt: str, timeout: float) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model_name, messages=self._messages(prompt), timeout=timeout
+        )
+        return response.choices[0].message.content or ""
+
+    async def open_stream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=self._messages(prompt),
+            stream=True,
+            timeout=timeout,
+        )
+
+        async def texts() -> AsyncIterator[str]:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        return texts()
+
+
+# -----------------------------
+# 3. Local fake
+# -----------------------------
+
+
+class FakeLLMError(ConnectionError):
+    """Injected failure of the fake provider (LLM_FAKE_FAILURE_RATE)."""
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Deterministic stand-in for load tests and benchmarks of our own code.
+
+    Latency is log-normal around LLM_FAKE_LATENCY_MEDIAN_SECONDS with spread
+    LLM_FAKE_LATENCY_SIGMA, drawn from a seeded generator. Outputs are
+    canned: the first entry of `responses` whose key appears in the prompt,
+    else a generic answer shaped like what the prompt asks for (a numbered
+    list of questions, a follow-up asking the planned question or a JSON
+    object with the requested keys).
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        latency_median: float = 0.0,
+        latency_sigma: float = 0.0,
+        failure_rate: float = 0.0,
+        responses: Optional[Dict[str, str]] = None,
+        seed: int = 0,
+        chunk_chars: int = 16,
+    ):
+        super().__init__(model_name)
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.responses = responses or {}
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    @property
+    def transient_errors(self) -> Tuple[Type[BaseException], ...]:
+        return (FakeLLMError,)
+
+    def latency(self) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return self.latency_median * math.exp(self._rng.gauss(0, self.latency_sigma))
+
+    def respond(self, prompt: str) -> str:
+        for key, response in self.responses.items():
+            if key in prompt:
+                return response
+
+        questions = re.search(r"generate (\d+) high-quality", prompt)
+        if questions:
+            return "\n".join(
+                f"{i}. Tell me about a challenge you faced in project {i}."
+                for i in range(1, int(questions.group(1)) + 1)
+            )
+        follow_up = re.search(r"next planned question: (.+)", prompt)
+        if follow_up:
+            return f"Thanks, that helps. {follow_up.group(1)}"
+        keys = re.search(r"JSON object using the following keys:\s*(.+)", prompt)
+        if keys:
+            fields = re.findall(r'"(\w+)"', keys.group(1))
+            return json.dumps({field: f"Fake {field}." for field in fields})
+        return "Thanks. Could you walk me through that in more detail?"
+
+    async def _call(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency())
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+        return self.respond(prompt)
+
+    async def generate(self, prompt: str, timeout: float) -> str:
+        return await self._call(prompt)
+
+    async def open_stream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        text = await self._call(prompt)
+
+        async def texts() -> AsyncIterator[str]:
+            for i in range(0, len(text), self.chunk_chars):
+                await asyncio.sleep(0)
+                yield text[i : i + self.chunk_chars]
+
+        return texts()
+
+
+def load_fake_responses(path: Optional[str]) -> Dict[str, str]:
+    """Canned outputs from a JSON object of prompt substring -> response."""
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def create_llm_provider(name: Optional[str] = None) -> LLMProvider:
+    name = name or settings.LLM_PROVIDER
+    if name == "gemini":
+        return GeminiProvider(settings.GEMINI_MODEL)
+    if name == "openai":
+        return OpenAIProvider(settings.OPENAI_MODEL)
+    if name == "fake":
+        return FakeLLMProvider(
+            latency_median=settings.LLM_FAKE_LATENCY_MEDIAN_SECONDS,
+            latency_sigma=settings.LLM_FAKE_LATENCY_SIGMA,
+            failure_rate=settings.LLM_FAKE_FAILURE_RATE,
+            responses=load_fake_responses(settings.LLM_FAKE_RESPONSES_PATH),
+            seed=settings.LLM_FAKE_SEED,
+        )
+    raise ValueError(
+        f"Unknown LLM provider '{name}'. Choose one of: gemini, openai, fake"
+    )
@@ -0,0 +1,262 @@
+"""
+Resilience around LLM calls:
+1. A deadline for the whole call, retries included
+2. Retries with exponential backoff and jitter (tenacity) on transient errors
+3. Hedging: a duplicate request once an attempt runs past the recent p95
+   latency, first answer wins
+4. A circuit breaker that fails fast while the provider keeps failing, so
+   callers can switch to a degraded fallback at once
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+import numpy as np
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+T = TypeVar("T")
+
+
+class LLMTimeout(Exception):
+    """Raised when the LLM does not answer within its deadline."""
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling the LLM while the circuit breaker is open."""
+
+
+# -----------------------------
+# 1. Circuit breaker
+# -----------------------------
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures. After
+    `reset_seconds` one trial call is let through ("half open"): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.trips = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or (
+            self._opened_at is None and self.failures >= self.failure_threshold
+        ):
+            self._opened_at = self.clock()
+            self.trips += 1
+        self._trial_running = False
+
+    def release_trial(self) -> None:
+        """End a trial call that gave no verdict (e.g. it was cancelled)."""
+        self._trial_running = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+# -----------------------------
+# 2. Hedging
+# -----------------------------
+
+
+class LatencyTracker:
+    """Latency percentiles over the most recent successful calls."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        return float(np.percentile(self.samples, q))
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Run `call`; if it hasn't finished after `delay` seconds, start a second
+    one and return whichever succeeds first. The other is cancelled.
+    """
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return tasks[0].result()
+
+        tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# -----------------------------
+# 3. Resilient calls
+# -----------------------------
+
+
+class ResilientCaller:
+    """
+    Wraps single LLM attempts (which apply their own per-attempt timeout)
+    with the deadline, retries, hedging and the circuit breaker. Only
+    `transient` errors are retried and count against the breaker.
+    """
+
+    def __init__(
+        self,
+        transient: Tuple[Type[BaseException], ...],
+        attempts: int,
+        deadline_seconds: float,
+        hedge_min_delay_seconds: Optional[float],
+        breaker: CircuitBreaker,
+    ):
+        self.transient = transient
+        self.attempts = attempts
+        self.deadline_seconds = deadline_seconds
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.retries = 0
+        self.hedges = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Recent p95 latency, or None while hedging is off or unmeasured."""
+        if self.hedge_min_delay_seconds is None:
+            return None
+        p95 = self.latency.percentile(95)
+        return None if p95 is None else max(p95, self.hedge_min_delay_seconds)
+
+    async def _attempt(self, call: Callable[[], Awaitable[T]]) -> T:
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM provider is unavailable, circuit is open")
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except self.transient:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # The provider answered, just not usefully (e.g. a bad request)
+            self.breaker.record_success()
+            raise
+        finally:
+            # Cancelled (deadline, lost hedge, client gone): no verdict, but
+            # a trial must not hold the half-open circuit forever
+            self.breaker.release_trial()
+        self.breaker.record_success()
+        self.latency.record(time.perf_counter() - started)
+        return result
+
+    async def _hedged_attempt(self, call: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._attempt(call)
+
+        started = 0
+
+        async def attempt() -> T:
+            nonlocal started
+            started += 1
+            if started == 2:
+                self.hedges += 1
+            return await self._attempt(call)
+
+        return await hedged(attempt, delay)
+
+    async def call(
+        self,
+        call: Callable[[], Awaitable[T]],
+        hedge: bool = True,
+        attempts: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+    ) -> T:
+        """
+        Run `call` until it succeeds, a non-transient error or the deadline.
+        `attempts` and `deadline_seconds` override the configured ones.
+        """
+        deadline = deadline_seconds or self.deadline_seconds
+
+        async def with_retries() -> T:
+            retrying = AsyncRetrying(
+                stop=stop_after_attempt(attempts or self.attempts),
+                wait=wait_exponential_jitter(multiplier=0.25, max=2.0, jitter=0.25),
+                retry=retry_if_exception_type(self.transient),
+                reraise=True,
+            )
+            async for attempt in retrying:
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        self.retries += 1
+                    if hedge:
+                        return await self._hedged_attempt(call)
+                    return await self._attempt(call)
+
+        try:
+            return await asyncio.wait_for(with_retries(), deadline)
+        except asyncio.TimeoutError as e:
+            raise LLMTimeout(f"LLM did not respond within {deadline}s") from e
+
+    def stats(self) -> dict:
+        p95 = self.latency.percentile(95)
+        return {
+            "breaker": self.breaker.stats(),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
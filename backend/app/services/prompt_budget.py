@@ -0,0 +1,294 @@
+"""
+Token-budgeted prompt content:
+1. Token counting with tiktoken (a characters-per-token estimate when the
+   encoding can't be loaded, e.g. offline)
+2. Cleanup of pymupdf4llm resume markdown: markup, tables, images, page
+   furniture, contact details and repeated lines or sections
+3. Fitting resume sections (by priority) and interview answers (evenly)
+   into a token budget, with the tokens saved reported per call
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token when no tokenizer is available
+CHARS_PER_TOKEN = 4
+# A resume section cut shorter than this is dropped instead
+MIN_SECTION_TOKENS = 40
+
+# Lower is kept first when the resume is over budget; the contact block
+# before the first heading and unknown sections come last
+RESUME_SECTION_PRIORITY = [
+    ("experience", "employment", "work history"),
+    ("project",),
+    ("leadership", "activities", "volunteer", "involvement"),
+    ("skill", "technolog"),
+    ("summary", "profile", "objective", "about"),
+    ("education",),
+    ("award", "honor", "achievement", "certification", "publication"),
+]
+
+
+# -----------------------------
+# 1. Token counting
+# -----------------------------
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(settings.PROMPT_TOKEN_ENCODING)
+    except Exception as e:
+        logger.warning(
+            f"Tokenizer {settings.PROMPT_TOKEN_ENCODING} unavailable ({e}); "
+            f"estimating {CHARS_PER_TOKEN} characters per token"
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens`, at a word boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    # Leave room for the ellipsis
+    encoding = _encoding()
+    if encoding is None:
+        cut = text[: (max_tokens - 1) * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        cut = encoding.decode(tokens[: max_tokens - 1])
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + " …"
+
+
+# -----------------------------
+# 2. Resume cleanup
+# -----------------------------
+
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_BOLD = re.compile(r"(\*{1,3}|__)(\S(?:.*?\S)?)\1")
+_ITALIC = re.compile(r"(?<!\w)_(\S(?:[^_]*?\S)?)_(?!\w)")
+_HTML = re.compile(r"<[^>]+>")
+_CONTACT = re.compile(
+    r"https?://\S+|www\.\S+|\S+@\S+\.\w+|\+?\d[\d\s().-]{7,}\d", re.IGNORECASE
+)
+_SYMBOLS = re.compile(r"[\U0001F300-\U0001FAFF\u2600-\u27BF]")
+# Link labels left behind once the links themselves are gone
+_CONTACT_LABELS = {"linkedin", "github", "portfolio", "website", "substack", "email"}
+_SEPARATORS = re.compile(r"\s*[∙•·|]\s*")
+_TABLE_RULE = re.compile(r"^\|?[\s:|-]*-{3,}[\s:|-]*$")
+_RULE = re.compile(r"^([-*_=]\s*){3,}$")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_BULLET = re.compile(r"^[-*•●▪◦‣]\s*")
+_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+_BOLD_LINE = re.compile(r"^\*\*([^*]+)\*\*:?$")
+
+
+def _clean_line(line: str) -> str:
+    line = line.strip()
+    if _TABLE_RULE.match(line) or _RULE.match(line):
+        return ""
+    if line.startswith("|"):
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        line = "; ".join(cell for cell in cells if cell)
+
+    line = _IMAGE.sub("", line)
+    line = _LINK.sub(r"\1", line)
+    line = _HTML.sub(" ", line)
+    line = _BOLD.sub(r"\2", line)
+    line = _ITALIC.sub(r"\1", line)
+    line = _CONTACT.sub("", line)
+    line = _SYMBOLS.sub("", line)
+    parts = [part for part in _SEPARATORS.split(line) if part.strip()]
+    if parts and all(part.strip().lower() in _CONTACT_LABELS for part in parts):
+        return ""
+
+    bullet = _BULLET.match(line)
+    line = re.sub(r"\s+", " ", line[bullet.end() :] if bullet else line).strip()
+    line = re.sub(r" ([,.;:])", r"\1", line).strip(" |,;·∙•")
+    if not line or _PAGE_NUMBER.match(line):
+        return ""
+    return f"- {line}" if bullet else line
+
+
+def _heading(line: str) -> Optional[str]:
+    """Title of a section heading line, or None for body text."""
+    line = line.strip()
+    match = _HEADING.match(line) or _BOLD_LINE.match(line)
+    if match:
+        return _clean_line(match.group(1)) or None
+    # All-caps lines such as "WORK EXPERIENCE"
+    if line.isupper() and len(line) <= 40 and re.search(r"[A-Z]{3}", line):
+        return line.title()
+    return None
+
+
+def resume_sections(markdown: str) -> List[Tuple[str, List[str]]]:
+    """
+    Split resume markdown into (title, cleaned lines) sections. Sections with
+    the same title (e.g. "Experience" continued on page 2) are merged, and a
+    line is kept only the first time it appears, which drops page headers
+    and footers repeated on every page.
+    """
+    sections: Dict[str, List[str]] = {"": []}
+    titles: Dict[str, str] = {"": ""}
+    seen = set()
+    current = ""
+    for raw in markdown.splitlines():
+        title = _heading(raw)
+        if title is not None:
+            current = title.lower()
+            titles.setdefault(current, title)
+            sections.setdefault(current, [])
+            continue
+        line = _clean_line(raw)
+        key = line.lstrip("- ").lower()
+        if line and key not in seen:
+            seen.add(key)
+            sections[current].append(line)
+    return [(titles[key], lines) for key, lines in sections.items() if lines]
+
+
+def _section_priority(title: str, index: int) -> Tuple[int, int]:
+    if not title:
+        return (len(RESUME_SECTION_PRIORITY) + 1, index)
+    lowered = title.lower()
+    for rank, keywords in enumerate(RESUME_SECTION_PRIORITY):
+        if any(keyword in lowered for keyword in keywords):
+            return (rank, index)
+    return (len(RESUME_SECTION_PRIORITY), index)
+
+
+# -----------------------------
+# 3. Budgets
+# -----------------------------
+
+
+@dataclass
+class BudgetedText:
+    text: str
+    tokens: int
+    original_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+class PromptStats:
+    """Tokens before and after compaction, per kind of prompt content."""
+
+    def __init__(self):
+        self.kinds: Dict[str, Dict[str, int]] = {}
+
+    def record(self, kind: str, result: BudgetedText) -> None:
+        stats = self.kinds.setdefault(
+            kind, {"calls": 0, "original_tokens": 0, "tokens": 0, "saved_tokens": 0}
+        )
+        stats["calls"] += 1
+        stats["original_tokens"] += result.original_tokens
+        stats["tokens"] += result.tokens
+        stats["saved_tokens"] += result.saved_tokens
+        logger.info(
+            f"Prompt {kind}: {result.original_tokens} -> {result.tokens} tokens "
+            f"({result.saved_tokens} saved)"
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {kind: dict(stats) for kind, stats in self.kinds.items()}
+
+
+prompt_stats = PromptStats()
+
+
+def compact_resume(markdown: str, budget: Optional[int] = None) -> BudgetedText:
+    """
+    Cleaned resume text within `budget` tokens. Sections are kept whole in
+    priority order (experience and projects first); the first one that
+    doesn't fit is cut to the remaining budget. Kept sections stay in their
+    original order.
+    """
+    budget = settings.PROMPT_RESUME_TOKEN_BUDGET if budget is None else budget
+    sections = resume_sections(markdown)
+    blocks = [
+        "\n".join(([f"{title}:"] if title else []) + lines) for title, lines in sections
+    ]
+
+    kept: Dict[int, str] = {}
+    remaining = budget
+    order = sorted(
+        range(len(sections)), key=lambda i: _section_priority(sections[i][0], i)
+    )
+    for i in order:
+        tokens = count_tokens(blocks[i])
+        if tokens <= remaining:
+            kept[i] = blocks[i]
+            remaining -= tokens
+        elif remaining >= MIN_SECTION_TOKENS:
+            kept[i] = truncate_tokens(blocks[i], remaining)
+            remaining = 0
+
+    text = "\n\n".join(kept[i] for i in sorted(kept))
+    result = BudgetedText(text, count_tokens(text), count_tokens(markdown))
+    prompt_stats.record("resume", result)
+    return result
+
+
+def compact_transcript(
+    responses: List[str], budget: Optional[int] = None
+) -> List[BudgetedText]:
+    """
+    Fit the candidate's answers into `budget` tokens. Answers under an even
+    share are kept whole and their unused share goes to the longer ones,
+    which are cut to fit, so one rambling answer can't crowd out the rest.
+    """
+    budget = settings.PROMPT_TRANSCRIPT_TOKEN_BUDGET if budget is None else budget
+    texts = [re.sub(r"\s+", " ", response).strip() for response in responses]
+    tokens = [count_tokens(text) for text in texts]
+
+    limit = {}
+    remaining = budget
+    pending = sorted(range(len(texts)), key=lambda i: tokens[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        limit[i] = min(tokens[i], share)
+        remaining -= limit[i]
+
+    results = []
+    for i, text in enumerate(texts):
+        fitted = truncate_tokens(text, limit[i])
+        results.append(
+            BudgetedText(fitted, count_tokens(fitted), count_tokens(responses[i]))
+        )
+
+    prompt_stats.record(
+        "transcript",
+        BudgetedText(
+            "",
+            sum(r.tokens for r in results),
+            sum(r.original_tokens for r in results),
+        ),
+    )
+    return results
@@ -0,0 +1,40 @@
+"""
+Fallback behavioral questions:
+1. Used instead of Gemini while it is unavailable (circuit open, or still
+   failing after retries), so interview setup never waits on a sick provider
+"""
+
+import random
+from typing import List
+
+from app.services.cache import hash_key
+
+FALLBACK_BEHAVIORAL_QUESTIONS = [
+    "Tell me about a time you disagreed with a teammate. How did you resolve it?",
+    "Describe a project you are proud of and the part you personally played.",
+    "Tell me about a time you failed. What did you learn from it?",
+    "Describe a situation where you had to meet a tight deadline.",
+    "Tell me about a time you took the lead without being asked.",
+    "Describe a time you received critical feedback. How did you respond?",
+    "Tell me about a time you had to learn a new technology quickly.",
+    "Describe a time you had to explain something technical to a non-expert.",
+    "Tell me about a decision you made with incomplete information.",
+    "Describe a time you helped a struggling teammate.",
+    "Tell me about a time you had to balance several competing priorities.",
+    "Describe a mistake you made at work or school and how you fixed it.",
+    "Tell me about a time you improved a process or a tool your team used.",
+    "Describe a time you had to persuade others to adopt your idea.",
+    "Tell me about a time a project's requirements changed late.",
+    "Describe how you handled a conflict with a manager or professor.",
+    "Tell me about a goal you set for yourself and how you reached it.",
+    "Describe a time you went beyond what was expected of you.",
+    "Tell me about a time you worked with someone whose style differed from yours.",
+    "Describe a time you had to say no to a request. How did you handle it?",
+]
+
+
+def fallback_questions(parsed_resume: str, num_questions: int) -> List[str]:
+    """A stable pick per resume, so a retried setup shows the same questions."""
+    rng = random.Random(hash_key(parsed_resume))
+    count = min(num_questions, len(FALLBACK_BEHAVIORAL_QUESTIONS))
+    return rng.sample(FALLBACK_BEHAVIORAL_QUESTIONS, count)
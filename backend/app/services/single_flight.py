@@ -0,0 +1,53 @@
+"""
+Single-flight coalescing of concurrent identical work:
+1. The first caller for a key starts the work; callers arriving while it is
+   in flight await the same task and share its result (or its exception)
+2. The work runs as its own task, so a caller that goes away (e.g. a client
+   disconnect) does not cancel it for the others
+3. Streaming callers join the flight directly, to learn whether their own
+   work runs (and relay its progress) or they replay another's result
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def join(
+        self, key: Hashable, work: Callable[[], Awaitable[T]]
+    ) -> Tuple["asyncio.Future[T]", bool]:
+        """The task in flight for `key`, and whether this call started it."""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task, False
+        task = asyncio.ensure_future(work())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        self.started += 1
+        return task, True
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        task, _ = self.join(key, work)
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+# Feedback and question generation, keyed by (operation, interview id)
+generation_flights = SingleFlight()
@@ -0,0 +1,135 @@
+"""
+Speculative preparation of the next interview turn:
+1. While the candidate answers (and their audio is transcribed), the
+   assistant reply to that answer is built in the background, one entry
+   per interview
+2. Each entry records the interview state it was built from; when the
+   answer arrives it is served only if the state is unchanged and the
+   entry is younger than its TTL, otherwise it is discarded and the reply
+   is built inline
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Speculation(Generic[T]):
+    state: Hashable
+    task: "asyncio.Task[T]"
+    created_at: float
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    # Retrieve the exception so an entry that is never taken doesn't warn
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Speculative turn failed: {task.exception()!r}")
+
+
+class TurnSpeculator:
+    """
+    At most one prepared result per key (interview), for one state of it.
+    The least recently prepared entries are dropped beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Speculation]" = OrderedDict()
+        self.prepared = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.late = 0
+        self.failed = 0
+
+    def _fresh(self, entry: Speculation, state: Hashable) -> bool:
+        return (
+            entry.state == state
+            and self.clock() - entry.created_at < self.ttl_seconds
+        )
+
+    def prepare(
+        self, key: Hashable, state: Hashable, work: Callable[[], Awaitable[T]]
+    ) -> None:
+        """Start `work` for `key` in `state`, unless it is already prepared."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._fresh(entry, state):
+                return
+            self.stale += 1
+            self.discard(key)
+
+        task = asyncio.ensure_future(work())
+        task.add_done_callback(_log_failure)
+        self._entries[key] = Speculation(state, task, self.clock())
+        self.prepared += 1
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            evicted.task.cancel()
+
+    async def take(
+        self, key: Hashable, state: Hashable, timeout: Optional[float] = None
+    ) -> Optional[T]:
+        """
+        The result prepared for `key` in `state` (waiting up to `timeout`
+        for it if still running), or None if there is none, it is stale,
+        late or it failed.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not self._fresh(entry, state):
+            entry.task.cancel()
+            self.stale += 1
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.shield(entry.task), timeout)
+        except asyncio.TimeoutError:
+            entry.task.cancel()
+            self.late += 1
+            return None
+        except Exception:
+            self.failed += 1
+            return None
+        self.hits += 1
+        return result
+
+    def discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "prepared": self.prepared,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "late": self.late,
+            "failed": self.failed,
+        }
+
+
+# Next assistant reply per interview, keyed by interview id
+turn_speculator = TurnSpeculator(
+    settings.SPECULATIVE_TURN_TTL_SECONDS, settings.SPECULATIVE_TURN_MAX_INTERVIEWS
+)
@@ -0,0 +1,187 @@
+"""
+Speech analytics computed locally for every spoken answer:
+1. Acoustic features of the raw waveform: speaking time, pauses, loudness
+   and pitch (vectorized NumPy over short frames)
+2. Delivery metrics that also need the transcript: words per minute and
+   filler words
+3. A one-line speech rate summary for the interview feedback
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE, speech_frames
+
+FRAME_MS = 30
+MIN_PAUSE_MS = 300
+LONG_PAUSE_SECONDS = 1.0
+PITCH_FRAME_MS = 40
+PITCH_MIN_HZ = 75
+PITCH_MAX_HZ = 400
+# Pitch is estimated on at most this many speech frames per answer
+PITCH_MAX_FRAMES = 1500
+
+SLOW_WPM = 110
+FAST_WPM = 160
+
+FILLER_WORDS = {"um", "umm", "uh", "uhm", "er", "erm", "ah", "hmm"}
+FILLER_PHRASES = ["you know", "i mean", "kind of", "sort of"]
+
+
+# -----------------------------
+# 1. Acoustic features
+# -----------------------------
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """(start, end) frame indices of every run of True in `mask`."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)], 1)
+
+
+def _pitch_hz(frames: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Autocorrelation pitch of each voiced frame, all frames at once."""
+    n = frames.shape[1]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames, n=2 * n, axis=1)
+    autocorr = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :n]
+
+    lo = sample_rate // PITCH_MAX_HZ
+    hi = min(sample_rate // PITCH_MIN_HZ, n - 1)
+    lags = lo + np.argmax(autocorr[:, lo:hi], axis=1)
+    strength = autocorr[np.arange(len(frames)), lags] / (autocorr[:, 0] + 1e-12)
+    return sample_rate / lags[strength > 0.3]
+
+
+def acoustic_features(
+    waveform: np.ndarray, sample_rate: int = SAMPLE_RATE
+) -> Dict[str, Optional[float]]:
+    """
+    Speaking time, pauses, loudness and pitch of an answer. Expects the
+    waveform before silence trimming, so pauses keep their real length.
+    """
+    frame_len = sample_rate * FRAME_MS // 1000
+    n_frames = len(waveform) // frame_len
+    features: Dict[str, Optional[float]] = {
+        "duration_seconds": round(len(waveform) / sample_rate, 2),
+        "speaking_seconds": 0.0,
+        "pause_count": 0,
+        "long_pause_count": 0,
+        "mean_pause_seconds": None,
+        "longest_pause_seconds": None,
+        "energy_db_mean": None,
+        "energy_db_std": None,
+        "pitch_hz_mean": None,
+        "pitch_hz_std": None,
+    }
+    if n_frames == 0:
+        return features
+
+    frames = waveform[: n_frames * frame_len].reshape(n_frames, frame_len)
+    speech = speech_frames(frames)
+    if not speech.any():
+        return features
+
+    speech_idx = np.flatnonzero(speech)
+    first, last = speech_idx[0], speech_idx[-1]
+    frame_seconds = FRAME_MS / 1000
+    features["speaking_seconds"] = round((last - first + 1) * frame_seconds, 2)
+
+    # Silent runs between the first and last word
+    silent = _runs(~speech[first : last + 1])
+    pauses = (silent[:, 1] - silent[:, 0]) * frame_seconds
+    pauses = pauses[pauses >= MIN_PAUSE_MS / 1000]
+    if len(pauses):
+        features["pause_count"] = int(len(pauses))
+        features["long_pause_count"] = int((pauses >= LONG_PAUSE_SECONDS).sum())
+        features["mean_pause_seconds"] = round(float(pauses.mean()), 2)
+        features["longest_pause_seconds"] = round(float(pauses.max()), 2)
+
+    rms = np.sqrt(np.mean(frames[speech] ** 2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    features["energy_db_mean"] = round(float(db.mean()), 1)
+    features["energy_db_std"] = round(float(db.std()), 1)
+
+    pitch_len = sample_rate * PITCH_FRAME_MS // 1000
+    n_pitch = len(waveform) // pitch_len
+    pitch_frames = waveform[: n_pitch * pitch_len].reshape(n_pitch, pitch_len)
+    # Map every speech frame to the pitch frame it falls in
+    voiced = np.unique(speech_idx * frame_len // pitch_len)
+    voiced = voiced[voiced < n_pitch]
+    if len(voiced) > PITCH_MAX_FRAMES:
+        voiced = voiced[:: len(voiced) // PITCH_MAX_FRAMES + 1]
+    pitch = _pitch_hz(pitch_frames[voiced], sample_rate) if len(voiced) else []
+    if len(pitch):
+        features["pitch_hz_mean"] = round(float(np.mean(pitch)), 1)
+        features["pitch_hz_std"] = round(float(np.std(pitch)), 1)
+
+    return features
+
+
+# -----------------------------
+# 2. Delivery metrics
+# -----------------------------
+
+
+def count_fillers(text: str) -> Dict[str, int]:
+    words = re.findall(r"[a-z']+", text.lower())
+    counts: Dict[str, int] = {}
+    for word in words:
+        if word in FILLER_WORDS:
+            counts[word] = counts.get(word, 0) + 1
+
+    joined = f" {' '.join(words)} "
+    for phrase in FILLER_PHRASES:
+        found = joined.count(f" {phrase} ")
+        if found:
+            counts[phrase] = found
+    return counts
+
+
+def speech_analytics(features: Dict[str, Optional[float]], text: str) -> dict:
+    """Combine the acoustic features with the transcript of the same answer."""
+    words = len(re.findall(r"[A-Za-z0-9']+", text))
+    fillers = count_fillers(text)
+    speaking = features.get("speaking_seconds") or 0.0
+    return {
+        **features,
+        "word_count": words,
+        "words_per_minute": round(words / speaking * 60, 1) if speaking else None,
+        "filler_count": sum(fillers.values()),
+        "fillers": fillers,
+    }
+
+
+# -----------------------------
+# 3. Feedback summary
+# -----------------------------
+
+
+def summarize_speech_rate(analytics: List[dict]) -> Optional[str]:
+    """
+    Speech rate line for `Feedback.speech_rate` over all spoken answers, or
+    None when no answer has analytics (e.g. typed coding answers).
+    """
+    analytics = [a for a in analytics if a and a.get("speaking_seconds")]
+    if not analytics:
+        return None
+
+    words = sum(a["word_count"] for a in analytics)
+    seconds = sum(a["speaking_seconds"] for a in analytics)
+    wpm = words / seconds * 60
+    if wpm < SLOW_WPM:
+        pace = "Slow"
+    elif wpm > FAST_WPM:
+        pace = "Fast"
+    else:
+        pace = "Moderate"
+
+    long_pauses = sum(a["long_pause_count"] for a in analytics)
+    fillers = sum(a["filler_count"] for a in analytics)
+    return (
+        f"{pace} ({wpm:.0f} words per minute); "
+        f"{long_pauses} pauses longer than {LONG_PAUSE_SECONDS:.0f}s; "
+        f"{fillers} filler words in {words} words"
+    )
@@ -0,0 +1,604 @@
+"""
+Transcription execution:
+1. Run the CPU-bound Whisper transcription off the event loop in a bounded
+   process pool, with back-pressure when the queue is full
+2. Incremental transcription of audio streamed in while the candidate speaks
+3. Micro-batching of short clips that arrive at the same time
+4. Parallel transcription of long answers, cut into chunks at pauses
+5. Content-addressed transcript cache so re-uploads skip decoding entirely
+
+Every finished answer comes back as {"text", "analytics"}, where analytics
+are the local speech metrics from `speech_analytics`; uploads long enough to
+be chunked also keep their stitched, timestamped "segments".
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.audio import (
+    SAMPLE_RATE,
+    StreamingDecoder,
+    decode_upload,
+    find_quiet_split,
+    prepare_waveform,
+    split_at_pauses,
+)
+from app.services.cache import TieredCache, hash_key
+from app.services.speech_analytics import acoustic_features, speech_analytics
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionQueueFull(Exception):
+    """Raised when the transcription pool cannot accept more work."""
+
+
+# -----------------------------
+# 1. Worker process entry points
+# -----------------------------
+
+
+def _worker_report() -> dict:
+    from app.services.asr import asr_registry, process_memory
+    from app.services.audio import vad_stats
+
+    return {
+        "models": asr_registry.stats(),
+        "vad": vad_stats.stats(),
+        "memory": process_memory(),
+    }
+
+
+def _init_worker(torch_threads: int, model_names: List[str], reports) -> None:
+    import torch
+
+    from app.services.asr import asr_registry
+
+    torch.set_num_threads(torch_threads)
+    asr_registry.preload(model_names)
+    reports.put((os.getpid(), _worker_report()))
+
+
+def _run_in_worker(fn, *args):
+    """Run `fn` and report this process's stats alongside the result."""
+    return fn(*args), os.getpid(), _worker_report()
+
+
+def _noop() -> None:
+    return None
+
+
+def _run_transcription(audio_bytes: bytes, initial_prompt: Optional[str]) -> str:
+    from app.services.ai_service import transcribe_audio
+
+    return transcribe_audio(audio_bytes, initial_prompt)
+
+
+def _run_waveform_transcription(
+    waveform: np.ndarray, initial_prompt: Optional[str]
+) -> str:
+    from app.services.ai_service import transcribe_waveform
+
+    return transcribe_waveform(waveform, initial_prompt)
+
+
+def _run_segment_transcription(
+    waveform: np.ndarray, initial_prompt: Optional[str]
+) -> dict:
+    from app.services.ai_service import transcribe_segments
+
+    return transcribe_segments(waveform, initial_prompt)
+
+
+def _run_batch_transcription(
+    waveforms: List[np.ndarray], initial_prompt: Optional[str]
+) -> List[str]:
+    from app.services.ai_service import transcribe_batch
+
+    return transcribe_batch(waveforms, initial_prompt)
+
+
+# -----------------------------
+# 2. Pool
+# -----------------------------
+
+
+class TranscriptionPool:
+    """
+    Bounded executor for transcription jobs.
+
+    At most `workers + queue_depth` jobs are admitted at once; anything beyond
+    that is rejected with `TranscriptionQueueFull` instead of piling up behind
+    the running decodes.
+
+    Models live in the worker processes: each worker reports its model, VAD
+    and memory stats once its initializer has loaded them, and every job
+    returns a fresh report. The latest report per worker is kept for the
+    health endpoint.
+    """
+
+    def __init__(self, workers: int, torch_threads: int, queue_depth: int):
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self.queue_depth = queue_depth
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._worker_stats: Dict[int, dict] = {}
+        self._reports = None
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.queue_depth
+
+    def start(self, wait_until_warm: bool = False) -> None:
+        """
+        Create the worker processes. ProcessPoolExecutor only spawns a worker
+        when a job needs one, so one no-op per worker is submitted right away
+        to run every initializer (and load the models) eagerly. With
+        `wait_until_warm`, block until every worker has reported its models;
+        a worker that fails to load them raises RuntimeError instead.
+        """
+        if self._executor is not None or self.workers <= 0:
+            return
+
+        model_names = list(
+            dict.fromkeys([settings.WHISPER_MODEL, *settings.WHISPER_PRELOAD_MODELS])
+        )
+        # Spawn rather than fork: forking a process that already initialised
+        # torch's thread pools can deadlock the child
+        context = multiprocessing.get_context("spawn")
+        self._reports = context.SimpleQueue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.torch_threads, model_names, self._reports),
+        )
+        warmups = [self._executor.submit(_noop) for _ in range(self.workers)]
+        if wait_until_warm:
+            self._wait_until_warm(warmups)
+
+        logger.info(
+            f"Started transcription pool with {self.workers} workers "
+            f"({self.torch_threads} torch threads each)"
+        )
+
+    def _wait_until_warm(self, warmups: list) -> None:
+        # A worker whose initializer raises dies without reporting, which
+        # breaks the pool: its pending no-ops fail with BrokenProcessPool
+        while len(self._worker_stats) < self.workers:
+            if not self._reports.empty():
+                pid, report = self._reports.get()
+                self._worker_stats[pid] = report
+                continue
+            failed = next(
+                (f for f in warmups if f.done() and f.exception() is not None), None
+            )
+            if failed is not None:
+                self.shutdown()
+                raise RuntimeError(
+                    "A transcription worker failed to load its models"
+                ) from failed.exception()
+            time.sleep(0.05)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def check_capacity(self) -> None:
+        """Raise `TranscriptionQueueFull` now rather than after costly prep work."""
+        if self._in_flight >= self.capacity:
+            raise TranscriptionQueueFull(
+                f"Transcription queue is full ({self._in_flight} jobs in flight)"
+            )
+
+    async def run(self, fn, *args):
+        self.check_capacity()
+        self.start()
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            # Without worker processes the default thread pool still keeps the
+            # event loop responsive
+            result, pid, report = await loop.run_in_executor(
+                self._executor, _run_in_worker, fn, *args
+            )
+            self._worker_stats[pid] = report
+            return result
+        finally:
+            self._in_flight -= 1
+
+    async def transcribe(
+        self, audio_bytes: bytes, initial_prompt: Optional[str] = None
+    ) -> str:
+        return await self.run(_run_transcription, audio_bytes, initial_prompt)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+        }
+
+    def worker_stats(self) -> List[dict]:
+        while self._reports is not None and not self._reports.empty():
+            pid, report = self._reports.get()
+            self._worker_stats.setdefault(pid, report)
+        return [{"pid": pid, **report} for pid, report in self._worker_stats.items()]
+
+
+transcription_pool = TranscriptionPool(
+    workers=settings.TRANSCRIBE_WORKERS,
+    torch_threads=settings.TRANSCRIBE_TORCH_THREADS,
+    queue_depth=settings.TRANSCRIBE_QUEUE_DEPTH,
+)
+
+
+# -----------------------------
+# 3. Streaming transcription
+# -----------------------------
+
+
+class AnswerTooLarge(Exception):
+    """Raised when a streamed answer exceeds the configured size limit."""
+
+
+class StreamingTranscriber:
+    """
+    Decodes the encoded audio frames of one answer as they arrive and
+    re-transcribes only the not yet committed tail.
+
+    Browser recorders emit container fragments that can't be decoded on their
+    own, so a single ffmpeg process (`StreamingDecoder`) decodes the stream
+    incrementally and only the last `window_seconds` of audio go through
+    Whisper. Once the tail grows past the window it is cut at the quietest
+    point of its last `SPLIT_SEARCH_SECONDS`, so words aren't split, and the
+    text before the cut is committed and never decoded again.
+    """
+
+    SPLIT_SEARCH_SECONDS = 3.0
+
+    def __init__(
+        self,
+        pool: TranscriptionPool,
+        initial_prompt: Optional[str] = None,
+        window_seconds: float = settings.STREAMING_WINDOW_SECONDS,
+        partial_interval: float = settings.STREAMING_PARTIAL_INTERVAL_SECONDS,
+        max_bytes: Optional[int] = None,
+    ):
+        self._pool = pool
+        self._initial_prompt = initial_prompt
+        self._window = int(window_seconds * SAMPLE_RATE)
+        self._split_search = int(
+            min(self.SPLIT_SEARCH_SECONDS, window_seconds / 2) * SAMPLE_RATE
+        )
+        self._partial_interval = partial_interval
+        self._max_bytes = max_bytes or settings.STREAMING_MAX_ANSWER_BYTES
+        self._decoder = StreamingDecoder()
+        self._received_bytes = 0
+        self._transcribed_samples = 0
+        self._committed_samples = 0
+        self._committed_text: List[str] = []
+        self._last_partial_at = 0.0
+
+    async def feed(self, chunk: bytes) -> None:
+        self._received_bytes += len(chunk)
+        if self._received_bytes > self._max_bytes:
+            raise AnswerTooLarge(
+                f"Answer exceeds the {self._max_bytes} byte streaming limit"
+            )
+        await asyncio.to_thread(self._decoder.write, chunk)
+
+    def partial_due(self) -> bool:
+        return (
+            self._decoder.sample_count > self._transcribed_samples
+            and time.monotonic() - self._last_partial_at >= self._partial_interval
+        )
+
+    async def partial(self) -> str:
+        self._last_partial_at = time.monotonic()
+        return await self._transcribe(self._decoder.samples(self._committed_samples))
+
+    async def finalize(self) -> dict:
+        """Transcribe what is left and return {"text", "analytics"}."""
+        pending = await asyncio.to_thread(
+            self._decoder.close, self._committed_samples
+        )
+        text = await self._transcribe(pending)
+        features = await asyncio.to_thread(
+            acoustic_features, self._decoder.samples()
+        )
+        return {"text": text, "analytics": speech_analytics(features, text)}
+
+    def close(self) -> None:
+        self._decoder.kill()
+
+    async def _transcribe(self, pending: np.ndarray) -> str:
+        self._transcribed_samples = self._committed_samples + len(pending)
+
+        while len(pending) > self._window:
+            split = find_quiet_split(
+                pending, self._window - self._split_search, self._window
+            )
+            text = await self._pool.run(
+                _run_waveform_transcription, pending[:split], self._initial_prompt
+            )
+            self._committed_text.append(text.strip())
+            self._committed_samples += split
+            pending = pending[split:]
+
+        tail = ""
+        if len(pending):
+            tail = await self._pool.run(
+                _run_waveform_transcription, pending, self._initial_prompt
+            )
+        return " ".join(t for t in [*self._committed_text, tail.strip()] if t)
+
+
+# -----------------------------
+# 4. Micro-batching
+# -----------------------------
+
+# Whisper's encoder works on fixed 30 second windows; only clips that fit in
+# one window can share a batch
+BATCH_CLIP_SAMPLES = 30 * SAMPLE_RATE
+
+
+class TranscriptionBatcher:
+    """
+    Gathers clips submitted within `max_wait_ms` of each other (up to
+    `max_batch_size`) and runs them through the model as a single batch.
+
+    Whisper takes one prompt per batch, so clips are grouped by the prompt
+    they are conditioned on; coding interviews share the UMPIRE step prompts
+    and batch well, one-off behavioral questions mostly run alone. A clip
+    that ends up alone takes the regular single-clip path, with its
+    timestamped decoding and quality checks.
+    """
+
+    def __init__(self, pool: TranscriptionPool, max_batch_size: int, max_wait_ms: int):
+        self._pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[Optional[str], List[Tuple[np.ndarray, asyncio.Future]]] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches_run = 0
+        self.clips_batched = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    async def submit(
+        self, waveform: np.ndarray, initial_prompt: Optional[str] = None
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.setdefault(initial_prompt, [])
+        group.append((waveform, future))
+
+        if len(group) >= self.max_batch_size:
+            self._flush(initial_prompt)
+        elif initial_prompt not in self._timers:
+            self._timers[initial_prompt] = loop.call_later(
+                self.max_wait, self._flush, initial_prompt
+            )
+        return await future
+
+    def _flush(self, initial_prompt: Optional[str]) -> None:
+        timer = self._timers.pop(initial_prompt, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(initial_prompt, [])
+        if batch:
+            task = asyncio.create_task(self._run(batch, initial_prompt))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(
+        self,
+        batch: List[Tuple[np.ndarray, asyncio.Future]],
+        initial_prompt: Optional[str],
+    ) -> None:
+        try:
+            if len(batch) == 1:
+                texts = [
+                    await self._pool.run(
+                        _run_waveform_transcription, batch[0][0], initial_prompt
+                    )
+                ]
+            else:
+                texts = await self._pool.run(
+                    _run_batch_transcription,
+                    [waveform for waveform, _ in batch],
+                    initial_prompt,
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(batch) > 1:
+            self.batches_run += 1
+            self.clips_batched += len(batch)
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "batches_run": self.batches_run,
+            "clips_batched": self.clips_batched,
+        }
+
+
+transcription_batcher = TranscriptionBatcher(
+    transcription_pool,
+    max_batch_size=settings.TRANSCRIBE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.TRANSCRIBE_BATCH_MAX_WAIT_MS,
+)
+
+
+# -----------------------------
+# 5. Parallel chunked transcription
+# -----------------------------
+
+
+async def transcribe_chunked(
+    pool: TranscriptionPool,
+    waveform: np.ndarray,
+    initial_prompt: Optional[str] = None,
+) -> dict:
+    """
+    Transcribe a long answer as pause-aligned chunks of at most
+    TRANSCRIBE_CHUNK_SECONDS, run concurrently on the pool's workers, and
+    stitch them back in order. Returns {"text", "segments"} with segment
+    times relative to the whole waveform.
+
+    At most one chunk per worker is in flight, so a single long answer
+    can't fill the queue other requests are waiting in. If any chunk fails
+    (e.g. TranscriptionQueueFull), the rest are cancelled.
+    """
+    bounds = split_at_pauses(
+        waveform, int(settings.TRANSCRIBE_CHUNK_SECONDS * SAMPLE_RATE)
+    )
+    limit = asyncio.Semaphore(max(pool.workers, 1))
+
+    async def run_chunk(start: int, end: int) -> dict:
+        async with limit:
+            return await pool.run(
+                _run_segment_transcription, waveform[start:end], initial_prompt
+            )
+
+    tasks = [asyncio.ensure_future(run_chunk(s, e)) for s, e in bounds]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # The answer fails as a whole; don't leave its other chunks queued
+        for task in tasks:
+            task.cancel()
+        raise
+
+    segments = []
+    for (start, _), result in zip(bounds, results):
+        offset = start / SAMPLE_RATE
+        segments.extend(
+            {
+                "start": segment["start"] + offset,
+                "end": segment["end"] + offset,
+                "text": segment["text"],
+            }
+            for segment in result["segments"]
+        )
+    texts = (result["text"].strip() for result in results)
+    return {"text": " ".join(t for t in texts if t), "segments": segments}
+
+
+# -----------------------------
+# 6. Transcript cache
+# -----------------------------
+
+transcript_cache = TieredCache(
+    maxsize=settings.TRANSCRIPT_CACHE_SIZE,
+    ttl=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+    sqlite_path=settings.TRANSCRIPT_CACHE_SQLITE_PATH,
+    sqlite_max_rows=settings.TRANSCRIPT_CACHE_SQLITE_MAX_ROWS,
+)
+
+
+# Bump when the shape of cached results changes
+TRANSCRIPT_CACHE_VERSION = 3
+
+
+def transcript_cache_key(audio_bytes: bytes, initial_prompt: Optional[str]) -> str:
+    # Anything that can change the text for the same bytes belongs in the key
+    return hash_key(
+        TRANSCRIPT_CACHE_VERSION,
+        audio_bytes,
+        initial_prompt,
+        settings.ASR_BACKEND,
+        settings.WHISPER_MODEL,
+        settings.WHISPER_LANGUAGE,
+        settings.WHISPER_BEAM_SIZE,
+        settings.WHISPER_TEMPERATURES,
+        settings.TRANSCRIBE_VAD_ENABLED,
+        settings.TRANSCRIBE_VAD_MAX_PAUSE_MS,
+    )
+
+
+async def transcribe(
+    audio_bytes: bytes,
+    initial_prompt: Optional[str] = None,
+    content_type: Optional[str] = None,
+) -> dict:
+    """
+    Transcribe one uploaded answer off the event loop and return
+    {"text", "analytics", "segments"}; segments (with times in the trimmed
+    answer) come from the chunked path, and are None for shorter answers.
+
+    Identical re-uploads are answered from the transcript cache. Otherwise,
+    short clips (after silence trimming) go through the batcher so concurrent
+    answers share an encoder pass; anything longer than one Whisper window is
+    cut into chunks that are transcribed in parallel.
+
+    16 kHz mono PCM/WAV uploads (by `content_type`) are read without ffmpeg.
+    """
+    key = transcript_cache_key(audio_bytes, initial_prompt)
+    cached = transcript_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await _transcribe_uncached(audio_bytes, initial_prompt, content_type)
+    transcript_cache.set(key, result)
+    return result
+
+
+def _decode_and_analyze(
+    audio_bytes: bytes, content_type: Optional[str]
+) -> Tuple[np.ndarray, dict]:
+    # Acoustic features need the untrimmed audio, so pauses keep their length
+    waveform = decode_upload(audio_bytes, content_type)
+    return prepare_waveform(waveform), acoustic_features(waveform)
+
+
+async def _transcribe_uncached(
+    audio_bytes: bytes,
+    initial_prompt: Optional[str],
+    content_type: Optional[str] = None,
+) -> dict:
+    # Decoding happens in this process so long answers can be split across
+    # workers; don't spend it on audio the pool would turn away anyway
+    transcription_pool.check_capacity()
+    waveform, features = await asyncio.to_thread(
+        _decode_and_analyze, audio_bytes, content_type
+    )
+    segments = None
+    if len(waveform) > BATCH_CLIP_SAMPLES:
+        chunked = await transcribe_chunked(
+            transcription_pool, waveform, initial_prompt
+        )
+        text, segments = chunked["text"], chunked["segments"]
+    elif transcription_batcher.enabled:
+        text = await transcription_batcher.submit(waveform, initial_prompt)
+    else:
+        text = await transcription_pool.run(
+            _run_waveform_transcription, waveform, initial_prompt
+        )
+    return {
+        "text": text,
+        "analytics": speech_analytics(features, text),
+        "segments": segments,
+    }
@@ -9,6 +9,9 @@ os.environ["ENVIRONMENT"] = "testing"
 
 from app.main import app
 from app.api.deps import get_session
+from app.services import ai_service
+from app.services.jobs import DatabaseJobStore, answer_job_queue, job_queue
+from app.services.llm import FakeLLMProvider
 
 
 # Create test engine
@@ -19,6 +22,20 @@ test_engine = create_engine(
 )
 
 
+@pytest.fixture(autouse=True)
+def fake_llm_provider(monkeypatch):
+    """Keep tests (and the background jobs they start) off the real LLM API"""
+    provider = FakeLLMProvider()
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+    return provider
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_caller(monkeypatch, fake_llm_provider):
+    """Start every test with a closed circuit breaker and no latency history"""
+    monkeypatch.setattr(ai_service, "llm_caller", ai_service.new_llm_caller())
+
+
 @pytest.fixture(name="session", scope="function")
 def session_fixture():
     """Create a fresh test database session for each test"""
@@ -33,7 +50,7 @@ def session_fixture():
 
 
 @pytest.fixture(name="client", scope="function")
-def client_fixture(session: Session):
+def client_fixture(session: Session, monkeypatch):
     """Create a test client with database session override"""
 
     def get_session_override():
@@ -41,6 +58,14 @@ def client_fixture(session: Session):
 
     app.dependency_overrides[get_session] = get_session_override
 
+    # Background jobs open their own sessions on the test database
+    def job_session():
+        return Session(test_engine)
+
+    for queue in (job_queue, answer_job_queue):
+        monkeypatch.setattr(queue, "session_factory", job_session)
+        monkeypatch.setattr(queue, "store", DatabaseJobStore(job_session))
+
     with TestClient(app) as client:
         yield client
 
@@ -0,0 +1,288 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.core.config import settings
+from app.services import ai_service
+from app.services import llm
+from app.services.llm import FakeLLMProvider, GeminiProvider
+from app.services.ai_service import (
+    LLMTimeout,
+    generate_behavioral_questions,
+    generate_text,
+)
+from app.services.cache import TieredCache
+from app.services.json_stream import JSONObjectStream
+from app.services.llm_resilience import CircuitBreaker
+from app.services.question_bank import fallback_questions
+
+
+class FakeGeminiModel:
+    """Records how many generations run at once"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt, request_options=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return SimpleNamespace(text=f"echo: {prompt}")
+
+
+def test_gemini_model_is_built_once(monkeypatch):
+    """Test that every call reuses the worker's model and its connection"""
+    built = []
+    monkeypatch.setattr(
+        llm.genai, "GenerativeModel", lambda name: built.append(name) or name
+    )
+    provider = GeminiProvider(settings.GEMINI_MODEL)
+
+    assert provider.model is provider.model
+    assert built == [settings.GEMINI_MODEL]
+
+
+def test_generate_text_limits_concurrency(monkeypatch):
+    """Test that at most LLM_MAX_CONCURRENCY generations run at once"""
+    model = FakeGeminiModel()
+    monkeypatch.setattr(ai_service, "llm_provider", GeminiProvider("test", model))
+    monkeypatch.setattr(ai_service, "_llm_slots", asyncio.Semaphore(2))
+
+    async def scenario():
+        return await asyncio.gather(*(generate_text(str(i)) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [f"echo: {i}" for i in range(6)]
+    assert model.peak == 2
+
+
+def test_generate_text_times_out(monkeypatch):
+    """Test that a slow LLM fails with LLMTimeout instead of hanging"""
+    slow = GeminiProvider("test", FakeGeminiModel(delay=1))
+    monkeypatch.setattr(ai_service, "llm_provider", slow)
+    monkeypatch.setattr(ai_service, "_llm_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(settings, "LLM_TIMEOUT_SECONDS", 0.01)
+
+    with pytest.raises(LLMTimeout):
+        asyncio.run(generate_text("slow"))
+
+
+def test_generated_questions_are_cached_per_resume(monkeypatch):
+    """Test that repeat generations cost no LLM call unless forced"""
+    model = FakeGeminiModel(delay=0)
+    calls = []
+
+    async def numbered(prompt, request_options=None):
+        calls.append(prompt)
+        return SimpleNamespace(text="1. First?\n2. Second?")
+
+    model.generate_content_async = numbered
+    monkeypatch.setattr(ai_service, "llm_provider", GeminiProvider("test", model))
+    monkeypatch.setattr(ai_service, "_llm_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(ai_service, "question_cache", TieredCache(maxsize=8, ttl=60))
+
+    async def scenario():
+        first = await generate_behavioral_questions("resume", 2)
+        repeat = await generate_behavioral_questions("resume", 2)
+        other_count = await generate_behavioral_questions("resume", 3)
+        forced = await generate_behavioral_questions("resume", 2, force_refresh=True)
+        return first, repeat, other_count, forced
+
+    first, repeat, other_count, forced = asyncio.run(scenario())
+    assert first == repeat == forced == ["First?", "Second?"]
+    assert len(calls) == 3
+
+
+def test_json_object_stream_reports_members_as_they_complete():
+    """Test that each member is reported as soon as it is complete"""
+    text = (
+        '```json\n{"tone_summary": "Calm, \\"composed\\", {clear}",\n'
+        ' "scores": [1, 2], "overall_feedback": "Good}"}\n```'
+    )
+    parser = JSONObjectStream()
+    seen = []
+    for i, ch in enumerate(text):
+        for key, value in parser.feed(ch):
+            seen.append((key, value, i))
+
+    assert [(key, value) for key, value, _ in seen] == [
+        ("tone_summary", 'Calm, "composed", {clear}'),
+        ("scores", [1, 2]),
+        ("overall_feedback", "Good}"),
+    ]
+    # The first member is out long before the object is finished
+    assert seen[0][2] == text.index(",\n")
+    assert parser.complete
+    assert parser.members["overall_feedback"] == "Good}"
+
+
+def test_llm_caller_retries_transient_errors(monkeypatch):
+    """Test that transient errors are retried and others raised at once"""
+    monkeypatch.setattr(ai_service, "llm_provider", GeminiProvider("test"))
+    caller = ai_service.new_llm_caller()
+    attempts = []
+
+    async def flaky():
+        attempts.append("flaky")
+        if len(attempts) < 3:
+            raise google_exceptions.ServiceUnavailable("overloaded")
+        return "ok"
+
+    async def invalid():
+        attempts.append("invalid")
+        raise google_exceptions.InvalidArgument("bad prompt")
+
+    assert asyncio.run(caller.call(flaky)) == "ok"
+    assert caller.retries == 2
+    assert caller.breaker.failures == 0
+
+    attempts.clear()
+    with pytest.raises(google_exceptions.InvalidArgument):
+        asyncio.run(caller.call(invalid))
+    assert attempts == ["invalid"]
+
+
+def test_llm_caller_hedges_slow_attempts():
+    """Test that a duplicate request is sent past the p95 and the first wins"""
+    caller = ai_service.new_llm_caller()
+    caller.hedge_min_delay_seconds = 0.01
+    for _ in range(20):
+        caller.latency.record(0.01)
+    delays = [1.0, 0.0]
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return f"slept {delay}"
+
+    started = time.perf_counter()
+    assert asyncio.run(caller.call(call)) == "slept 0.0"
+    assert time.perf_counter() - started < 0.5
+    assert caller.hedges == 1
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test that the breaker fails fast when open and lets one trial through"""
+    now = [0.0]
+    breaker = CircuitBreaker(2, reset_seconds=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+
+def test_circuit_breaker_trial_ends_on_errors_and_cancellation():
+    """Test that a half-open trial that fails oddly or is cancelled ends"""
+    now = [0.0]
+    caller = ai_service.new_llm_caller()
+    caller.breaker = CircuitBreaker(1, reset_seconds=10, clock=lambda: now[0])
+    caller.attempts = 1
+
+    async def invalid():
+        raise ValueError("bad request")
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        # Non-transient error: the provider is reachable, so the circuit closes
+        caller.breaker.record_failure()
+        now[0] += 10
+        with pytest.raises(ValueError):
+            await caller.call(invalid)
+        assert caller.breaker.state == "closed"
+
+        # Cancelled trial: still half open, and the next call is let through
+        caller.breaker.record_failure()
+        now[0] += 10
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(caller.call(hang, hedge=False), 0.01)
+        assert caller.breaker.state == "half_open"
+        return await caller.call(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert caller.breaker.state == "closed"
+
+def test_questions_fall_back_while_gemini_is_unavailable(monkeypatch):
+    """Test that question generation uses the fallback bank and skips the cache"""
+    calls = []
+
+    class FailingModel:
+        async def generate_content_async(self, prompt, request_options=None):
+            calls.append(prompt)
+            raise google_exceptions.ServiceUnavailable("overloaded")
+
+    failing = GeminiProvider("test", FailingModel())
+    monkeypatch.setattr(ai_service, "llm_provider", failing)
+    monkeypatch.setattr(ai_service, "question_cache", TieredCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(ai_service, "llm_caller", ai_service.new_llm_caller())
+    monkeypatch.setattr(ai_service.llm_caller.breaker, "reset_seconds", 60)
+
+    first = asyncio.run(generate_behavioral_questions("resume", 3))
+    assert first == fallback_questions("resume", 3)
+    assert len(calls) == 3
+    assert ai_service.llm_caller.breaker.state == "open"
+
+    # Open circuit: no call at all, and nothing was cached
+    again = asyncio.run(generate_behavioral_questions("resume", 3))
+    assert again == first
+    assert len(calls) == 3
+    assert ai_service.question_cache.stats()["size"] == 0
+
+
+def test_fake_llm_provider_is_deterministic():
+    """Test that the fake provider's latencies and outputs repeat per seed"""
+    first = FakeLLMProvider(latency_median=0.5, latency_sigma=0.4, seed=7)
+    second = FakeLLMProvider(latency_median=0.5, latency_sigma=0.4, seed=7)
+    assert [first.latency() for _ in range(5)] == [
+        second.latency() for _ in range(5)
+    ]
+
+    canned = FakeLLMProvider(responses={"conflict": "Canned answer"})
+    assert asyncio.run(canned.generate("a conflict story", 1)) == "Canned answer"
+
+    with pytest.raises(ValueError):
+        llm.create_llm_provider("nope")
+
+
+def test_interview_flow_runs_on_the_fake_provider(monkeypatch):
+    """Test that questions and streamed feedback work without a real LLM"""
+    provider = FakeLLMProvider(chunk_chars=5)
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+    monkeypatch.setattr(ai_service, "question_cache", TieredCache(maxsize=8, ttl=60))
+
+    async def scenario():
+        questions = await generate_behavioral_questions("resume", 3)
+        fields = [
+            field
+            async for field in ai_service.stream_interview_feedback(
+                ["My answer"], "Moderate"
+            )
+        ]
+        return questions, fields
+
+    questions, fields = asyncio.run(scenario())
+    assert len(questions) == 3
+    assert fields == [
+        ("speech_rate", "Moderate"),
+        ("tone_summary", "Fake tone_summary."),
+        ("overall_feedback", "Fake overall_feedback."),
+    ]
+    assert provider.calls == 2
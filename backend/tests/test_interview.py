@@ -0,0 +1,629 @@
+import asyncio
+import io
+import time
+import uuid
+import wave
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api.routes import interview as interview_routes
+from app.api.routes.interview import (
+    generate_prompt_for_step,
+    save_behavioral_turn,
+    save_coding_turn,
+    transcription_prompt,
+)
+from app.core.config import settings
+from app.main import app
+from app.models.feedback import Feedback
+from app.models.interview import Interview
+from app.services import ai_service
+from app.models.message import Message
+from app.services.llm import FakeLLMProvider, GeminiProvider
+from app.services import audio, transcription
+from app.services.prompt_budget import count_tokens
+from app.services.speculation import TurnSpeculator
+from app.services.transcription import transcription_pool
+from tests.test_questions import parse_sse
+
+
+class FakeStreamingDecoder:
+    """One silent sample per received byte"""
+
+    def __init__(self):
+        self.received = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.received += len(chunk)
+
+    @property
+    def sample_count(self) -> int:
+        return self.received
+
+    def samples(self, start: int = 0) -> np.ndarray:
+        return np.zeros(self.received - start, dtype=np.float32)
+
+    def close(self, start: int = 0) -> np.ndarray:
+        return self.samples(start)
+
+    def kill(self) -> None:
+        pass
+
+
+@pytest.fixture(name="fake_transcription")
+def fake_transcription_fixture(monkeypatch):
+    """Run transcription in-process and skip ffmpeg/Whisper entirely"""
+    monkeypatch.setattr(transcription_pool, "workers", 0)
+    monkeypatch.setattr(transcription, "StreamingDecoder", FakeStreamingDecoder)
+    monkeypatch.setattr(
+        transcription,
+        "decode_upload",
+        lambda audio, content_type=None: np.zeros(len(audio), dtype=np.float32),
+    )
+    monkeypatch.setattr(
+        transcription,
+        "_run_waveform_transcription",
+        lambda waveform, initial_prompt: f"{len(waveform)} samples",
+    )
+
+
+class RecordingLLM(FakeLLMProvider):
+    """Fake LLM that keeps the prompts it was sent"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def respond(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return super().respond(prompt)
+
+
+def silent_wav(frames: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x00\x00" * frames)
+    return buffer.getvalue()
+
+
+def create_interview_with_questions(client: TestClient) -> tuple[str, dict]:
+    user_data = {
+        "email": "candidate@example.com",
+        "username": "candidate",
+        "password": "candidatepassword123",
+    }
+    client.post("/api/v1/auth/register", json=user_data)
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": user_data["email"], "password": user_data["password"]},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    interview = client.post(
+        "/api/v1/interviews/",
+        json={"title": "Mock", "context": "resume", "interview_type": "behavioral"},
+        headers=headers,
+    ).json()
+    for description in ["Tell me about yourself.", "Describe a conflict."]:
+        client.post(
+            "/api/v1/questions/",
+            json={
+                "description": description,
+                "type": "behavioral",
+                "interview_id": interview["id"],
+            },
+            headers=headers,
+        )
+    return token, interview
+
+
+def test_stream_audio_chat(client: TestClient, fake_transcription):
+    """Test that streamed audio yields partials and saves the turn"""
+    token, interview = create_interview_with_questions(client)
+
+    with client.websocket_connect(
+        f"/api/v1/interviews/{interview['id']}/chat/stream?token={token}"
+    ) as websocket:
+        websocket.send_bytes(b"\x00" * 1600)
+        partial = websocket.receive_json()
+        assert partial == {"type": "partial", "text": "1600 samples"}
+
+        websocket.send_bytes(b"\x00" * 1600)
+        websocket.send_text("end")
+        final = websocket.receive_json()
+
+    assert final["type"] == "final"
+    user_msg, ai_msg = final["messages"]
+    assert user_msg["role"] == "user"
+    assert user_msg["content"] == "3200 samples"
+    assert ai_msg["role"] == "assistant"
+    assert ai_msg["content"] == "Thanks, that helps. Describe a conflict."
+
+
+def test_stream_audio_chat_rejects_oversized_answer(
+    client: TestClient, fake_transcription, monkeypatch
+):
+    """Test that an answer over the size limit closes the socket with 1009"""
+    token, interview = create_interview_with_questions(client)
+    monkeypatch.setattr(settings, "STREAMING_MAX_ANSWER_BYTES", 1000)
+
+    with client.websocket_connect(
+        f"/api/v1/interviews/{interview['id']}/chat/stream?token={token}"
+    ) as websocket:
+        websocket.send_bytes(b"\x00" * 1001)
+        assert websocket.receive_json()["type"] == "error"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert closed.value.code == 1009
+
+
+def test_stream_audio_chat_rejects_undecodable_audio(
+    client: TestClient, fake_transcription, monkeypatch
+):
+    """Test that ffmpeg failing on streamed audio closes the socket with 1003"""
+    token, interview = create_interview_with_questions(client)
+
+    def broken_pipe(self, chunk):
+        raise audio.AudioDecodeError("Failed to decode streamed audio")
+
+    monkeypatch.setattr(FakeStreamingDecoder, "write", broken_pipe)
+
+    with client.websocket_connect(
+        f"/api/v1/interviews/{interview['id']}/chat/stream?token={token}"
+    ) as websocket:
+        websocket.send_bytes(b"not audio")
+        error = websocket.receive_json()
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert error == {"type": "error", "detail": "Failed to decode streamed audio"}
+    assert closed.value.code == 1003
+
+
+def test_audio_chat_reads_wav_uploads_without_ffmpeg(
+    client: TestClient, monkeypatch
+):
+    """Test that a 16 kHz mono WAV upload takes the PCM fast path"""
+    token, interview = create_interview_with_questions(client)
+    monkeypatch.setattr(transcription_pool, "workers", 0)
+    monkeypatch.setattr(audio, "decode_audio", lambda audio_bytes: pytest.fail())
+    monkeypatch.setattr(
+        transcription,
+        "_run_waveform_transcription",
+        lambda waveform, initial_prompt: f"{len(waveform)} samples",
+    )
+
+    response = client.post(
+        f"/api/v1/interviews/{interview['id']}/chat",
+        files={"file": ("answer.wav", silent_wav(1600), "audio/wav")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()[0]["content"] == "1600 samples"
+
+
+def test_stream_audio_chat_rejects_invalid_token(client: TestClient):
+    """Test that the stream refuses connections without a valid token"""
+    _, interview = create_interview_with_questions(client)
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            f"/api/v1/interviews/{interview['id']}/chat/stream?token=invalid"
+        ) as websocket:
+            websocket.receive_json()
+
+
+def test_transcription_prompt_follows_interview_progress(
+    client: TestClient, session: Session
+):
+    """Test that the decoder is primed with the question being answered"""
+    _, interview = create_interview_with_questions(client)
+    behavioral = session.get(Interview, uuid.UUID(interview["id"]))
+
+    assert transcription_prompt(session, behavioral) == "Tell me about yourself."
+    save_behavioral_turn(session, behavioral.id, "My answer")
+    assert transcription_prompt(session, behavioral) == "Describe a conflict."
+    save_behavioral_turn(session, behavioral.id, "Another answer")
+    assert transcription_prompt(session, behavioral) is None
+
+    coding = Interview(
+        title="Coding",
+        context="Two sum",
+        interview_type="coding",
+        user_id=behavioral.user_id,
+    )
+    session.add(coding)
+    session.commit()
+    assert transcription_prompt(session, coding) == generate_prompt_for_step(
+        "Understand"
+    )
+    save_coding_turn(session, coding.id, "Clarifying questions")
+    assert transcription_prompt(session, coding) == generate_prompt_for_step("Match")
+
+
+def test_feedback_speech_rate_comes_from_measured_audio(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that Gemini isn't asked to guess the speech rate of spoken answers"""
+    token, interview = create_interview_with_questions(client)
+    analytics = {
+        "speaking_seconds": 60.0,
+        "word_count": 140,
+        "long_pause_count": 2,
+        "filler_count": 3,
+    }
+    save_behavioral_turn(session, uuid.UUID(interview["id"]), "My answer", analytics)
+
+    calls = []
+
+    async def fake_feedback(user_responses, speech_rate=None, answer_notes=None):
+        calls.append(speech_rate)
+        return {
+            "tone_summary": "Calm",
+            "speech_rate": speech_rate,
+            "overall_feedback": "Good",
+        }
+
+    monkeypatch.setattr(interview_routes, "generate_interview_feedback", fake_feedback)
+    response = client.post(
+        f"/api/v1/interviews/{interview['id']}/feedback",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert calls == [
+        "Moderate (140 words per minute); 2 pauses longer than 1s; "
+        "3 filler words in 140 words"
+    ]
+    assert response.json()["speech_rate"] == calls[0]
+
+
+def test_stream_feedback_sends_fields_then_saves(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that feedback fields stream as they complete and the row is saved"""
+    token, interview = create_interview_with_questions(client)
+    analytics = {
+        "speaking_seconds": 60.0,
+        "word_count": 140,
+        "long_pause_count": 0,
+        "filler_count": 0,
+    }
+    save_behavioral_turn(session, uuid.UUID(interview["id"]), "My answer", analytics)
+
+    text = '{"tone_summary": "Calm", "overall_feedback": "Clear, concise answers"}'
+
+    class FakeGeminiModel:
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            if not stream:
+                notes = '{"tone": "Calm", "feedback": "Clear."}'
+                return SimpleNamespace(text=notes)
+
+            async def chunks():
+                for i in range(0, len(text), 5):
+                    yield SimpleNamespace(parts=[True], text=text[i : i + 5])
+
+            return chunks()
+
+    provider = GeminiProvider("test", FakeGeminiModel())
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+    url = f"/api/v1/interviews/{interview['id']}/feedback/stream"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post(url, headers=headers)
+
+    assert response.status_code == 200
+    events = parse_sse(response.text)
+    speech_rate = (
+        "Moderate (140 words per minute); 0 pauses longer than 1s; "
+        "0 filler words in 140 words"
+    )
+    assert events[:3] == [
+        ("field", {"field": "speech_rate", "value": speech_rate}),
+        ("field", {"field": "tone_summary", "value": "Calm"}),
+        ("field", {"field": "overall_feedback", "value": "Clear, concise answers"}),
+    ]
+    assert events[3][0] == "feedback"
+    assert events[3][1]["overall_feedback"] == "Clear, concise answers"
+    assert session.exec(select(Feedback)).one().speech_rate == speech_rate
+
+    # A second request replays the saved feedback
+    replay = parse_sse(client.post(url, headers=headers).text)
+    fields = {data["field"]: data["value"] for _, data in events[:3]}
+    assert {data["field"]: data["value"] for _, data in replay[:3]} == fields
+    assert replay[3] == events[3]
+
+
+def test_concurrent_feedback_requests_share_one_generation(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that duplicate feedback requests make one Gemini call and one row"""
+    token, interview = create_interview_with_questions(client)
+    save_behavioral_turn(session, uuid.UUID(interview["id"]), "My answer")
+
+    calls = []
+
+    async def fake_feedback(user_responses, speech_rate=None, answer_notes=None):
+        calls.append(user_responses)
+        await asyncio.sleep(0.05)
+        return {"tone_summary": "Calm", "speech_rate": "", "overall_feedback": "Good"}
+
+    monkeypatch.setattr(interview_routes, "generate_interview_feedback", fake_feedback)
+
+    async def post_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            return await asyncio.gather(
+                *[
+                    ac.post(
+                        f"/api/v1/interviews/{interview['id']}/feedback",
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                    for _ in range(2)
+                ]
+            )
+
+    responses = asyncio.run(post_twice())
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert len(calls) == 1
+    assert len(session.exec(select(Feedback)).all()) == 1
+
+
+def test_streamed_and_blocking_feedback_share_one_generation(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that feedback streams join the flight blocking requests use"""
+    token, interview = create_interview_with_questions(client)
+    save_behavioral_turn(session, uuid.UUID(interview["id"]), "My answer")
+    monkeypatch.setattr(settings, "FEEDBACK_PER_ANSWER", False)
+
+    calls = []
+
+    async def fake_stream(user_responses, speech_rate=None, answer_notes=None):
+        calls.append(user_responses)
+        for field, value in [("tone_summary", "Calm"), ("overall_feedback", "Good")]:
+            await asyncio.sleep(0.03)
+            yield field, value
+
+    async def fake_feedback(user_responses, speech_rate=None, answer_notes=None):
+        calls.append(user_responses)
+        await asyncio.sleep(0.06)
+        return {"tone_summary": "Calm", "speech_rate": "", "overall_feedback": "Good"}
+
+    # Whichever request starts first runs the generation
+    monkeypatch.setattr(interview_routes, "stream_interview_feedback", fake_stream)
+    monkeypatch.setattr(interview_routes, "generate_interview_feedback", fake_feedback)
+    url = f"/api/v1/interviews/{interview['id']}/feedback"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            return await asyncio.gather(
+                ac.post(f"{url}/stream", headers=headers),
+                ac.post(f"{url}/stream", headers=headers),
+                ac.post(url, headers=headers),
+            )
+
+    first, second, blocking = asyncio.run(post_all())
+
+    assert len(calls) == 1
+    assert len(session.exec(select(Feedback)).all()) == 1
+    feedback = blocking.json()
+    assert feedback["overall_feedback"] == "Good"
+    for response in (first, second):
+        events = parse_sse(response.text)
+        assert events[-1] == ("feedback", feedback)
+
+
+def test_save_feedback_keeps_the_first_row(client: TestClient, session: Session):
+    """Test that a second save for the same interview returns the saved row"""
+    _, interview = create_interview_with_questions(client)
+    interview_id = uuid.UUID(interview["id"])
+
+    first = interview_routes.save_feedback(
+        session,
+        Feedback(interview_id=interview_id, tone_summary="A", overall_feedback="A"),
+    )
+    second = interview_routes.save_feedback(
+        session,
+        Feedback(interview_id=interview_id, tone_summary="B", overall_feedback="B"),
+    )
+    assert second.id == first.id
+    assert second.tone_summary == "A"
+
+
+def test_chat_turn_analyses_the_answer_in_the_background(
+    client: TestClient, session: Session, monkeypatch, fake_transcription
+):
+    """Test that each answer is analysed as it is saved and feedback aggregates"""
+    token, interview = create_interview_with_questions(client)
+    provider = RecordingLLM()
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    answer = client.post(
+        f"/api/v1/interviews/{interview['id']}/chat",
+        files={"file": ("answer.wav", silent_wav(1600), "audio/wav")},
+        headers=headers,
+    ).json()[0]
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        session.expire_all()
+        if session.get(Message, uuid.UUID(answer["id"])).answer_feedback:
+            break
+        time.sleep(0.02)
+    notes = session.get(Message, uuid.UUID(answer["id"])).answer_feedback
+    assert notes == {"tone": "Fake tone.", "feedback": "Fake feedback."}
+    answer_prompts = [p for p in provider.prompts if "Assess this one answer" in p]
+    assert "Question: Tell me about yourself." in answer_prompts[0]
+
+    before = len(provider.prompts)
+    response = client.post(
+        f"/api/v1/interviews/{interview['id']}/feedback", headers=headers
+    )
+
+    assert response.status_code == 200
+    assert len(provider.prompts) == before + 1
+    assert "Answer 1: tone: Fake tone.; Fake feedback." in provider.prompts[-1]
+    assert "1600 samples" not in provider.prompts[-1]
+
+
+def test_feedback_analyses_missing_answers_or_reads_the_transcript(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that unanalysed answers are analysed at the end, else sent whole"""
+    token, interview = create_interview_with_questions(client)
+    interview_id = uuid.UUID(interview["id"])
+    save_behavioral_turn(session, interview_id, "First answer")
+    save_behavioral_turn(session, interview_id, "Second answer")
+    provider = RecordingLLM()
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+
+    notes = asyncio.run(
+        interview_routes.collect_answer_feedback(
+            session,
+            session.exec(select(Message).where(Message.role == "user")).all(),
+        )
+    )
+    assert notes == [{"tone": "Fake tone.", "feedback": "Fake feedback."}] * 2
+    assert len(provider.prompts) == 2
+    # Later answers are paired with the assistant message they replied to
+    assert any(
+        "Question: Thank you for your response." in prompt
+        and "Second answer" in prompt
+        for prompt in provider.prompts
+    )
+
+    # Answers the LLM couldn't assess: the feedback reads the transcript
+    for message in session.exec(select(Message)).all():
+        message.answer_feedback = None
+        session.add(message)
+    session.commit()
+    provider = RecordingLLM(responses={"Assess this one answer": "no notes"})
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+
+    response = client.post(
+        f"/api/v1/interviews/{interview['id']}/feedback",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert "First answer" in provider.prompts[-1]
+    assert "Second answer" in provider.prompts[-1]
+
+
+def test_chat_serves_the_reply_prepared_during_the_answer(
+    client: TestClient, session: Session, monkeypatch, fake_transcription
+):
+    """Test that replies are prepared ahead and stale ones are rebuilt"""
+    token, interview = create_interview_with_questions(client)
+    speculator = TurnSpeculator(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(interview_routes, "turn_speculator", speculator)
+    monkeypatch.setattr(settings, "FOLLOW_UP_QUESTIONS", False)
+
+    def answer() -> list:
+        return client.post(
+            f"/api/v1/interviews/{interview['id']}/chat",
+            files={"file": ("answer.wav", silent_wav(1600), "audio/wav")},
+            headers={"Authorization": f"Bearer {token}"},
+        ).json()
+
+    # Prepared while the answer is transcribed
+    first = answer()
+    assert first[1]["content"].endswith("next question: Describe a conflict.")
+    assert speculator.stats()["hits"] == 1
+
+    # The reply to the next answer was prepared as soon as this one was sent,
+    # but a turn saved elsewhere makes it stale
+    save_behavioral_turn(session, uuid.UUID(interview["id"]), "Saved elsewhere")
+    second = answer()
+    assert second[1]["content"].startswith("Thank you! You've completed")
+    assert speculator.stats()["stale"] == 1
+
+
+def test_follow_up_prompts_stay_flat_as_the_interview_grows(
+    client: TestClient, session: Session, monkeypatch, fake_transcription
+):
+    """Test that follow-ups are built from a rolling summary, not the history"""
+    token, interview = create_interview_with_questions(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(10):
+        client.post(
+            "/api/v1/questions/",
+            json={
+                "description": f"Planned question {i}.",
+                "type": "behavioral",
+                "interview_id": interview["id"],
+            },
+            headers=headers,
+        )
+    provider = RecordingLLM(responses={"keeping notes": "Candidate led two projects."})
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+
+    replies = [
+        client.post(
+            f"/api/v1/interviews/{interview['id']}/chat",
+            files={"file": ("answer.wav", silent_wav(1600), "audio/wav")},
+            headers=headers,
+        ).json()[1]["content"]
+        for _ in range(8)
+    ]
+
+    assert replies[0] == "Thanks, that helps. Describe a conflict."
+    assert replies[-1] == "Thanks, that helps. Planned question 6."
+    follow_ups = [p for p in provider.prompts if "The candidate's answer:" in p]
+    prepared = [p for p in provider.prompts if "is now answering" in p]
+    summaries = [p for p in provider.prompts if "keeping notes" in p]
+    assert len(follow_ups) == 8
+    assert len(prepared) >= 8
+    assert len(summaries) >= 7
+    for prompts, spread in [(follow_ups, 5), (prepared, 5), (summaries, 20)]:
+        tokens = [count_tokens(p) for p in prompts]
+        assert max(tokens) - min(tokens) <= spread
+    assert "Candidate led two projects." in follow_ups[-1]
+
+    session.expire_all()
+    saved = session.get(Interview, uuid.UUID(interview["id"]))
+    assert saved.summary == "Candidate led two projects."
+    assert saved.summary_message_count == 13
+
+
+def test_slow_follow_up_falls_back_to_the_prepared_one(
+    client: TestClient, monkeypatch, fake_transcription
+):
+    """Test that a turn waits at most the follow-up budget for the LLM"""
+    token, interview = create_interview_with_questions(client)
+    monkeypatch.setattr(settings, "FOLLOW_UP_TIMEOUT_SECONDS", 0.2)
+
+    class SlowAnswerLLM(RecordingLLM):
+        async def _call(self, prompt: str) -> str:
+            if "The candidate's answer:" in prompt:
+                await asyncio.sleep(5)
+            return await super()._call(prompt)
+
+    provider = SlowAnswerLLM(responses={"is now answering": "Prepared follow-up."})
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+
+    started = time.monotonic()
+    reply = client.post(
+        f"/api/v1/interviews/{interview['id']}/chat",
+        files={"file": ("answer.wav", silent_wav(1600), "audio/wav")},
+        headers={"Authorization": f"Bearer {token}"},
+    ).json()[1]["content"]
+
+    assert reply == "Prepared follow-up."
+    assert time.monotonic() - started < 2
@@ -0,0 +1,187 @@
+import asyncio
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.job import Job
+from app.services.jobs import JobQueue, JobQueueFull, MemoryJobStore
+from tests.test_questions import fake_gemini_fixture, setup_resume  # noqa: F401
+
+
+def wait_for_job(client: TestClient, job_id: str, headers: dict) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+
+def test_job_queue_bounds_concurrency_and_records_results():
+    """Test that at most `workers` jobs run at once and failures are recorded"""
+    queue = JobQueue(MemoryJobStore(), nullcontext, workers=2, max_queued=10)
+    running = peak = 0
+
+    @queue.handler("echo")
+    async def echo(session, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        if payload["n"] == 3:
+            raise HTTPException(status_code=400, detail="No user responses")
+        return payload["n"] * 2
+
+    async def main():
+        # A job left queued by an earlier process is picked up on start
+        leftover = queue.store.create(
+            Job(kind="echo", user_id=uuid.uuid4(), payload={"n": 0})
+        )
+        await queue.start()
+        jobs = [queue.submit("echo", uuid.uuid4(), {"n": n}) for n in range(1, 6)]
+        await queue.join()
+        await queue.stop()
+        return leftover, jobs
+
+    leftover, jobs = asyncio.run(main())
+
+    assert peak == 2
+    assert leftover.status == "succeeded" and leftover.result == 0
+    assert [job.result for job in jobs] == [2, 4, None, 8, 10]
+    assert jobs[2].status == "failed"
+    assert jobs[2].error == "No user responses"
+    assert all(job.finished_at for job in jobs)
+
+
+def test_separate_queues_share_a_store_without_crowding_each_other():
+    """Test that a full answer queue doesn't reject or delay user-facing jobs"""
+    store = MemoryJobStore()
+    main_queue = JobQueue(store, nullcontext, workers=1, max_queued=5)
+    answer_queue = JobQueue(store, nullcontext, workers=1, max_queued=2)
+    release = asyncio.Event()
+
+    @answer_queue.handler("answer")
+    async def answer(session, payload):
+        await release.wait()
+
+    @main_queue.handler("feedback")
+    async def feedback(session, payload):
+        return "done"
+
+    async def main():
+        # Each queue only takes back the kinds it handles
+        store.create(Job(kind="answer", user_id=uuid.uuid4(), payload={}))
+        await main_queue.start()
+        await answer_queue.start()
+        assert main_queue.stats()["queued"] == 0
+
+        # The leftover answer job and one more fill the answer queue
+        answer_queue.submit("answer", uuid.uuid4(), {})
+        with pytest.raises(JobQueueFull):
+            answer_queue.submit("answer", uuid.uuid4(), {})
+
+        job = main_queue.submit("feedback", uuid.uuid4(), {})
+        await asyncio.wait_for(main_queue.join(), 1)
+        release.set()
+        await answer_queue.join()
+        await main_queue.stop()
+        await answer_queue.stop()
+        return job
+
+    assert asyncio.run(main()).result == "done"
+
+
+def test_interrupted_and_abandoned_jobs_run_again_on_start():
+    """Test that jobs cut off by a stop or a crash don't stay "running" forever"""
+    store = MemoryJobStore()
+    release = asyncio.Event()
+
+    def make_queue():
+        queue = JobQueue(store, nullcontext, workers=1, max_queued=5, lease_seconds=60)
+
+        @queue.handler("echo")
+        async def echo(session, payload):
+            await release.wait()
+            return payload["n"]
+
+        return queue
+
+    # Left running by crashed processes: one long ago, one still in its lease
+    abandoned, recent = (
+        store.create(
+            Job(
+                kind="echo",
+                user_id=uuid.uuid4(),
+                payload={"n": n},
+                status="running",
+                started_at=datetime.utcnow() - timedelta(seconds=age),
+            )
+        )
+        for n, age in ((1, 600), (2, 5))
+    )
+
+    async def main():
+        queue = make_queue()
+        await queue.start()
+        job = queue.submit("echo", uuid.uuid4(), {"n": 3})
+        await asyncio.sleep(0.02)
+        await queue.stop()
+        assert abandoned.status == "queued" and job.status == "queued"
+
+        release.set()
+        queue = make_queue()
+        await queue.start()
+        await queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+
+    assert (abandoned.status, abandoned.result) == ("succeeded", 1)
+    assert (job.status, job.result) == ("succeeded", 3)
+    assert recent.status == "running"
+
+
+def test_generate_questions_job(client: TestClient, session: Session, fake_gemini):
+    """Test that question generation runs in the background and can be polled"""
+    headers, interview, request = setup_resume(client, session)
+
+    response = client.post(
+        "/api/v1/questions/generate/jobs", json=request, headers=headers
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    job = wait_for_job(client, response.json()["id"], headers)
+    assert job["status"] == "succeeded"
+    assert [q["description"] for q in job["result"]] == [
+        "Tell me about a conflict.",
+        "Describe a failure.",
+        "Why us?",
+    ]
+    saved = client.get(
+        "/api/v1/questions/",
+        params={"interview_id": interview["id"]},
+        headers=headers,
+    ).json()
+    assert len(saved) == 3
+
+    # Jobs are only visible to their owner
+    other = {"email": "other@example.com", "username": "other", "password": "x" * 12}
+    client.post("/api/v1/auth/register", json=other)
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": other["email"], "password": other["password"]},
+    ).json()["access_token"]
+    response = client.get(
+        f"/api/v1/jobs/{job['id']}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,96 @@
+import pytest
+
+from app.services import prompt_budget
+from app.services.prompt_budget import (
+    compact_resume,
+    compact_transcript,
+    count_tokens,
+    resume_sections,
+)
+
+RESUME = """## **JANE DOE**
+
+jane@example.com ∙ [LinkedIn](https://in.example/jane) ∙ GitHub ∙ +1 555 123 4567
+
+# <u>Education</u>
+
+**State University** _B.S. Computer Science_ ![logo](logo.png)
+
+# Experience
+
+**Acme** _,_ **_Backend Engineer_**
+- **Cut p95 latency by 40%** by caching [search](https://acme.dev) results
+
+| Team | Size |
+|------|------|
+| Payments | 6 |
+
+Page 1 of 2
+
+-----
+
+Jane Doe - Resume
+
+# Experience
+
+- Mentored two interns on code review
+
+Jane Doe - Resume
+
+# Skills
+
+- Python, Go, SQL
+"""
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    """Use the characters-per-token estimate so counts don't depend on tiktoken"""
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda: None)
+
+
+def test_resume_sections_strip_markdown_noise():
+    """Test that markup, tables, contact details and repeats are removed"""
+    assert resume_sections(RESUME) == [
+        ("Education", ["State University B.S. Computer Science"]),
+        (
+            "Experience",
+            [
+                "Acme, Backend Engineer",
+                "- Cut p95 latency by 40% by caching search results",
+                "Team; Size",
+                "Payments; 6",
+                "Jane Doe - Resume",
+                "- Mentored two interns on code review",
+            ],
+        ),
+        ("Skills", ["- Python, Go, SQL"]),
+    ]
+
+
+def test_compact_resume_keeps_high_priority_sections_in_order():
+    """Test that experience is kept first and the order of sections is kept"""
+    full = compact_resume(RESUME, budget=1000)
+    assert full.text.startswith("Education:\nState University")
+    assert full.saved_tokens > 0
+    assert full.original_tokens == count_tokens(RESUME)
+
+    experience = count_tokens(full.text.split("\n\n")[1])
+    skills = count_tokens(full.text.split("\n\n")[2])
+    tight = compact_resume(RESUME, budget=experience + skills)
+    assert tight.text.split("\n\n") == full.text.split("\n\n")[1:]
+    assert tight.tokens <= experience + skills + 1
+    assert prompt_budget.prompt_stats.stats()["resume"]["calls"] >= 2
+
+
+def test_compact_transcript_shares_the_budget():
+    """Test that short answers stay whole and long ones are cut to fit"""
+    short = "I led the migration."
+    long = "We rebuilt the billing service from scratch. " * 50
+
+    fitted = compact_transcript([short, long, short], budget=100)
+
+    assert [answer.text for answer in (fitted[0], fitted[2])] == [short, short]
+    assert fitted[1].text.endswith(" …")
+    assert fitted[1].original_tokens == count_tokens(long)
+    assert sum(answer.tokens for answer in fitted) <= 100
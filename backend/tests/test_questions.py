@@ -0,0 +1,158 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.main import app
+from app.models.question import Question
+from app.models.resume import Resume
+from app.services import ai_service
+from app.services.llm import GeminiProvider
+from app.services.cache import TieredCache
+
+
+@pytest.fixture(name="fake_gemini")
+def fake_gemini_fixture(monkeypatch):
+    """Stream a numbered list back in chunks that split lines mid-way"""
+    calls = []
+
+    class FakeGeminiModel:
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            calls.append(prompt)
+            text = "1. Tell me about a conflict.\n2. Describe a failure.\n3. Why us?"
+
+            async def chunks():
+                for i in range(0, len(text), 7):
+                    yield SimpleNamespace(parts=[True], text=text[i : i + 7])
+
+            if stream:
+                return chunks()
+            return SimpleNamespace(text=text)
+
+    provider = GeminiProvider("test", FakeGeminiModel())
+    monkeypatch.setattr(ai_service, "llm_provider", provider)
+    monkeypatch.setattr(ai_service, "question_cache", TieredCache(maxsize=8, ttl=60))
+    return calls
+
+
+def setup_resume(client: TestClient, session: Session) -> tuple[dict, dict, dict]:
+    user_data = {
+        "email": "candidate@example.com",
+        "username": "candidate",
+        "password": "candidatepassword123",
+    }
+    user = client.post("/api/v1/auth/register", json=user_data).json()
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": user_data["email"], "password": user_data["password"]},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    interview = client.post(
+        "/api/v1/interviews/",
+        json={"title": "Mock", "context": "resume", "interview_type": "behavioral"},
+        headers=headers,
+    ).json()
+    resume = Resume(parsed_data="Backend engineer", user_id=uuid.UUID(user["id"]))
+    session.add(resume)
+    session.commit()
+
+    request = {
+        "resume_id": str(resume.id),
+        "interview_id": interview["id"],
+        "num_questions": 3,
+    }
+    return headers, interview, request
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+def test_stream_questions_from_resume(
+    client: TestClient, session: Session, fake_gemini
+):
+    """Test that questions are saved and streamed one event per line"""
+    headers, interview, request = setup_resume(client, session)
+
+    response = client.post(
+        "/api/v1/questions/generate/stream", json=request, headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [e for e, _ in events] == ["question", "question", "question", "done"]
+    assert [d["description"] for _, d in events[:3]] == [
+        "Tell me about a conflict.",
+        "Describe a failure.",
+        "Why us?",
+    ]
+    assert events[-1][1] == {"count": 3}
+
+    saved = session.exec(
+        select(Question).where(Question.interview_id == uuid.UUID(interview["id"]))
+    ).all()
+    assert len(saved) == 3
+
+    # The streamed set is cached for the plain endpoint too
+    client.post("/api/v1/questions/generate", json=request, headers=headers)
+    assert len(fake_gemini) == 1
+
+
+def test_streamed_and_blocking_generation_save_one_question_set(
+    client: TestClient, session: Session, monkeypatch
+):
+    """Test that a question stream and a /generate call share one generation"""
+    headers, interview, request = setup_resume(client, session)
+    request["force_refresh"] = True
+    calls = []
+
+    class SlowGeminiModel:
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            calls.append(prompt)
+            lines = ["1. Tell me about a conflict.\n", "2. Describe a failure."]
+
+            async def chunks():
+                for line in lines:
+                    await asyncio.sleep(0.03)
+                    yield SimpleNamespace(parts=[True], text=line)
+
+            if stream:
+                return chunks()
+            await asyncio.sleep(0.06)
+            return SimpleNamespace(text="".join(lines))
+
+    monkeypatch.setattr(
+        ai_service, "llm_provider", GeminiProvider("test", SlowGeminiModel())
+    )
+
+    async def post_both():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            return await asyncio.gather(
+                *[
+                    ac.post(f"/api/v1/questions/{path}", json=request, headers=headers)
+                    for path in ("generate/stream", "generate")
+                ]
+            )
+
+    streamed, generated = asyncio.run(post_both())
+
+    assert len(calls) == 1
+    events = parse_sse(streamed.text)
+    assert [d for e, d in events if e == "question"] == generated.json()
+    assert events[-1] == ("done", {"count": 2})
+    saved = session.exec(
+        select(Question).where(Question.interview_id == uuid.UUID(interview["id"]))
+    ).all()
+    assert len(saved) == 2
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services.single_flight import SingleFlight
+
+
+def test_single_flight_shares_one_run():
+    """Test that concurrent calls with the same key share one run"""
+    flights = SingleFlight()
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.02)
+        return f"result {key}"
+
+    async def main():
+        return await asyncio.gather(
+            flights.run("a", lambda: work("a")),
+            flights.run("a", lambda: work("a")),
+            flights.run("b", lambda: work("b")),
+        )
+
+    assert asyncio.run(main()) == ["result a", "result a", "result b"]
+    assert runs == ["a", "b"]
+    assert flights.stats() == {"in_flight": 0, "started": 2, "coalesced": 1}
+
+
+def test_single_flight_errors_and_cancelled_callers():
+    """Test that errors are shared and a cancelled caller doesn't stop the run"""
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.02)
+        raise ValueError("model error")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        failures = await asyncio.gather(
+            flights.run("x", fail), flights.run("x", fail), return_exceptions=True
+        )
+        leader = asyncio.ensure_future(flights.run("y", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("y", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return failures, await follower, leader.cancelled()
+
+    failures, result, leader_cancelled = asyncio.run(main())
+    assert [str(e) for e in failures] == ["model error", "model error"]
+    assert result == "done"
+    assert leader_cancelled
@@ -0,0 +1,60 @@
+import asyncio
+
+from app.services.speculation import TurnSpeculator
+
+
+def test_speculator_serves_prepared_results_once():
+    """Test that a prepared result is served once and preparing is idempotent"""
+    speculator = TurnSpeculator(ttl_seconds=60, max_entries=10)
+    runs = []
+
+    async def build():
+        runs.append("build")
+        await asyncio.sleep(0.01)
+        return "next question"
+
+    async def main():
+        speculator.prepare("interview", (1, "m1"), build)
+        speculator.prepare("interview", (1, "m1"), build)
+        first = await speculator.take("interview", (1, "m1"))
+        second = await speculator.take("interview", (1, "m1"))
+        return first, second
+
+    assert asyncio.run(main()) == ("next question", None)
+    assert runs == ["build"]
+    stats = speculator.stats()
+    assert (stats["prepared"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_speculator_discards_stale_expired_and_failed_results():
+    """Test that results for another state, too old or failed aren't served"""
+    now = [0.0]
+    speculator = TurnSpeculator(ttl_seconds=60, max_entries=1, clock=lambda: now[0])
+
+    async def build():
+        return "reply"
+
+    async def fail():
+        raise ValueError("model error")
+
+    async def main():
+        speculator.prepare("a", (1, "m1"), build)
+        stale = await speculator.take("a", (2, "m2"))
+
+        speculator.prepare("a", (2, "m2"), build)
+        now[0] = 61.0
+        expired = await speculator.take("a", (2, "m2"))
+
+        speculator.prepare("a", (2, "m2"), fail)
+        failed = await speculator.take("a", (2, "m2"))
+
+        # Only the most recently prepared interview is kept
+        speculator.prepare("a", (2, "m2"), build)
+        speculator.prepare("b", (0, None), build)
+        evicted = await speculator.take("a", (2, "m2"))
+        kept = await speculator.take("b", (0, None))
+        return stale, expired, failed, evicted, kept
+
+    assert asyncio.run(main()) == (None, None, None, None, "reply")
+    stats = speculator.stats()
+    assert (stats["stale"], stats["failed"], stats["hits"]) == (2, 1, 1)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE
+from app.services.speech_analytics import (
+    acoustic_features,
+    count_fillers,
+    speech_analytics,
+    summarize_speech_rate,
+)
+
+
+def tone(seconds: float, hz: float = 200.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_acoustic_features_measure_pauses_and_pitch():
+    """Test that pauses, speaking time and pitch come from the waveform"""
+    waveform = np.concatenate(
+        [
+            silence(1),
+            tone(2),
+            silence(1.5),
+            tone(2),
+            silence(0.4),
+            tone(1),
+            silence(1),
+        ]
+    )
+
+    features = acoustic_features(waveform)
+
+    assert features["duration_seconds"] == 8.9
+    assert 6.7 < features["speaking_seconds"] < 7.1
+    assert features["pause_count"] == 2
+    assert features["long_pause_count"] == 1
+    assert 1.4 < features["longest_pause_seconds"] < 1.6
+    assert abs(features["pitch_hz_mean"] - 200) < 5
+
+
+def test_acoustic_features_of_silence():
+    """Test that audio without speech yields no speaking time"""
+    features = acoustic_features(silence(2))
+
+    assert features["speaking_seconds"] == 0.0
+    assert features["pitch_hz_mean"] is None
+    assert speech_analytics(features, "")["words_per_minute"] is None
+
+
+def test_speech_analytics_counts_words_and_fillers():
+    """Test that words per minute and fillers are derived from the transcript"""
+    text = "Um, I mean, we shipped it. Uh, you know, on time."
+    analytics = speech_analytics({"speaking_seconds": 6.0}, text)
+
+    assert count_fillers(text) == {"um": 1, "uh": 1, "you know": 1, "i mean": 1}
+    assert analytics["word_count"] == 11
+    assert analytics["words_per_minute"] == 110.0
+    assert analytics["filler_count"] == 4
+
+
+def test_summarize_speech_rate():
+    """Test that the feedback line aggregates every spoken answer"""
+    answers = [
+        {
+            "speaking_seconds": 30,
+            "word_count": 90,
+            "long_pause_count": 1,
+            "filler_count": 2,
+        },
+        {
+            "speaking_seconds": 30,
+            "word_count": 60,
+            "long_pause_count": 0,
+            "filler_count": 1,
+        },
+        None,
+    ]
+
+    assert summarize_speech_rate(answers) == (
+        "Moderate (150 words per minute); 1 pauses longer than 1s; "
+        "3 filler words in 150 words"
+    )
+    assert summarize_speech_rate([None]) is None
@@ -0,0 +1,509 @@
+import asyncio
+import io
+import os
+import shutil
+import threading
+import wave
+
+import numpy as np
+import pytest
+import torch
+import whisper
+
+from app.core.config import settings
+from app.services import asr, transcription
+from app.services.asr import ASRBackendRegistry, count_fallbacks
+from app.services.audio import (
+    SAMPLE_RATE,
+    AudioDecodeError,
+    VADStats,
+    decode_audio,
+    decode_pcm,
+    find_quiet_split,
+    split_at_pauses,
+    trim_silence,
+)
+from app.services.cache import SQLiteCacheTier, TieredCache
+from app.services.transcription import (
+    TranscriptionBatcher,
+    TranscriptionPool,
+    TranscriptionQueueFull,
+    transcribe_chunked,
+    transcript_cache_key,
+)
+
+
+def test_model_registry_loads_each_model_once(monkeypatch):
+    """Test that repeated lookups reuse the already loaded model"""
+    calls = []
+
+    def fake_load_model(name, device=None):
+        calls.append(name)
+        return torch.nn.Linear(4, 4)
+
+    monkeypatch.setattr(asr.whisper, "load_model", fake_load_model)
+    monkeypatch.setattr(settings, "WHISPER_MMAP_WEIGHTS", False)
+    registry = ASRBackendRegistry("whisper")
+
+    first = registry.get("tiny")
+    second = registry.get("tiny")
+
+    assert first is second
+    assert calls == ["tiny"]
+
+    stats = registry.stats()
+    assert stats[0]["backend"] == "whisper"
+    assert stats[0]["name"] == "tiny"
+    assert stats[0]["resident_mb"] >= 0
+    assert stats[0]["real_time_factor"] is None
+
+
+def load_tiny_whisper(name, device=None) -> whisper.model.Whisper:
+    """A randomly initialised Whisper small enough to run in tests"""
+    dims = whisper.model.ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=8,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=16,
+        n_text_state=8,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    model = whisper.model.Whisper(dims)
+    # Whisper allocates this with torch.empty; a checkpoint fills it in
+    torch.nn.init.zeros_(model.decoder.positional_embedding)
+    return model
+
+
+def test_quantized_backend_records_real_time_factor(monkeypatch, tmp_path):
+    """Test that the int8 backend quantizes a real Whisper model and times it"""
+    monkeypatch.setattr(asr.whisper, "load_model", load_tiny_whisper)
+    monkeypatch.setattr(settings, "WHISPER_MMAP_DIR", str(tmp_path))
+    backend = ASRBackendRegistry("whisper-int8").get("tiny")
+
+    assert any(
+        isinstance(m, torch.ao.nn.quantized.dynamic.Linear)
+        for m in backend.model.modules()
+    )
+    assert backend.resident_bytes > 0
+    assert backend.real_time_factor is None
+
+    backend.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert backend.real_time_factor > 0
+    assert backend.audio_seconds == 1.0
+
+
+def mapped_file(tensor: torch.Tensor) -> str | None:
+    """Path of the file mapping that holds the tensor's data, if any"""
+    address = tensor.data_ptr()
+    with open("/proc/self/maps") as maps:
+        for line in maps:
+            fields = line.split()
+            start, end = (int(a, 16) for a in fields[0].split("-"))
+            if start <= address < end:
+                return fields[5] if len(fields) > 5 else None
+    return None
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="Linux only")
+def test_whisper_weights_are_memory_mapped(monkeypatch, tmp_path):
+    """Test that every load maps the same fp32 weight file instead of copying"""
+    loads = []
+
+    def counting_load_model(name, device=None):
+        loads.append(name)
+        return load_tiny_whisper(name, device)
+
+    monkeypatch.setattr(asr.whisper, "load_model", counting_load_model)
+    monkeypatch.setattr(settings, "WHISPER_MMAP_DIR", str(tmp_path))
+
+    first = asr.load_whisper_mmap("tiny")
+    second = asr.load_whisper_mmap("tiny")
+
+    # The checkpoint is converted once; later loads only map the file
+    assert loads == ["tiny"]
+    for model in (first, second):
+        weight = model.encoder.conv1.weight
+        assert weight.dtype == torch.float32
+        assert mapped_file(weight) == str(tmp_path / "tiny.fp32.pt")
+    assert asr.process_memory()["rss_mb"] > 0
+
+
+def test_model_registry_rejects_unknown_backend():
+    """Test that a misconfigured backend name fails loudly"""
+    with pytest.raises(ValueError):
+        ASRBackendRegistry("not-a-backend")
+
+
+def test_transcription_pool_rejects_when_full():
+    """Test that the pool applies back-pressure instead of queueing forever"""
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=0)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(TranscriptionQueueFull):
+            await pool.run(release.wait)
+        release.set()
+        assert await first is True
+        assert pool.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_transcription_pool_fails_startup_when_a_worker_cannot_load(monkeypatch):
+    """Test that waiting for warm workers raises instead of hanging"""
+    monkeypatch.setattr(settings, "WHISPER_MODEL", "no-such-model")
+    monkeypatch.setattr(settings, "WHISPER_PRELOAD_MODELS", [])
+    pool = TranscriptionPool(workers=1, torch_threads=1, queue_depth=0)
+
+    with pytest.raises(RuntimeError, match="failed to load"):
+        pool.start(wait_until_warm=True)
+    assert pool.stats()["in_flight"] == 0
+
+
+def make_wav(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_decode_audio_in_memory():
+    """Test that audio bytes decode to a 16 kHz float32 waveform"""
+    tone = 0.5 * np.sin(np.linspace(0, 440 * 2 * np.pi, SAMPLE_RATE))
+    waveform = decode_audio(make_wav(tone, sample_rate=8000))
+
+    assert waveform.dtype == np.float32
+    assert abs(len(waveform) - 2 * SAMPLE_RATE) < 400
+
+
+def test_decode_pcm_reads_pcm_and_wav_without_ffmpeg():
+    """Test that 16 kHz mono PCM payloads are read directly"""
+    samples = np.array([0.0, 0.5, -0.5], dtype=np.float32)
+    raw = (samples * 32767).astype("<i2").tobytes()
+
+    assert np.allclose(decode_pcm(raw, "audio/pcm;rate=16000"), samples, atol=1e-4)
+    assert np.allclose(
+        decode_pcm((samples * 32767).astype(">i2").tobytes(), "audio/L16"),
+        samples,
+        atol=1e-4,
+    )
+    assert np.allclose(decode_pcm(make_wav(samples), "audio/wav"), samples, atol=1e-4)
+
+    # Anything else still needs ffmpeg
+    assert decode_pcm(make_wav(samples, sample_rate=8000), "audio/wav") is None
+    assert decode_pcm(b"webm bytes", "audio/webm") is None
+    assert decode_pcm(raw, None) is None
+    with pytest.raises(AudioDecodeError):
+        decode_pcm(raw, "audio/pcm;rate=8000")
+    # A fmt chunk cut off mid-way is bad input, not a server error
+    truncated = b"RIFF\x0e\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00"
+    with pytest.raises(AudioDecodeError):
+        decode_pcm(truncated, "audio/wav")
+
+
+def test_batcher_groups_concurrent_clips(monkeypatch):
+    """Test that clips submitted together are transcribed as one batch"""
+    batches = []
+
+    def fake_batch_transcription(waveforms, initial_prompt):
+        batches.append(len(waveforms))
+        return [f"clip of {len(w)}" for w in waveforms]
+
+    monkeypatch.setattr(
+        transcription, "_run_batch_transcription", fake_batch_transcription
+    )
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=4)
+    batcher = TranscriptionBatcher(pool, max_batch_size=4, max_wait_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(batcher.submit(np.zeros(n, dtype=np.float32)) for n in (1, 2, 3))
+        )
+
+    assert asyncio.run(scenario()) == ["clip of 1", "clip of 2", "clip of 3"]
+    assert batches == [3]
+    assert batcher.stats()["batches_run"] == 1
+
+
+def test_trim_silence_strips_edges_and_long_pauses():
+    """Test that leading/trailing silence is removed and pauses are capped"""
+    second = SAMPLE_RATE
+    tone = 0.5 * np.sin(np.linspace(0, 220 * 2 * np.pi, second)).astype(np.float32)
+    silence = np.zeros(2 * second, dtype=np.float32)
+    waveform = np.concatenate([silence, tone, silence, tone, silence])
+
+    result = trim_silence(waveform, max_pause_ms=600)
+
+    # Two seconds of speech, one capped pause, and a little padding
+    assert 2.6 < len(result.waveform) / SAMPLE_RATE < 3.4
+    assert result.removed_seconds > 4.5
+    assert result.original_seconds == 8.0
+
+
+def test_vad_stats_accumulate_removed_seconds():
+    """Test that trimming results add up for the health endpoint"""
+    stats = VADStats()
+    waveform = np.concatenate(
+        [np.zeros(SAMPLE_RATE), 0.5 * np.ones(SAMPLE_RATE), np.zeros(SAMPLE_RATE)]
+    ).astype(np.float32)
+    stats.record(trim_silence(waveform))
+    stats.record(trim_silence(waveform))
+
+    report = stats.stats()
+    assert report["clips"] == 2
+    assert report["original_seconds"] == 6.0
+    assert 0 < report["removed_ratio"] < 1
+
+
+def test_trim_silence_keeps_audio_without_speech():
+    """Test that pure silence is passed through untouched"""
+    waveform = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    assert len(trim_silence(waveform).waveform) == SAMPLE_RATE
+
+
+def test_transcribe_serves_repeated_uploads_from_cache(monkeypatch):
+    """Test that re-uploading identical audio skips transcription"""
+    calls = []
+
+    async def fake_transcribe_uncached(audio_bytes, initial_prompt, content_type):
+        calls.append(audio_bytes)
+        return {"text": "cached answer", "analytics": None}
+
+    monkeypatch.setattr(
+        transcription, "_transcribe_uncached", fake_transcribe_uncached
+    )
+    monkeypatch.setattr(
+        transcription, "transcript_cache", TieredCache(maxsize=8, ttl=60)
+    )
+
+    async def scenario():
+        return [await transcription.transcribe(b"same audio") for _ in range(2)]
+
+    results = asyncio.run(scenario())
+    assert [r["text"] for r in results] == ["cached answer", "cached answer"]
+    assert len(calls) == 1
+    assert transcription.transcript_cache.stats()["memory_hits"] == 1
+
+
+def test_tiered_cache_persists_to_sqlite(tmp_path):
+    """Test that the SQLite tier survives a fresh in-memory cache"""
+    path = str(tmp_path / "cache.db")
+    TieredCache(maxsize=8, ttl=60, sqlite_path=path).set("key", "value")
+
+    cache = TieredCache(maxsize=8, ttl=60, sqlite_path=path)
+    assert cache.get("key") == "value"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_sqlite_tier_drops_expired_rows_and_caps_size(tmp_path):
+    """Test that the disk tier deletes expired rows and keeps at most max_rows"""
+    tier = SQLiteCacheTier(str(tmp_path / "cache.db"), max_rows=3, prune_every=1)
+    tier.set("expired", "value", ttl=-1)
+    assert tier.get("expired") is None
+    assert len(tier) == 0
+
+    for i in range(5):
+        tier.set(f"key{i}", i, ttl=60 + i)
+    assert len(tier) == 3
+    assert tier.get("key0") is None
+    assert tier.get("key4") == 4
+
+
+def test_count_fallbacks_counts_each_window_once():
+    """Test that fallback re-decodes are counted per decoded window"""
+    temperatures = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+    windows = [(0, 0.0), (0, 0.0), (3000, 0.4), (3000, 0.4), (6000, 0.2)]
+
+    assert count_fallbacks(windows, temperatures) == 3
+    assert count_fallbacks([], temperatures) == 0
+
+
+def test_batcher_groups_clips_by_prompt(monkeypatch):
+    """Test that clips conditioned on different questions never share a batch"""
+    batches = []
+
+    def fake_batch_transcription(waveforms, initial_prompt):
+        batches.append((initial_prompt, len(waveforms)))
+        return [initial_prompt for _ in waveforms]
+
+    monkeypatch.setattr(
+        transcription, "_run_batch_transcription", fake_batch_transcription
+    )
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=4)
+    batcher = TranscriptionBatcher(pool, max_batch_size=4, max_wait_ms=20)
+    clip = np.zeros(10, dtype=np.float32)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(clip, "Plan"),
+            batcher.submit(clip, "Match"),
+            batcher.submit(clip, "Plan"),
+            batcher.submit(clip, "Match"),
+        )
+
+    assert asyncio.run(scenario()) == ["Plan", "Match", "Plan", "Match"]
+    assert sorted(batches) == [("Match", 2), ("Plan", 2)]
+
+
+def test_transcript_cache_key_covers_prompt_and_decoding(monkeypatch):
+    """Test that the cache key changes with anything that changes the text"""
+    base = transcript_cache_key(b"audio", "Tell me about yourself.")
+
+    assert transcript_cache_key(b"audio", "Describe a conflict.") != base
+    assert transcript_cache_key(b"audio", None) != base
+
+    monkeypatch.setattr(settings, "WHISPER_LANGUAGE", "de")
+    assert transcript_cache_key(b"audio", "Tell me about yourself.") != base
+    monkeypatch.setattr(settings, "WHISPER_LANGUAGE", "en")
+    monkeypatch.setattr(settings, "WHISPER_TEMPERATURES", [0.0])
+    assert transcript_cache_key(b"audio", "Tell me about yourself.") != base
+
+
+def test_transcription_pool_reports_worker_model_stats():
+    """Test that every job refreshes the stats of the process that ran it"""
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=1)
+
+    assert asyncio.run(pool.run(len, "abc")) == 3
+    assert [w["pid"] for w in pool.worker_stats()] == [os.getpid()]
+
+
+def test_find_quiet_split_cuts_between_words():
+    """Test that long audio is cut in the pause, not at the window edge"""
+    tone = 0.5 * np.sin(np.linspace(0, 220 * 2 * np.pi, SAMPLE_RATE))
+    pause = np.zeros(SAMPLE_RATE // 2)
+    waveform = np.concatenate([tone, pause, tone]).astype(np.float32)
+
+    split = find_quiet_split(waveform, 0, len(waveform))
+    assert SAMPLE_RATE <= split < SAMPLE_RATE + len(pause)
+
+
+def test_batcher_runs_lone_clip_through_single_clip_path(monkeypatch):
+    """Test that a batch of one gets the full fallback and no-speech handling"""
+    monkeypatch.setattr(
+        transcription,
+        "_run_waveform_transcription",
+        lambda waveform, initial_prompt: "single",
+    )
+    monkeypatch.setattr(
+        transcription,
+        "_run_batch_transcription",
+        lambda waveforms, initial_prompt: pytest.fail("batched a lone clip"),
+    )
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=4)
+    batcher = TranscriptionBatcher(pool, max_batch_size=4, max_wait_ms=5)
+
+    assert asyncio.run(batcher.submit(np.zeros(10, dtype=np.float32))) == "single"
+    assert batcher.stats()["batches_run"] == 0
+
+
+def test_transcribe_rejects_before_decoding_when_pool_is_full(monkeypatch):
+    """Test that a full pool fails fast without decoding the upload"""
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=0)
+    pool._in_flight = pool.capacity
+    monkeypatch.setattr(transcription, "transcription_pool", pool)
+    monkeypatch.setattr(
+        transcription, "decode_upload", lambda *args: pytest.fail("decoded")
+    )
+
+    with pytest.raises(TranscriptionQueueFull):
+        asyncio.run(transcription._transcribe_uncached(b"audio", None))
+
+
+def test_transcribe_chunked_stitches_parallel_chunks(monkeypatch):
+    """Test that long audio is split at pauses and stitched with offsets"""
+    second = SAMPLE_RATE
+    tone = 0.5 * np.sin(np.linspace(0, 220 * 2 * np.pi, 4 * second))
+    pause = np.zeros(second // 2)
+    waveform = np.concatenate([tone, pause, tone, pause, tone]).astype(np.float32)
+    monkeypatch.setattr(settings, "TRANSCRIBE_CHUNK_SECONDS", 5.0)
+
+    def fake_segment_transcription(chunk, initial_prompt):
+        seconds = len(chunk) / SAMPLE_RATE
+        return {
+            "text": f" {seconds:.1f}s",
+            "segments": [{"start": 0.0, "end": seconds, "text": "chunk"}],
+        }
+
+    monkeypatch.setattr(
+        transcription, "_run_segment_transcription", fake_segment_transcription
+    )
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=4)
+    result = asyncio.run(transcribe_chunked(pool, waveform))
+
+    bounds = split_at_pauses(waveform, 5 * second)
+    assert len(bounds) == 3
+    assert [s["start"] for s in result["segments"]] == [
+        start / SAMPLE_RATE for start, _ in bounds
+    ]
+    assert result["segments"][-1]["end"] == len(waveform) / SAMPLE_RATE
+    # Every cut lands in a pause, not in the middle of speech
+    for _, end in bounds[:-1]:
+        assert np.abs(waveform[end - 100 : end + 100]).max() == 0
+    assert len(result["text"].split()) == 3
+
+
+def test_long_uploads_keep_their_stitched_segments(monkeypatch):
+    """Test that the chunked path's timestamps reach the transcription result"""
+    waveform = np.zeros(40 * SAMPLE_RATE, dtype=np.float32)
+    pool = TranscriptionPool(workers=0, torch_threads=1, queue_depth=4)
+    monkeypatch.setattr(transcription, "transcription_pool", pool)
+    monkeypatch.setattr(
+        transcription, "_decode_and_analyze", lambda *args: (waveform, {})
+    )
+    monkeypatch.setattr(
+        transcription,
+        "_run_segment_transcription",
+        lambda chunk, initial_prompt: {
+            "text": "chunk",
+            "segments": [{"start": 0.0, "end": 1.0, "text": "chunk"}],
+        },
+    )
+
+    result = asyncio.run(transcription._transcribe_uncached(b"audio", None))
+
+    starts = [segment["start"] for segment in result["segments"]]
+    assert len(starts) > 1 and starts == sorted(starts) and starts[0] == 0.0
+    assert result["text"] == " ".join(["chunk"] * len(starts))
+
+
+def test_transcribe_chunked_cancels_other_chunks_on_failure(monkeypatch):
+    """Test that a chunk the pool rejects fails the answer and stops the rest"""
+    waveform = np.zeros(12 * SAMPLE_RATE, dtype=np.float32)
+    monkeypatch.setattr(settings, "TRANSCRIBE_CHUNK_SECONDS", 5.0)
+    pool = TranscriptionPool(workers=2, torch_threads=1, queue_depth=4)
+    started, cancelled = [], []
+
+    async def fake_run(fn, chunk, initial_prompt):
+        started.append(len(chunk))
+        if len(started) == 1:
+            raise TranscriptionQueueFull("Transcription queue is full")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(len(chunk))
+            raise
+
+    monkeypatch.setattr(pool, "run", fake_run)
+
+    async def main():
+        with pytest.raises(TranscriptionQueueFull):
+            await transcribe_chunked(pool, waveform)
+        # Let the cancellations land, before asyncio.run cleans up
+        await asyncio.sleep(0)
+        return list(cancelled)
+
+    cancelled_in_time = asyncio.run(main())
+
+    # Every other chunk that reached the pool was cancelled there
+    assert len(started) > 1
+    assert sorted(cancelled_in_time) == sorted(started[1:])